@@ -20,7 +20,7 @@ all human gene-phenotype associations:
 """
 
 import argparse
-from ontobio.golr.golr_associations import bulk_fetch
+from ontobio.golr.golr_associations import bulk_fetch_iter
 import networkx as nx
 from networkx.algorithms.dag import ancestors, descendants
 from networkx.drawing.nx_pydot import write_dot
@@ -51,7 +51,7 @@ def main():
     parser.add_argument('-S', '--slim', nargs='*', type=str, required=False,
                         help='Slim IDs')
     parser.add_argument('-L', '--limit', type=int, default=100000, required=False,
-                        help='Limit on number of rows')
+                        help='Number of rows fetched per request')
     parser.add_argument('-u', '--url', type=str, required=False,
                         help='Solr URL. E.g. http://localhost:8983/solr/golr')
     parser.add_argument('-v', '--verbosity', default=0, action='count',
@@ -72,12 +72,12 @@ def main():
 
     [subject_category, object_category] = args.category
 
-    assocs = bulk_fetch(subject_category,
-                        object_category,
-                        args.species,
-                        rows=args.limit,
-                        slim=args.slim,
-                        url=args.url)
+    assocs = bulk_fetch_iter(subject_category,
+                             object_category,
+                             args.species,
+                             rows=args.limit,
+                             slim=args.slim,
+                             url=args.url)
 
     for a in assocs:
         print("{}\t{}\t{}".format(a['subject'],
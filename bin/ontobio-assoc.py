@@ -46,7 +46,7 @@ from ontobio import ecomap
 import logging
 
 
-ecomapping = ecomap.EcoMap()
+ecomapping = ecomap.get_ecomap()
 iea_eco = ecomapping.coderef_to_ecoclass("IEA")
 
 
@@ -88,6 +88,8 @@ def main():
                         help='category tuple (SUBJECT OBJECT)')
     parser.add_argument('-T', '--taxon', type=str, required=False,
                         help='Taxon of associations')
+    parser.add_argument('--sparse', dest='sparse', action='store_true', default=False,
+                        help='Store inferred associations in a sparse matrix; faster enrichment and similarity for large sets')
     parser.add_argument('-v', '--verbosity', default=0, action='count',
                         help='Increase output verbosity')
 
@@ -107,6 +109,7 @@ def main():
     parser_n.add_argument('-s', '--sample_file', type=str, help='file containing list of gene IDs in sample set')
     parser_n.add_argument('-b', '--background_file', type=str, help='file containing list of gene IDs in background set')
     parser_n.add_argument('-t', '--threshold', type=float, help='p-value threshold')
+    parser_n.add_argument('--correction', default='bonferroni', choices=['bonferroni', 'fdr_bh'], help='multiple testing correction')
     parser_n.add_argument('sample_ids', nargs='*', help='list of gene IDs in sample set')
     parser_n.set_defaults(function=run_enrichment_test)
 
@@ -201,14 +204,16 @@ def main():
     if args.assocfile is not None:
         aset = afactory.create_from_file(file=args.assocfile,
                                          fmt=args.assocformat,
-                                         ontology=ont)
+                                         ontology=ont,
+                                         sparse=args.sparse)
     else:
         [subject_category, object_category] = args.category
         # create using GO/Monarch services
         aset = afactory.create(ontology=ont,
                                subject_category=subject_category,
                                object_category=object_category,
-                               taxon=args.taxon)
+                               taxon=args.taxon,
+                               sparse=args.sparse)
 
 
     func = args.function
@@ -234,7 +239,7 @@ def run_enrichment_test(ont, aset, args):
     if args.query is not None:
         subjects = aset.query([args.query])
     print("SUBJECTS q={} : {}".format(args.query, subjects))
-    enr = aset.enrichment_test(subjects=subjects, background=background, hypotheses=args.hypotheses, threshold=args.threshold, labels=True)
+    enr = aset.enrichment_test(subjects=subjects, background=background, hypotheses=args.hypotheses, threshold=args.threshold, labels=True, correction=args.correction)
     print('ENRICHED_TERMS={}'.format(len(enr)))
     for r in enr:
         print("{:8.3g} {} {:40s}".format(r['p'],r['c'],str(r['n'])))
@@ -63,6 +63,8 @@ def main():
                         help='File to export unmapped nodes to')
     parser.add_argument('-A', '--all-by-all', dest='all_by_all', action='store_true',
                         help='compare all ontologies against all.')
+    parser.add_argument('-w', '--workers', default=1, type=int,
+                        help='number of processes used to score matches')
     parser.add_argument('-v', '--verbosity', default=0, action='count',
                         help='Increase output verbosity')
 
@@ -112,7 +114,7 @@ def main():
         
     logging.info("ALL: {}".format(args.all_by_all))
     
-    lexmap = LexicalMapEngine(config=config)
+    lexmap = LexicalMapEngine(config=config, workers=args.workers)
 
     if args.eval_xrefs:
         cpairs = []
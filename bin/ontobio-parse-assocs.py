@@ -208,13 +208,14 @@ def main():
     if outfh is not None:
         outfh.close()
 
+    report = p.report.to_report_json()
     if args.report_md is not None:
         report_md = open(args.report_md, "w")
-        report_md.write(p.report.to_markdown())
+        p.report.write_markdown(report_md, report_json=report)
         report_md.close()
     if args.report_json is not None:
         report_json = open(args.report_json, "w")
-        report_json.write(json.dumps(p.report.to_report_json(), indent=4))
+        p.report.write_report_json(report_json, report_json=report)
         report_json.close()
     if not (args.report_md or args.report_json):
         print(p.report.to_markdown())
@@ -8,9 +8,10 @@ import gzip
 import urllib
 import shutil
 import logging
+import copy
 
 from ontobio.model.association import GoAssociation
-from ontobio.model.association import Curie, ExtensionUnit
+from ontobio.model.association import Curie, ExtensionUnit, map_gp_type_label_to_curie
 from ontobio.io.entityparser import GpiParser
 from ontobio.ontol_factory import OntologyFactory
 from ontobio.io.gafparser import GafParser
@@ -21,6 +22,8 @@ from ontobio.io import assocparser
 from ontobio.io import gafgpibridge
 from ontobio.io import entitywriter
 from ontobio.io import gaference
+from ontobio.io import parser_version_regex
+from ontobio.model import collections
 from ontobio.rdfgen import assoc_rdfgen
 from ontobio.rdfgen.gocamgen.gocam_builder import GoCamBuilder, AssocExtractor
 from ontobio.validation import metadata
@@ -175,6 +178,22 @@ def check_and_download_mixin_source(mixin_metadata, group_id, dataset, target_di
     return unzipped
 
 
+def download_matching_gpis(group, group_metadata, dataset, target_dir, replace_existing_files=True) -> List[str]:
+    """
+    Download the GPI sources in the group metadata for a dataset (e.g. "zfin", "goa_cow"), returning their paths
+    """
+    gpi_paths = []
+    for ds in group_metadata["datasets"]:
+        # Where type=GPI for the same dataset (e.g. "zfin", "goa_cow")
+        if ds["type"] == "gpi" and ds["dataset"] == dataset and ds.get("source"):
+            gpi_path = download_a_dataset_source(group, ds, target_dir, ds["source"],
+                                                 replace_existing_files=replace_existing_files)
+            if ds.get("compression", None) == "gzip":
+                gpi_path = unzip_simple(gpi_path)
+            gpi_paths.append(gpi_path)
+    return gpi_paths
+
+
 def mixin_dataset(mixin_metadata, dataset):
     mixin_dataset_version = tools.find(mixin_metadata["datasets"], lambda d: d.get("merges_into", "") == dataset)
     if mixin_dataset_version is None:
@@ -207,12 +226,12 @@ def unzip_simple(zipped_path):
     return unzipped
 
 
-def create_parser(config, group, dataset, format="gaf"):
+def create_parser(config, group, dataset, format="gaf", bio_entities=None):
     if format == "gpad":
-        return GpadParser(config=config, group=group, dataset=dataset)
+        return GpadParser(config=config, group=group, dataset=dataset, bio_entities=bio_entities)
     else:
         # We assume it's gaf as we only support in this instant gaf and gpad
-        return GafParser(config=config, group=group, dataset=dataset)
+        return GafParser(config=config, group=group, dataset=dataset, bio_entities=bio_entities)
 
 
 """
@@ -226,12 +245,11 @@ def produce_gaf(dataset, source_gaf, ontology_graph, gpipaths=None, paint=False,
                 retracted_pub_set=None, db_entities=None, group_idspace=None,
                 format="gaf", suppress_rule_reporting_tags=[], annotation_inferences=None, group_metadata=None,
                 extensions_constraints=None, rule_contexts=[], gaf_output_version="2.2",
-                rule_set=assocparser.RuleSet.ALL) -> list[str]:
+                rule_set=assocparser.RuleSet.ALL, workers=1, profile=False, report_max_examples=None) -> list[str]:
     filtered_associations = open(os.path.join(os.path.split(source_gaf)[0], "{}_noiea.gaf".format(dataset)), "w")
-    config = assocparser.AssocParserConfig(
-        ontology=ontology_graph,
-        filter_out_evidence=["IEA"],
-        filtered_evidence_file=filtered_associations,
+    config = validation_config(
+        ontology_graph,
+        filtered_associations,
         gpi_authority_path=gpipaths,
         paint=paint,
         rule_metadata=rule_metadata,
@@ -247,6 +265,8 @@ def produce_gaf(dataset, source_gaf, ontology_graph, gpipaths=None, paint=False,
         extensions_constraints=extensions_constraints,
         rule_contexts=rule_contexts,
         rule_set=rule_set,
+        profile=profile,
+        report_max_examples=report_max_examples,
     )
     click.echo("Producing {}".format(source_gaf))
     # logger.info("AssocParserConfig used: {}".format(config))
@@ -261,18 +281,40 @@ def produce_gaf(dataset, source_gaf, ontology_graph, gpipaths=None, paint=False,
         lines = sum(1 for line in sg)
 
     with open(source_gaf) as gaf:
-        with click.progressbar(iterable=parser.association_generator(file=gaf), length=lines) as associations:
+        with click.progressbar(iterable=parser.association_generator(file=gaf, workers=workers), length=lines) as associations:
             for assoc in associations:
                 gafwriter.write_assoc(assoc)
 
     outfile.close()
     filtered_associations.close()
 
+    write_reports(parser, source_gaf, dataset, profile)
+
+    return [validated_gaf_path, filtered_associations.name]
+
+
+def validation_config(ontology_graph, filtered_evidence_file, **config_args) -> assocparser.AssocParserConfig:
+    """
+    Parser config for validating a source, filtering IEA annotations out to `filtered_evidence_file`
+    """
+    return assocparser.AssocParserConfig(
+        ontology=ontology_graph,
+        filter_out_evidence=["IEA"],
+        filtered_evidence_file=filtered_evidence_file,
+        **config_args
+    )
+
+
+def write_reports(parser, source_gaf, dataset, profile=False):
+    """
+    Write the markdown and json validation reports of a parser next to the source file
+    """
+    report = parser.report.to_report_json()
     report_markdown_path = os.path.join(os.path.split(source_gaf)[0], "{}.report.md".format(dataset))
     click.echo("About to write markdown report to {}".format(report_markdown_path))
     with open(report_markdown_path, "w") as report_md:
         click.echo("Opened for writing {}".format(report_markdown_path))
-        report_md.write(parser.report.to_markdown())
+        parser.report.write_markdown(report_md, report_json=report)
 
     click.echo("markdown {} written out".format(report_markdown_path))
     # click.echo("Markdown current stack:")
@@ -283,16 +325,233 @@ def produce_gaf(dataset, source_gaf, ontology_graph, gpipaths=None, paint=False,
     click.echo("About to write json report to {}".format(report_json_path))
     with open(report_json_path, "w") as report_json:
         click.echo("Opened for writing {}".format(report_json_path))
-        report_json.write(json.dumps(parser.report.to_report_json(), indent=4))
+        parser.report.write_report_json(report_json, report_json=report)
 
     click.echo("json {} written out".format(report_markdown_path))
+    if profile:
+        stages = report["profile"]["stages"]
+        click.echo("Stage timings: {}".format(", ".join(["{}: {:.2f}s".format(stage, t["time"]) for stage, t in stages.items()])))
     click.echo("gorule-13 first 10 messages: {}".format(
-        json.dumps(parser.report.to_report_json()["messages"].get("gorule-0000013", [])[:10], indent=4)))
+        json.dumps(report["messages"].get("gorule-0000013", [])[:10], indent=4)))
     # logger.info("json current Stack:")
     # if logger.getEffectiveLevel() == logging.INFO:
     #     traceback.print_stack()
 
-    return [validated_gaf_path, filtered_associations.name]
+
+def validated_associations(dataset, source_gaf, ontology_graph, config_args, group="unknown", format="gaf",
+                           gaf_output_version="2.2", workers=1, bio_entities=None, uncompressed=True):
+    """
+    Parse and validate a source once, yielding the associations (and header lines) that pass.
+
+    As with `produce_gaf`, the validated GAF, the filtered IEA annotations and the reports are
+    written next to the source. The GAF files are gzip compressed as they are written.
+
+    :param config_args: AssocParserConfig arguments, see `validation_config`
+    :param bio_entities: entities used as the GPI authority, instead of loading GPI files
+    :param uncompressed: if False, write only the gzip compressed GAF files
+    """
+    split_source = os.path.split(source_gaf)[0]
+    with tools.TeeGzipFile(os.path.join(split_source, "{}_noiea.gaf".format(dataset)),
+                           uncompressed=uncompressed) as filtered_associations, \
+            tools.TeeGzipFile(os.path.join(split_source, "{}_valid.gaf".format(dataset)),
+                              uncompressed=uncompressed) as outfile, \
+            open(source_gaf) as gaf:
+        config = validation_config(ontology_graph, filtered_associations, **config_args)
+        gafwriter = GafWriter(file=outfile, source=dataset, version=gaf_output_version)
+        click.echo("Validating source {}: {}".format(format, source_gaf))
+        parser = create_parser(config, group, dataset, format, bio_entities=bio_entities)
+        for assoc in parser.association_generator(file=gaf, workers=workers):
+            gafwriter.write_assoc(assoc)
+            yield assoc
+
+    write_reports(parser, source_gaf, dataset, config.profile)
+
+
+def source_header(source_path) -> List[str]:
+    """
+    Header lines at the start of an association file, without the format version line
+    """
+    header = []
+    with open(source_path) as source:
+        for line in source:
+            if not line.startswith("!"):
+                break
+            if not parser_version_regex.match(line):
+                header.append(line.rstrip("\n"))
+    return header
+
+
+class DatasetProducts(object):
+    """
+    Writers for the final GAF, GPI, GPAD and TTL products of a dataset, fed from one stream of associations.
+
+    GPAD gets associations as validated. PRO isoforms are then replaced by their genes (see `fix_pro_isoform`)
+    for the GAF, GPI and TTL. Header lines of the source are written as they come, followed by the headers
+    of the mixin sources when the first association is written.
+    """
+
+    def __init__(self, dataset, target_dir, products, mixins, gpi_map=None, gpad_gpi_output_version="1.2",
+                 uncompressed=True):
+        """
+        :param products: which optional products ("gpad", "ttl") to write
+        :param mixins: mixin sources, see `produce_products`
+        :param gpi_map: GPI entries for fixing PRO isoforms, see `load_isoform_gpi_map`. If None, isoforms are not fixed
+        :param uncompressed: if False, write only the gzip compressed products
+        """
+        self.dataset = dataset
+        self.products = products
+        self.mixins = mixins
+        self.gpi_map = gpi_map
+        self.source_header = []
+        self.started = False
+        self.substitution_count = 0
+        self.uncompressed = uncompressed
+
+        self.gaf_file = tools.TeeGzipFile(os.path.join(target_dir, "{}.gaf".format(dataset)), uncompressed=uncompressed)
+        self.gafwriter = GafWriter(file=self.gaf_file, source=dataset, version="2.2")
+        self.gpi_file = tools.TeeGzipFile(os.path.join(target_dir, "{}.gpi".format(dataset)), uncompressed=uncompressed)
+        self.gpiwriter = entitywriter.GpiWriter(file=self.gpi_file, version=gpad_gpi_output_version)
+        self.gpi_cache = set()
+        self.gpad_file = None
+        if products["gpad"]:
+            self.gpad_file = tools.TeeGzipFile(os.path.join(target_dir, "{}.gpad".format(dataset)), uncompressed=uncompressed)
+            self.gpadwriter = GpadWriter(file=self.gpad_file, version=gpad_gpi_output_version)
+        self.ttl_path = None
+        if products["ttl"]:
+            self.ttl_path = os.path.join(target_dir, "{}_cam.ttl".format(dataset))
+            self.rdf_writer = assoc_rdfgen.TurtleRdfWriter(label=os.path.split(self.ttl_path)[1])
+            self.transformer = assoc_rdfgen.CamRdfTransform(writer=self.rdf_writer)
+
+    def header(self, line):
+        """
+        Add a header line of the dataset source
+        """
+        if parser_version_regex.match(line):
+            return
+        self.source_header.append(line)
+        self.gafwriter.write_assoc({"header": True, "line": line})
+
+    def _start(self):
+        # Headers of the mixins, as in `merge_all_mixin_gaf_into_mod_gaf`
+        self.started = True
+        if self.mixins:
+            self.gaf_file.write("!=================================\n!\n")
+            for mixin in self.mixins:
+                self.gaf_file.write("!Header copied from {}_valid.gaf\n".format(mixin["dataset"]))
+                self.gaf_file.write("!=================================\n")
+                for line in source_header(mixin["source"]) + ["!"]:
+                    self.gaf_file.write(line + "\n")
+            self.gaf_file.write("!=================================\n!\n"
+                                "!Documentation about this header can be found here: https://github.com/geneontology/go-site/blob/master/docs/gaf_validation.md\n!\n")
+        if self.gpad_file is not None:
+            headers = [(m["format"], source_header(m["source"])) for m in self.mixins if m["format"] == "gpad"]
+            headers.append(("gaf", self.source_header))
+            headers += [(m["format"], source_header(m["source"])) for m in self.mixins if m["format"] != "gpad"]
+            for (format, header) in headers:
+                if format == "gpad":
+                    self.gpad_file.write("!Header from source noctua GPAD file\n")
+                else:
+                    self.gpad_file.write("!Header from source GAF file(s)\n")
+                self.gpad_file.write("!=================================\n")
+                for line in header:
+                    self.gpad_file.write(line + "\n")
+
+    def write(self, association: GoAssociation):
+        if not self.started:
+            self._start()
+        if self.gpad_file is not None:
+            self.gpadwriter.write_assoc(association)
+        if self.gpi_map is not None:
+            fixed = fix_pro_isoform(association, self.gpi_map)
+            if fixed is not association:
+                self.substitution_count += 1
+            association = fixed
+        self.gafwriter.write_assoc(association)
+        entity = gafgpibridge.convert_association(association)
+        if entity is not None and entity not in self.gpi_cache:
+            self.gpi_cache.add(entity)
+            self.gpiwriter.write_entity(entity)
+        if self.ttl_path is not None:
+            self.transformer.provenance()
+            self.transformer.translate(association)
+
+    def close(self) -> List[str]:
+        """
+        Finish writing the products, returning their paths
+        """
+        if not self.started:
+            self._start()
+        paths = [self.gaf_file.name, self.gpi_file.name]
+        self.gaf_file.close()
+        self.gpi_file.close()
+        if self.gpad_file is not None:
+            self.gpad_file.close()
+            paths.append(self.gpad_file.name)
+        if self.ttl_path is not None:
+            click.echo("Writing ttl to disk")
+            with tools.TeeGzipFile(self.ttl_path, binary=True, uncompressed=self.uncompressed) as ttl:
+                self.rdf_writer.serialize(destination=ttl)
+            paths.append(ttl.name)
+        return paths
+
+
+def produce_products(dataset, source_gaf, ontology_graph, config_args, products, group="unknown", format="gaf",
+                     mixins=[], gpi_paths=[], gaf_output_version="2.2", gpad_gpi_output_version="1.2",
+                     workers=1, uncompressed=True) -> List[str]:
+    """
+    Produce the GAF, GPI, GPAD and TTL products of a dataset, parsing and validating each source only once.
+
+    This is the single pass equivalent of `produce_gaf`, `produce_gpi`, `make_gpads`, `mixin_a_dataset`,
+    `fix_pro_isoforms_in_gaf` and `make_ttls`. The validated associations of the source, then those of
+    each mixin, are streamed to a `DatasetProducts`.
+
+    :param config_args: AssocParserConfig arguments for validating the source, see `produce_gaf`
+    :param mixins: list of dicts with the "dataset", "group", "source", "format" and "config_args" of
+        each mixin source (e.g. noctua, paint) that merges into the dataset
+    :param gpi_paths: GPI files for the dataset from the metadata. The last one is used to fix PRO isoforms
+    :param uncompressed: if False, write only gzip compressed products and validated sources
+    :return: paths of the products
+    """
+    gpi_map = None
+    if gpi_paths:
+        gpi_map = load_isoform_gpi_map(gpi_paths[-1], ontology_graph)
+    else:
+        click.echo("No GPI for {}, PRO isoform annotations will not be fixed".format(dataset))
+    dataset_products = DatasetProducts(dataset, os.path.split(source_gaf)[0], products, mixins, gpi_map=gpi_map,
+                                       gpad_gpi_output_version=gpad_gpi_output_version, uncompressed=uncompressed)
+
+    # Entities of the validated source, after those of the metadata GPIs, are the GPI authority for the mixins
+    bio_entities = collections.BioEntities(dict())
+    for gpi_path in gpi_paths:
+        bio_entities.merge(collections.BioEntities.load_from_file(gpi_path))
+    source_entities = {}
+
+    n = 0
+    for assoc in validated_associations(dataset, source_gaf, ontology_graph, config_args, group=group, format=format,
+                                        gaf_output_version=gaf_output_version, workers=workers,
+                                        uncompressed=uncompressed):
+        if isinstance(assoc, dict):
+            dataset_products.header(assoc["line"])
+            continue
+        source_entities.setdefault(assoc.subject.id, assoc.subject)
+        dataset_products.write(assoc)
+        n += 1
+    bio_entities.merge(collections.BioEntities(source_entities))
+
+    for mixin in mixins:
+        click.echo("Merging mixin dataset {}".format(mixin["group"]))
+        for assoc in validated_associations(mixin["dataset"], mixin["source"], ontology_graph, mixin["config_args"],
+                                            group=mixin["group"], format=mixin["format"],
+                                            gaf_output_version=gaf_output_version, bio_entities=bio_entities,
+                                            uncompressed=uncompressed):
+            if not isinstance(assoc, dict):
+                dataset_products.write(assoc)
+                n += 1
+
+    paths = dataset_products.close()
+    click.echo("Wrote {} associations to {}, substituting {} PRO isoforms".format(
+        n, ", ".join(paths), dataset_products.substitution_count))
+    return paths
 
 
 @tools.gzips
@@ -646,9 +905,24 @@ def cli(ctx, verbose):
 @click.option("--rule-set", "-l", "rule_set", default=[assocparser.RuleSet.ALL], multiple=True)
 @click.option("--retracted_pub_set", type=click.Path(exists=True), default=None, required=False,
               help="Path to retracted publications file")
+@click.option("--workers", "-w", default=1, type=click.IntRange(min=1),
+              help="Number of processes used to parse and validate each source file")
+@click.option("--profile", is_flag=True, default=False,
+              help="Record time spent in each parsing stage and GO rule in the json report")
+@click.option("--report-max-examples", default=None, type=click.IntRange(min=1),
+              help="Count report messages per rule, level and type, keeping at most this many example messages per rule")
+@click.option("--pipeline", is_flag=True, default=False,
+              help="Parse and validate each source once, writing all products from the one stream of associations")
+@click.option("--compression-level", default=9, type=click.IntRange(min=1, max=9),
+              help="gzip compression level of the products")
+@click.option("--compression-threads", default=1, type=click.IntRange(min=1),
+              help="Number of threads compressing each product, in blocks written as concatenated gzip members")
+@click.option("--gzip-only", is_flag=True, default=False,
+              help="With --pipeline, write products only gzip compressed, without the uncompressed files")
 def produce(ctx, group, metadata_dir, gpad, gpad_gpi_output_version, ttl, target, ontology, exclude, base_download_url,
             suppress_rule_reporting_tag, skip_existing_files, gaferencer_file, only_dataset, gaf_output_version,
-            rule_set, retracted_pub_set):
+            rule_set, retracted_pub_set, workers, profile, report_max_examples, pipeline, compression_level,
+            compression_threads, gzip_only):
     """
     Produce GAF, GPI, and TTL files for a group.
 
@@ -670,8 +944,18 @@ def produce(ctx, group, metadata_dir, gpad, gpad_gpi_output_version, ttl, target
     :param gaf_output_version: The version of the GAF files to produce
     :param rule_set: The rule set to use
     :param retracted_pub_set: The path to the retracted publications file
+    :param workers: The number of processes used to validate each source file
+    :param profile: Record stage and GO rule timings in the json report
+    :param report_max_examples: If set, keep only counts and this many example messages per rule in the reports
+    :param pipeline: Produce all products of a dataset in a single pass, see `produce_products`
+    :param compression_level: The gzip compression level of the products
+    :param compression_threads: The number of threads used to gzip each product
+    :param gzip_only: Write only the gzip compressed products, with --pipeline
     """
     logger.info("Logging is verbose")
+    if gzip_only and not pipeline:
+        raise click.UsageError("--gzip-only requires --pipeline, as the other steps read the uncompressed products")
+    tools.configure_compression(level=compression_level, threads=compression_threads)
     products = {
         "gaf": True,
         "gpi": True,
@@ -688,6 +972,7 @@ def produce(ctx, group, metadata_dir, gpad, gpad_gpi_output_version, ttl, target
     group_metadata = metadata.dataset_metadata_file(absolute_metadata, group)
     click.echo("Loading ontology: {}...".format(ontology))
     ontology_graph = OntologyFactory().create(ontology, ignore_cache=True)
+    ontology_graph.enable_closure_index()
 
     downloaded_gaf_sources = download_source_gafs(group_metadata, absolute_target, exclusions=exclude,
                                                   base_download_url=base_download_url,
@@ -732,6 +1017,49 @@ def produce(ctx, group, metadata_dir, gpad, gpad_gpi_output_version, ttl, target
         # Set paint to True when the group is "paint".
         # This will prevent filtering of IBA (GO_RULE:26) when paint is being treated as a top level group,
         # like for paint_other.
+        if pipeline:
+            click.echo("Producing all products in one pass through validation rules... {}".format(dataset))
+            gpi_list = download_matching_gpis(group, group_metadata, dataset, absolute_target,
+                                              replace_existing_files=not skip_existing_files)
+            mixins = []
+            for mixin_metadata in filter(None, [noctua_metadata, paint_metadata]):
+                mixin_src = check_and_download_mixin_source(mixin_metadata, group_metadata["id"], dataset, target,
+                                                            base_download_url=base_download_url,
+                                                            replace_existing_files=not skip_existing_files)
+                if mixin_src is not None:
+                    mixin_dataset_metadata = mixin_dataset(mixin_metadata, dataset)
+                    mixins.append({
+                        "dataset": mixin_dataset_metadata["dataset"],
+                        "group": mixin_metadata["id"],
+                        "source": mixin_src,
+                        "format": mixin_dataset_metadata["type"],
+                        # as for mixin_a_dataset
+                        "config_args": dict(paint=True, rule_metadata=rule_metadata,
+                                            rule_contexts=["import"] if mixin_metadata.get("import", False) else [],
+                                            rule_set=assocparser.RuleSet.ALL)
+                    })
+            config_args = dict(paint=(group == "paint"),
+                               rule_metadata=rule_metadata,
+                               goref_metadata=goref_metadata,
+                               ref_species_metadata=ref_species_metadata,
+                               db_type_name_regex_id_syntax=db_type_name_regex_id_syntax,
+                               retracted_pub_set=retracted_pubs,
+                               entity_idspaces=db_entities,
+                               group_idspace=group_ids,
+                               suppress_rule_reporting_tags=suppress_rule_reporting_tag,
+                               annotation_inferences=gaferences,
+                               group_metadata=group_metadata,
+                               extensions_constraints=extensions_constraints,
+                               rule_contexts=["import"] if dataset_metadata.get("import", False) else [],
+                               rule_set=rule_set,
+                               profile=profile,
+                               report_max_examples=report_max_examples)
+            produce_products(dataset, source_gaf, ontology_graph, config_args, products, group=group,
+                             mixins=mixins, gpi_paths=gpi_list, gaf_output_version=gaf_output_version,
+                             gpad_gpi_output_version=gpad_gpi_output_version, workers=workers,
+                             uncompressed=not gzip_only)
+            continue
+
         click.echo("Producing GAF by passing through validation rules... {}".format(dataset))
         valid_gaf = produce_gaf(dataset, source_gaf, ontology_graph,
                                 paint=(group == "paint"),
@@ -749,22 +1077,16 @@ def produce(ctx, group, metadata_dir, gpad, gpad_gpi_output_version, ttl, target
                                 extensions_constraints=extensions_constraints,
                                 rule_contexts=["import"] if dataset_metadata.get("import", False) else [],
                                 gaf_output_version=gaf_output_version,
-                                rule_set=rule_set
+                                rule_set=rule_set,
+                                workers=workers,
+                                profile=profile,
+                                report_max_examples=report_max_examples
                                 )[0]
 
-        gpi_list = []
-
-        matching_gpi_path = None
         click.echo("Try to find other GPIs in metadata and merge...")
-
-        for ds in group_metadata["datasets"]:
-            # Where type=GPI for the same dataset (e.g. "zfin", "goa_cow")
-            if ds["type"] == "gpi" and ds["dataset"] == dataset and ds.get("source"):
-                matching_gpi_path = download_a_dataset_source(group, ds, absolute_target, ds["source"],
-                                                              replace_existing_files=not skip_existing_files)
-                if ds.get("compression", None) == "gzip":
-                    matching_gpi_path = unzip_simple(matching_gpi_path)
-                gpi_list.append(matching_gpi_path)
+        gpi_list = download_matching_gpis(group, group_metadata, dataset, absolute_target,
+                                          replace_existing_files=not skip_existing_files)
+        matching_gpi_path = gpi_list[-1] if gpi_list else None
 
         click.echo("Found the matching gpi path...{}".format(matching_gpi_path))
 
@@ -841,20 +1163,7 @@ def fix_pro_isoforms_in_gaf(gaf_file_to_fix: str,
     """
     fixed_associations = []
     print("gpi_file", gpi_file)
-    if gpi_file is None:
-        raise ValueError("GPI file is required to fix the GAF file.", gpi_file)
-    gpiparser = GpiParser(config=assocparser.AssocParserConfig(ontology=ontology_graph))
-    # Parse the GPI file, creating a map of identifiers to GPI entries
-    gpis = gpiparser.parse(gpi_file, None)
-    gpi_map = {}
-    for gpi_entry in gpis:
-        gpi_map[gpi_entry.get('id')] = {"encoded_by": gpi_entry.get('encoded_by'),
-                                        "full_name": gpi_entry.get('full_name'),
-                                        "label": gpi_entry.get('label'),
-                                        "synonyms": gpi_entry.get('synonyms'),
-                                        # GPI spec says this is single valued, but GpiParser returns this as a list.
-                                        "type": gpi_entry.get('type')[0],
-                                        "id": gpi_entry.get('id')}
+    gpi_map = load_isoform_gpi_map(gpi_file, ontology_graph)
 
     gafparser = GafParser(config=assocparser.AssocParserConfig(ontology=ontology_graph))
     gafwriter = GafWriter(file=open(output_file_path, "w"), version="2.2")
@@ -869,39 +1178,15 @@ def fix_pro_isoforms_in_gaf(gaf_file_to_fix: str,
             for source_assoc in annotation.associations:
                 if isinstance(source_assoc, dict):
                     continue  # skip the header
-                if source_assoc.subject.id.namespace.startswith("PR"):
-                    full_old_identifier = source_assoc.subject.id.namespace + ":" + source_assoc.subject.id.identity
-                    old_namespace = source_assoc.subject.id.namespace
-                    old_identity = source_assoc.subject.id.identity
-                    # TODO: right now we get the FIRST encoded_by result -- this is what the original script did?
-                    if "MGI" == gpi_map[full_old_identifier].get("encoded_by")[0].split(":")[0]:
-                        source_assoc.subject.id.namespace = gpi_map[full_old_identifier].get("encoded_by")[0].split(":")[0]
-                        source_assoc.subject.id.identity = "MGI:" + gpi_map[full_old_identifier].get("encoded_by")[0].split(":")[2]
-                    else:
-                        source_assoc.subject.id.namespace = \
-                        gpi_map[full_old_identifier].get("encoded_by")[0].split(":")[0]
-                        source_assoc.subject.id.identity = \
-                        gpi_map[full_old_identifier].get("encoded_by")[0].split(":")[1]
-                    full_new_identifier = source_assoc.subject.id.namespace + ":" + source_assoc.subject.id.identity
-                    source_assoc.subject.full_name = gpi_map[full_new_identifier].get("full_name")
-                    source_assoc.subject.label = gpi_map[full_new_identifier].get("label")
-                    source_assoc.subject.synonyms = gpi_map[full_new_identifier].get("synonyms")
-                    source_assoc.subject.type = gpi_map[full_new_identifier].get("type")
-
-                    # we need to put the isoform currently being swapped, back into "Column 17" which is a
-                    # subject_extension member.
-                    isoform_term = Curie(namespace=old_namespace, identity=old_identity)
-                    isoform_relation = Curie(namespace="RO", identity="0002327")
-                    new_subject_extension = ExtensionUnit(relation=isoform_relation, term=isoform_term)
-                    source_assoc.subject_extensions.append(new_subject_extension)
-
-                    # count the substitution here for reporting later
+                fixed_assoc = fix_pro_isoform(source_assoc, gpi_map)
+                # count the substitution here for reporting later
+                if fixed_assoc is not source_assoc:
                     substitution_count += 1
                 else:
                     no_substitution_count += 1
 
                 # Join fields back into a string and write to output file
-                fixed_associations.append(source_assoc)
+                fixed_associations.append(fixed_assoc)
 
     gafwriter.write(fixed_associations)
     click.echo(f"Substituted {substitution_count} entries in {gaf_file_to_fix} "
@@ -909,6 +1194,66 @@ def fix_pro_isoforms_in_gaf(gaf_file_to_fix: str,
 
     return output_file_path
 
+
+def load_isoform_gpi_map(gpi_file: str, ontology_graph) -> Dict[str, Dict]:
+    """
+    Parse a GPI file into a map of identifiers to the GPI fields used by `fix_pro_isoform`
+    """
+    if gpi_file is None:
+        raise ValueError("GPI file is required to fix the GAF file.", gpi_file)
+    gpiparser = GpiParser(config=assocparser.AssocParserConfig(ontology=ontology_graph))
+    # Parse the GPI file, creating a map of identifiers to GPI entries
+    gpis = gpiparser.parse(gpi_file, None)
+    gpi_map = {}
+    for gpi_entry in gpis:
+        gpi_map[gpi_entry.get('id')] = {"encoded_by": gpi_entry.get('encoded_by'),
+                                        "full_name": gpi_entry.get('full_name'),
+                                        "label": gpi_entry.get('label'),
+                                        "synonyms": gpi_entry.get('synonyms'),
+                                        "type": gpi_entry.get('type'),
+                                        "id": gpi_entry.get('id')}
+    return gpi_map
+
+
+def fix_pro_isoform(source_assoc: GoAssociation, gpi_map: Dict[str, Dict]) -> GoAssociation:
+    """
+    If the subject of an association is a PRO isoform, returns a copy of the association with the
+    gene that encodes the isoform (from `gpi_map`, see `load_isoform_gpi_map`) as the subject, and
+    the isoform moved to the subject extensions ("Column 17"). Other associations are returned as is.
+
+    The association itself is not changed, as its subject may be shared with other associations.
+    """
+    if not source_assoc.subject.id.namespace.startswith("PR"):
+        return source_assoc
+
+    old_namespace = source_assoc.subject.id.namespace
+    old_identity = source_assoc.subject.id.identity
+    full_old_identifier = old_namespace + ":" + old_identity
+    # TODO: right now we get the FIRST encoded_by result -- this is what the original script did?
+    encoded_by = gpi_map[full_old_identifier].get("encoded_by")[0].split(":")
+    if "MGI" == encoded_by[0]:
+        new_id = Curie(namespace=encoded_by[0], identity="MGI:" + encoded_by[2])
+    else:
+        new_id = Curie(namespace=encoded_by[0], identity=encoded_by[1])
+    gene = gpi_map[str(new_id)]
+
+    subject = copy.copy(source_assoc.subject)
+    subject.id = new_id
+    subject.fullname = gene.get("full_name")
+    subject.label = gene.get("label")
+    subject.synonyms = gene.get("synonyms")
+    # GPI 2.0 types are CURIEs, GPI 1.2 types are labels
+    subject.type = [Curie.from_str(t) if ":" in t else map_gp_type_label_to_curie(t) for t in gene.get("type")]
+
+    # we need to put the isoform currently being swapped, back into "Column 17" which is a
+    # subject_extension member.
+    isoform_term = Curie(namespace=old_namespace, identity=old_identity)
+    isoform_relation = Curie(namespace="RO", identity="0002327")
+    fixed_assoc = copy.copy(source_assoc)
+    fixed_assoc.subject = subject
+    fixed_assoc.subject_extensions = source_assoc.subject_extensions + [ExtensionUnit(relation=isoform_relation, term=isoform_term)]
+    return fixed_assoc
+
 @cli.command()
 @click.pass_context
 @click.option("--gpad_path", "-g", type=click.Path(), required=True)
@@ -0,0 +1,120 @@
+"""
+Batched statistics for term enrichment
+
+Fisher's exact test over many 2x2 contingency tables at once, and
+multiple testing correction.
+
+All tables in an enrichment test share the same background and sample
+sizes, so each is a hypergeometric distribution over the same population,
+differing only in the number of background subjects annotated to the
+class. Probabilities are computed directly from a table of log factorials,
+which is cached per background size.
+"""
+from functools import lru_cache
+
+import numpy as np
+from scipy.special import gammaln
+
+# relative tolerance when comparing probabilities for two-sided tests, as in scipy.stats.fisher_exact
+TWO_SIDED_TOLERANCE = 1 + 1e-7
+
+# maximum number of (table, outcome) cells evaluated at once
+BLOCK_CELLS = 1 << 22
+
+
+@lru_cache(maxsize=8)
+def log_factorials(n: int) -> np.ndarray:
+    """
+    Returns an array of log(k!) for k in 0..n
+    """
+    table = gammaln(np.arange(n + 1, dtype=np.float64) + 1)
+    table.setflags(write=False)
+    return table
+
+
+def fisher_exact_batch(a, b, c, d, direction='greater') -> np.ndarray:
+    """
+    Fisher's exact test over a batch of 2x2 tables [[a, b], [c, d]]
+
+    Gives the same p-values as `scipy.stats.fisher_exact`, table by table.
+
+    Arguments
+    ---------
+
+    a, b, c, d: array-like of int
+
+        cells of each table. Row totals (a+b, c+d) must be the same for all tables
+
+    direction: 'greater', 'less' or 'two-sided'
+
+    Returns: array of p-values
+    """
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    c = np.asarray(c, dtype=np.int64)
+    d = np.asarray(d, dtype=np.int64)
+    if direction not in ('greater', 'less', 'two-sided'):
+        raise ValueError("direction must be one of 'greater', 'less' or 'two-sided', not {}".format(direction))
+    pvals = np.ones(len(a), dtype=np.float64)
+    if len(a) == 0:
+        return pvals
+    n = int(a[0] + b[0])
+    total = int(a[0] + b[0] + c[0] + d[0])
+    if np.any(a + b != n) or np.any(a + b + c + d != total):
+        raise ValueError("All tables must have the same row totals")
+
+    lf = log_factorials(total)
+    k = a + c  # column totals, i.e. number annotated to the class
+    # outcomes x = 0..n for the top-left cell, for each table;
+    # log pmf(x) = log C(k, x) + log C(total-k, n-x) - log C(total, n)
+    x = np.arange(n + 1, dtype=np.int64)
+    outcome_term = lf[x] + lf[n - x]
+    block = max(1, BLOCK_CELLS // (n + 1))
+    for start in range(0, len(a), block):
+        kb = k[start:start + block, None]
+        ab = a[start:start + block, None]
+        table_term = lf[kb] + lf[total - kb] - (lf[total] - lf[n] - lf[total - n])
+        kx = kb - x
+        rest = total - kb - n + x
+        valid = (kx >= 0) & (rest >= 0)
+        logpmf = table_term - outcome_term - lf[np.maximum(kx, 0)] - lf[np.maximum(rest, 0)]
+        pmf = np.exp(np.where(valid, logpmf, -np.inf))
+        if direction == 'greater':
+            pmf[x < ab] = 0.0
+        elif direction == 'less':
+            pmf[x > ab] = 0.0
+        else:
+            observed = np.take_along_axis(pmf, ab, axis=1)
+            pmf[pmf > observed * TWO_SIDED_TOLERANCE] = 0.0
+        pvals[start:start + block] = np.minimum(pmf.sum(axis=1), 1.0)
+    return pvals
+
+
+def adjust_pvalues(pvals, method='bonferroni') -> np.ndarray:
+    """
+    Correct p-values for multiple testing
+
+    Arguments
+    ---------
+
+    pvals: array-like of float
+
+    method: 'bonferroni', 'fdr_bh' (Benjamini-Hochberg false discovery rate) or None
+
+    Returns: array of adjusted p-values, capped at 1
+    """
+    p = np.asarray(pvals, dtype=np.float64)
+    m = len(p)
+    if method is None or m == 0:
+        return p.copy()
+    if method == 'bonferroni':
+        return np.minimum(p * m, 1.0)
+    if method == 'fdr_bh':
+        order = np.argsort(p, kind='stable')
+        scaled = p[order] * m / np.arange(1, m + 1)
+        # enforce monotonicity from the largest p-value down
+        scaled = np.minimum.accumulate(scaled[::-1])[::-1]
+        adjusted = np.empty(m, dtype=np.float64)
+        adjusted[order] = np.minimum(scaled, 1.0)
+        return adjusted
+    raise ValueError("Unknown multiple testing correction: {}".format(method))
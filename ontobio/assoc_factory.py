@@ -10,8 +10,9 @@ import logging
 import os
 import subprocess
 import hashlib
-from ontobio.golr.golr_associations import bulk_fetch
+from ontobio.golr.golr_associations import bulk_fetch, bulk_fetch_iter
 from ontobio.assocmodel import AssociationSet, AssociationSetMetadata
+from ontobio.sparse_assocmodel import SparseAssociationSet
 from ontobio.io.hpoaparser import HpoaParser
 from ontobio.io.gpadparser import GpadParser
 from ontobio.io.gafparser import GafParser
@@ -34,7 +35,7 @@ class AssociationSetFactory():
         initializes based on an ontology name
         """
 
-    def create(self, ontology=None,subject_category=None,object_category=None,evidence=None,taxon=None,relation=None, file=None, fmt=None, skim=True):
+    def create(self, ontology=None,subject_category=None,object_category=None,evidence=None,taxon=None,relation=None, file=None, fmt=None, skim=True, sparse=False):
         """
         creates an AssociationSet
 
@@ -48,6 +49,7 @@ class AssociationSetFactory():
         subject_category: string representing category of subjects (e.g. gene, disease, variant)
         object_category: string representing category of objects (e.g. function, phenotype, disease)
         taxon:           string holding NCBITaxon:nnnn ID
+        sparse:          if true, create a `SparseAssociationSet`, backed by a sparse subject x class matrix
 
         """
         meta = AssociationSetMetadata(subject_category=subject_category,
@@ -59,17 +61,14 @@ class AssociationSetFactory():
                                          fmt=fmt,
                                          ontology=ontology,
                                          meta=meta,
-                                         skim=skim)
+                                         skim=skim,
+                                         sparse=sparse)
 
         logger.info("Fetching assocs from store")
-        assocs = bulk_fetch_cached(subject_category=subject_category,
-                                   object_category=object_category,
-                                   evidence=evidence,
-                                   taxon=taxon)
-
-        logger.info("Creating map for {} subjects".format(len(assocs)))
-
-
+        assocs = bulk_fetch_iter(subject_category=subject_category,
+                                 object_category=object_category,
+                                 evidence=evidence,
+                                 taxon=taxon)
 
         amap = {}
         subject_label_map = {}
@@ -78,14 +77,21 @@ class AssociationSetFactory():
             subj = a['subject']
             subject_label_map[subj] = a['subject_label']
             amap[subj] = a['objects']
+        logger.info("Created map for {} subjects".format(len(amap)))
 
 
-        aset = AssociationSet(ontology=ontology,
-                              meta=meta,
-                              subject_label_map=subject_label_map,
-                              association_map=amap)
+        aset = self._new_association_set(ontology=ontology,
+                                         meta=meta,
+                                         subject_label_map=subject_label_map,
+                                         association_map=amap,
+                                         sparse=sparse)
         return aset
 
+    def _new_association_set(self, sparse=False, **args):
+        if sparse:
+            return SparseAssociationSet(**args)
+        return AssociationSet(**args)
+
     def create_from_tuples(self, tuples, **args):
         """
         Creates from a list of (subj,subj_name,obj) tuples
@@ -99,7 +105,7 @@ class AssociationSetFactory():
                 amap[subj] = []
             amap[subj].append(a[2])
 
-        aset = AssociationSet(subject_label_map=subject_label_map, association_map=amap, **args)
+        aset = self._new_association_set(subject_label_map=subject_label_map, association_map=amap, **args)
         return aset
 
     def create_from_assocs(self, assocs, **args):
@@ -119,7 +125,7 @@ class AssociationSetFactory():
             if not a['negated']:
                 amap[subj_id].append(a['object']['id'])
 
-        aset = AssociationSet(subject_label_map=subject_label_map, association_map=amap, **args)
+        aset = self._new_association_set(subject_label_map=subject_label_map, association_map=amap, **args)
         aset.associations_by_subj = defaultdict(list)
         aset.associations_by_subj_obj = defaultdict(list)
         for a in assocs:
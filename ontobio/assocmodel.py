@@ -13,10 +13,11 @@ taxa of interest or evidence criteria.
 
 """
 import logging
-import scipy.stats # TODO - move
-import scipy as sp # TODO - move
+import numpy as np
 import pandas as pd
 
+from ontobio.analysis.enrichment import fisher_exact_batch, adjust_pvalues
+
 logger = logging.getLogger(__name__)
 
 
@@ -356,34 +357,14 @@ class AssociationSet():
             else:
                 return []
 
-    # TODO: consider moving to other module
-    def enrichment_test(self, subjects=None, background=None, hypotheses=None, threshold=0.05, labels=False, direction='greater'):
+    def _enrichment_counts(self, subjects, background, hypotheses):
         """
-        Performs term enrichment analysis. 
-
-        Arguments
-        ---------
-
-        subjects: string list
-
-            Sample set. Typically a gene ID list. These are assumed to have associations
-
-        background: string list
-
-            Background set. If not set, uses full set of known subject IDs in the association set
-
-        threshold: float
-
-            p values above this are filtered out
-
-        labels: boolean
-
-            if true, labels for enriched classes are included in result objects
-
-        direction: 'greater', 'less' or 'two-sided'
-
-            default is greater - i.e. enrichment test. Use 'less' for depletion test.
+        Count sample and background subjects with inferred annotations to each hypothesis
 
+        Returns a tuple (hypotheses, sample_count, bg_count, sample_size, bg_size), where
+        hypotheses is the list of classes annotated in the sample, restricted to the hypotheses
+        argument if given, that have more than one background subject, and sample_count and
+        bg_count are dictionaries keyed by class.
         """
         if subjects is None:
             subjects = []
@@ -426,33 +407,66 @@ class AssociationSet():
                     sample_count[a] = sample_count[a]+1
 
         hypotheses = [x for x in hypotheses if bg_count[x] > 1]
+        return (hypotheses, sample_count, bg_count, sample_size, bg_size)
+
+    # TODO: consider moving to other module
+    def enrichment_test(self, subjects=None, background=None, hypotheses=None, threshold=0.05, labels=False, direction='greater', correction='bonferroni'):
+        """
+        Performs term enrichment analysis. 
+
+        Arguments
+        ---------
+
+        subjects: string list
+
+            Sample set. Typically a gene ID list. These are assumed to have associations
+
+        background: string list
+
+            Background set. If not set, uses full set of known subject IDs in the association set
+
+        threshold: float
+
+            p values above this are filtered out
+
+        labels: boolean
+
+            if true, labels for enriched classes are included in result objects
+
+        direction: 'greater', 'less' or 'two-sided'
+
+            default is greater - i.e. enrichment test. Use 'less' for depletion test.
+
+        correction: 'bonferroni', 'fdr_bh' or None
+
+            multiple testing correction applied to p values. 'fdr_bh' is the Benjamini-Hochberg
+            false discovery rate; with None, p is the uncorrected p value.
+
+        """
+        (hypotheses, sample_count, bg_count, sample_size, bg_size) = self._enrichment_counts(subjects, background, hypotheses)
         logger.info("Filtered hypotheses: {}".format(hypotheses))
-        num_hypotheses = len(hypotheses)
-                
+
+        # https://en.wikipedia.org/wiki/Fisher's_exact_test
+        #
+        #              Cls  NotCls    RowTotal
+        #              ---  ------    ---
+        # study/sample [a,      b]    sample_size
+        # rest of ref  [c,      d]    bg_size - sample_size
+        #              ---     ---
+        #              nCls  nNotCls
+
+        a = np.array([sample_count[cls] for cls in hypotheses], dtype=np.int64)
+        n_cls = np.array([bg_count[cls] for cls in hypotheses], dtype=np.int64)
+        b = sample_size - a
+        c = n_cls - a
+        d = (bg_size - n_cls) - b
+        p_uncorrected = fisher_exact_batch(a, b, c, d, direction)
+        p_corrected = adjust_pvalues(p_uncorrected, correction)
+
         results = []
-        for cls in hypotheses:
-            
-            # https://en.wikipedia.org/wiki/Fisher's_exact_test
-            #
-            #              Cls  NotCls    RowTotal
-            #              ---  ------    ---
-            # study/sample [a,      b]    sample_size
-            # rest of ref  [c,      d]    bg_size - sample_size
-            #              ---     ---
-            #              nCls  nNotCls
-
-            a = sample_count[cls]
-            b = sample_size - a
-            c = bg_count[cls] - a
-            d = (bg_size - bg_count[cls]) - b
-            #logger.debug("ABCD="+str((cls,a,b,c,d,sample_size)))
-            _, p_uncorrected = sp.stats.fisher_exact( [[a, b], [c, d]], direction)
-            p = p_uncorrected * num_hypotheses
-            if p>1.0:
-                p=1.0
-            #logger.debug("P={} uncorrected={}".format(p,p_uncorrected))
+        for (cls, p, pu) in zip(hypotheses, p_corrected, p_uncorrected):
             if p<threshold:
-                res = {'c':cls,'p':p,'p_uncorrected':p_uncorrected}
+                res = {'c':cls,'p':float(p),'p_uncorrected':float(pu)}
                 if labels:
                     res['n'] = self.ontology.label(cls)
                 results.append(res)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark CURIE contraction over the URIs of an obographs json file
+
+Usage:
+
+    python ontobio/bin/bench_contract_uri.py go.json
+
+Compares prefixcommons contract_uri (as previously used by OboJsonMapper)
+against the trie-based, memoized ontobio.util.curie_contractor, over every
+node id, edge sub/pred/obj, xref and basicPropertyValue in the file.
+"""
+
+import json
+import sys
+import time
+from prefixcommons.curie_util import contract_uri
+from ontobio.util.curie_contractor import CurieContractor
+
+
+def collect_uris(doc):
+    uris = []
+    for og in doc['graphs']:
+        for node in og.get('nodes', []):
+            uris.append(node['id'])
+            meta = node.get('meta') or {}
+            uris += [x['val'] for x in meta.get('xrefs', [])]
+            for bpv in meta.get('basicPropertyValues', []):
+                uris += [bpv['pred'], bpv['val']]
+        for edge in og.get('edges', []):
+            uris += [edge['sub'], edge['pred'], edge['obj']]
+    return uris
+
+
+def prefixcommons_contract(uri):
+    curies = sorted(contract_uri(uri), key=len)
+    if len(curies) > 0:
+        return curies[0]
+    return uri
+
+
+def bench(label, fn, uris):
+    t1 = time.process_time()
+    for uri in uris:
+        fn(uri)
+    t2 = time.process_time()
+    print("{}: {:.3f}s".format(label, t2 - t1))
+    return t2 - t1
+
+
+def main(fn):
+    with open(fn) as file:
+        uris = collect_uris(json.load(file))
+    print("URIs: {} distinct: {}".format(len(uris), len(set(uris))))
+    t_old = bench("prefixcommons", prefixcommons_contract, uris)
+    contractor = CurieContractor()
+    t_new = bench("curie_contractor", lambda uri: contractor.contract_one(uri, default=uri), uris)
+    for uri in set(uris):
+        if contractor.contract_one(uri, default=uri) != prefixcommons_contract(uri):
+            # only expected where there are ties in length
+            print("DIFF: {} {} {}".format(uri, contractor.contract(uri), contract_uri(uri)))
+    print("speedup: {:.1f}x".format(t_old / max(t_new, 1e-9)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "go.json")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark scoring of lexical mappings by semantic similarity
+
+Usage:
+
+    python ontobio/bin/bench_lexmap_semsim.py [ontology files...]
+
+Defaults to the lexmap fixtures in tests/resources. Builds the xref graph
+once, then scores its edges with LexicalMapEngine.score_xrefs_by_semsim and
+with the previous implementation, which recomputed each node's ancestors and
+descendants for every edge and looked up the prefix of every xref neighbor.
+"""
+
+import sys
+import time
+from ontobio import OntologyFactory
+from ontobio.lexmap import LexicalMapEngine
+
+DEFAULT_FILES = ['tests/resources/autopod-{}.json'.format(f) for f in ['x', 'm', 'h', 'bto']] + \
+    ['tests/resources/lexmap_test.json']
+
+
+def uncached_scores(lexmap, xg):
+    def blanket(nid):
+        nodes = set()
+        for ont in lexmap.id_to_ontology_map[nid]:
+            nodes.update(ont.ancestors(nid))
+            nodes.update(ont.descendants(nid))
+        return list(nodes)
+
+    def sim(ancs1, ancs2, pfx2):
+        xancs1 = set()
+        for a in ancs1:
+            if a in xg:
+                for n in xg.neighbors(a):
+                    if lexmap._id_to_ontology(n) == pfx2:
+                        xancs1.add(n)
+        n_shared = len(xancs1.intersection(ancs2))
+        return (1 + n_shared) / (1 + len(xancs1))
+
+    scores = []
+    for (i, j) in xg.edges():
+        ancs1 = blanket(i)
+        ancs2 = blanket(j)
+        pfx1 = lexmap._id_to_ontology(i)
+        pfx2 = lexmap._id_to_ontology(j)
+        scores.append((sim(ancs1, ancs2, pfx2), sim(ancs2, ancs1, pfx1)))
+    return scores
+
+
+def cached_scores(lexmap, xg):
+    lexmap._blankets = {}
+    adjacency = lexmap._xref_adjacency(xg)
+    return [lexmap._semsim_score(adjacency, i, j) for (i, j) in xg.edges()]
+
+
+def bench(label, fn, repeats):
+    t1 = time.process_time()
+    for _ in range(repeats):
+        result = fn()
+    t2 = time.process_time()
+    print("{}: {:.3f}s".format(label, t2 - t1))
+    return (t2 - t1, result)
+
+
+def main(files, repeats=10):
+    factory = OntologyFactory()
+    lexmap = LexicalMapEngine()
+    lexmap.index_ontologies([factory.create(f) for f in files])
+    xg = lexmap.get_xref_graph()
+    print("nodes: {} edges: {}".format(len(xg.nodes()), len(xg.edges())))
+    (t_old, old) = bench("uncached", lambda: uncached_scores(lexmap, xg), repeats)
+    (t_new, new) = bench("cached", lambda: cached_scores(lexmap, xg), repeats)
+    if old != new:
+        print("DIFF: scores differ")
+    print("speedup: {:.1f}x".format(t_old / max(t_new, 1e-9)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] if len(sys.argv) > 1 else DEFAULT_FILES)
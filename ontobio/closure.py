@@ -0,0 +1,143 @@
+"""
+Precomputed transitive closures over an ontology graph
+
+See also:
+
+ - ontol.py
+
+"""
+
+from array import array
+import networkx as nx
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ClosureIndex():
+    """
+    Reflexive transitive closure of an ontology graph, for a fixed set of relations.
+
+    Node IDs are interned to integers, and for each node the ancestor and
+    descendant closures are stored as sorted arrays of int32 ids. Building the
+    index is linear in the size of the closure; after that, ancestor and
+    descendant queries are lookups proportional to the size of the result.
+
+    Instances are immutable snapshots of the graph they were built from.
+    Normally you do not create these directly; see :meth:`Ontology.enable_closure_index`
+    """
+
+    def __init__(self, graph, relations=None):
+        """
+        Arguments
+        ---------
+        graph : nx.MultiDiGraph
+            ontology graph, with edges directed from parent to child
+        relations : list
+            relation (object property) IDs used to filter. If None, all edges are used
+        """
+        rset = None if relations is None else set(relations)
+        ids = list(graph.nodes())
+        idx = {n: i for i, n in enumerate(ids)}
+        edges = [(idx[c], idx[p]) for (p, c, d) in graph.edges(data=True)
+                 if rset is None or d.get('pred') in rset]
+        self._init(ids, edges, relations)
+
+    @classmethod
+    def from_edges(cls, ids, edges, relations=None):
+        """
+        Create an index from interned nodes and edges
+
+        Arguments
+        ---------
+        ids : list[str]
+            node IDs; the position of each ID in the list is its integer id
+        edges : iterable
+            (child, parent) pairs of integer ids, already filtered by relation
+        relations : list
+            relation IDs the edges were filtered by; informative only
+        """
+        index = cls.__new__(cls)
+        index._init(list(ids), edges, relations)
+        return index
+
+    def _init(self, ids, edges, relations):
+        self.relations = relations
+        self.ids = ids
+        self.id_index = {n: i for i, n in enumerate(ids)}
+        self._ancestors = []
+        self._descendants = []
+        self._build(edges)
+
+    def _build(self, edges):
+        # child -> parent graph over interned ids
+        dg = nx.DiGraph()
+        dg.add_nodes_from(range(len(self.ids)))
+        dg.add_edges_from(edges)
+
+        # collapse cycles, so that closures can be computed in a single
+        # topological pass, parents before children
+        cg = nx.condensation(dg)
+        scc_closure = {}
+        for s in reversed(list(nx.topological_sort(cg))):
+            closure = set(cg.nodes[s]['members'])
+            for t in cg.successors(s):
+                closure.update(scc_closure[t])
+            scc_closure[s] = closure
+
+        scc_arrays = {s: array('i', sorted(c)) for s, c in scc_closure.items()}
+        del scc_closure
+        mapping = cg.graph['mapping']
+        self._ancestors = [scc_arrays[mapping[i]] for i in range(len(self.ids))]
+
+        descs = [[] for _ in self.ids]
+        for i, ancs in enumerate(self._ancestors):
+            for a in ancs:
+                descs[a].append(i)
+        self._descendants = [array('i', d) for d in descs]
+        logger.info("Built closure index for {} nodes, relations={}".format(len(self.ids), self.relations))
+
+    def _lookup(self, closures, node, reflexive):
+        i = self.id_index.get(node)
+        if i is None:
+            return [node] if reflexive else []
+        ids = self.ids
+        if reflexive:
+            return [ids[j] for j in closures[i]]
+        return [ids[j] for j in closures[i] if j != i]
+
+    def ancestors(self, node, reflexive=False):
+        """
+        Return all ancestors of specified node.
+
+        Arguments
+        ---------
+        node : str
+            identifier for node in ontology
+        reflexive : bool
+            if true, return query node in graph
+
+        Returns
+        -------
+        list[str]
+            ancestor node IDs
+        """
+        return self._lookup(self._ancestors, node, reflexive)
+
+    def descendants(self, node, reflexive=False):
+        """
+        Return all descendants of specified node.
+
+        Arguments
+        ---------
+        node : str
+            identifier for node in ontology
+        reflexive : bool
+            if true, return query node in graph
+
+        Returns
+        -------
+        list[str]
+            descendant node IDs
+        """
+        return self._lookup(self._descendants, node, reflexive)
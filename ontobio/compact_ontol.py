@@ -0,0 +1,494 @@
+"""
+A compact, array-backed in-memory representation of an ontology
+
+Node IDs (CURIEs) and relation IDs are interned to integers. Edges are kept
+as parallel int32 arrays, from which CSR (compressed sparse row) adjacency
+structures are built on demand for each set of relations. Labels and node
+metadata are held in side tables keyed by integer id, rather than as one
+dict per node.
+
+Use this for large ontologies where the default networkx-backed
+:class:`Ontology` is too slow or too large, e.g.
+
+::
+
+    ont = OntologyFactory().create('go.json', compact=True)
+
+See also:
+
+ - ontol.py
+ - ontol_factory.py
+
+"""
+
+from array import array
+import sys
+import networkx as nx
+import numpy as np
+import logging
+
+from ontobio.ontol import Ontology, Synonym
+from ontobio.closure import ClosureIndex
+
+logger = logging.getLogger(__name__)
+
+
+class CompactGraph():
+    """
+    Interned, array-backed store for the nodes and edges of an ontology graph.
+
+    Supports the subset of the networkx graph-building API used by
+    :class:`ontobio.obograph_util.OboJsonMapper` (`add_node` and `add_edge`),
+    so it can be populated by the same code that builds networkx graphs.
+    Edge attributes other than `pred` are not retained.
+
+    Edges are directed from parent to child, following the networkx
+    representation used by :class:`Ontology`.
+    """
+
+    def __init__(self):
+        self.ids = []
+        self.id_index = {}
+        self.labels = []
+        self.types = []
+        # meta key (e.g. synonyms, subsets, deprecated) -> {int id: value}
+        self.meta = {}
+        self.preds = []
+        self.pred_index = {}
+        self.src = array('i')
+        self.dst = array('i')
+        self.pred = array('i')
+        self._csr_cache = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id):
+        return id in self.id_index
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def nodes(self):
+        return self.ids
+
+    def intern(self, id):
+        """
+        Return integer id for a node, adding a bare node if it is not present
+        """
+        i = self.id_index.get(id)
+        if i is None:
+            i = len(self.ids)
+            self.ids.append(id)
+            self.id_index[id] = i
+            self.labels.append(None)
+            self.types.append(None)
+        return i
+
+    def intern_pred(self, pred):
+        """
+        Return integer id for a relation
+        """
+        p = self.pred_index.get(pred)
+        if p is None:
+            p = len(self.preds)
+            self.preds.append(pred)
+            self.pred_index[pred] = p
+        return p
+
+    def add_node(self, node_for_adding, label=None, type=None, meta=None, **attrs):
+        """
+        Add or update a node; other obograph node attributes (e.g. lbl) are ignored
+        """
+        i = self.intern(node_for_adding)
+        if label is not None:
+            self.labels[i] = label
+        if type is not None:
+            self.types[i] = sys.intern(type)
+        if meta:
+            for k, v in meta.items():
+                self.set_meta(i, k, v)
+        return i
+
+    def add_edge(self, u, v, pred=None, **attrs):
+        """
+        Add an edge from u to v
+        """
+        if not isinstance(self.src, array):
+            # e.g. read-only arrays mapped from a snapshot
+            self.src, self.dst, self.pred = (array('i', a.tolist()) for a in (self.src, self.dst, self.pred))
+        self.src.append(self.intern(u))
+        self.dst.append(self.intern(v))
+        self.pred.append(self.intern_pred(pred))
+        self._csr_cache = {}
+
+    def set_meta(self, i, k, v):
+        self.meta.setdefault(k, {})[i] = v
+
+    def get_meta(self, i, k):
+        col = self.meta.get(k)
+        if col is None:
+            return None
+        return col.get(i)
+
+    def node_meta(self, i):
+        """
+        Reconstruct the obograph meta dict for a node
+        """
+        return {k: col[i] for k, col in self.meta.items() if i in col}
+
+    def edge_arrays(self):
+        """
+        Return (src, dst, pred) as numpy int32 arrays
+        """
+        return tuple(a if isinstance(a, np.ndarray) else np.array(a, dtype=np.int32)
+                     for a in (self.src, self.dst, self.pred))
+
+    def edge_mask(self, relations=None):
+        """
+        Boolean numpy mask over edges whose relation is in relations; None for all edges
+        """
+        if relations is None:
+            return None
+        pids = [self.pred_index[r] for r in relations if r in self.pred_index]
+        return np.isin(self.edge_arrays()[2], pids)
+
+    def csr(self, relations=None, reverse=False):
+        """
+        Return CSR adjacency for edges filtered by relation
+
+        With reverse=False, row i lists the sources of edges into i (i.e. parents);
+        with reverse=True, row i lists the targets of edges out of i (children).
+
+        Returns
+        -------
+        (indptr, indices, preds)
+            numpy arrays; indices[indptr[i]:indptr[i+1]] are the neighbors of i,
+            and preds gives the relation of each of these edges
+        """
+        key = (None if relations is None else frozenset(relations), reverse)
+        if key not in self._csr_cache:
+            src, dst, pred = self.edge_arrays()
+            mask = self.edge_mask(relations)
+            if mask is not None:
+                src, dst, pred = src[mask], dst[mask], pred[mask]
+            (rows, cols) = (src, dst) if reverse else (dst, src)
+            order = np.argsort(rows, kind='stable')
+            indptr = np.zeros(len(self.ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=len(self.ids)), out=indptr[1:])
+            self._csr_cache[key] = (indptr, cols[order], pred[order])
+        return self._csr_cache[key]
+
+    def neighbors(self, i, relations=None, reverse=False):
+        """
+        Return unique neighbor integer ids of node i, in edge order
+        """
+        indptr, indices, _ = self.csr(relations, reverse=reverse)
+        return list(dict.fromkeys(indices[indptr[i]:indptr[i+1]].tolist()))
+
+    def reachable(self, i, relations=None, reverse=False):
+        """
+        Return set of integer ids reachable from node i, including i
+        """
+        indptr, indices, _ = self.csr(relations, reverse=reverse)
+        seen = {i}
+        stack = [i]
+        while stack:
+            n = stack.pop()
+            for j in indices[indptr[n]:indptr[n+1]].tolist():
+                if j not in seen:
+                    seen.add(j)
+                    stack.append(j)
+        return seen
+
+    @classmethod
+    def from_networkx(cls, g):
+        """
+        Create from a networkx graph of the kind used by :class:`Ontology`
+        """
+        cg = cls()
+        for n, d in g.nodes(data=True):
+            cg.add_node(n, **d)
+        for u, v, d in g.edges(data=True):
+            cg.add_edge(u, v, pred=d.get('pred'))
+        return cg
+
+
+class CompactOntology(Ontology):
+    """
+    An in-memory ontology backed by a :class:`CompactGraph`.
+
+    Implements the same API as :class:`Ontology`. Methods that need a
+    networkx graph (e.g. :meth:`get_graph`, :meth:`get_filtered_graph`,
+    :meth:`traverse_nodes`) work on a networkx copy that is materialized on
+    first use; prefer the node-level methods for large ontologies.
+
+    **Note**: do not call this directly, use OntologyFactory instead
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.graph is None:
+            self.graph = CompactGraph()
+        elif not isinstance(self.graph, CompactGraph):
+            self.graph = CompactGraph.from_networkx(self.graph)
+        self._nxgraph = None
+
+    # the xref graph may be supplied as a callable that creates it on first use
+    _xref_graph = None
+
+    @property
+    def xref_graph(self):
+        if callable(self._xref_graph):
+            self._xref_graph = self._xref_graph()
+        return self._xref_graph
+
+    @xref_graph.setter
+    def xref_graph(self, xref_graph):
+        self._xref_graph = xref_graph
+
+    def _changed(self):
+        self._nxgraph = None
+        self._invalidate_closures()
+        self.invalidate_lexical_index()
+
+    def get_graph(self):
+        """
+        Return a networkx graph for the whole ontology.
+
+        This is created from the compact representation on first use, and
+        is not kept in sync with modifications made directly to it.
+
+        Return
+        ------
+        nx.MultiDiGraph
+        """
+        if self._nxgraph is None:
+            logger.info("Materializing networkx graph for {}".format(self))
+            cg = self.graph
+            g = nx.MultiDiGraph()
+            for i, n in enumerate(cg.ids):
+                g.add_node(n, **self._node_dict(i))
+            for (u, v, p) in zip(cg.src, cg.dst, cg.pred):
+                g.add_edge(cg.ids[u], cg.ids[v], pred=cg.preds[p])
+            self._nxgraph = g
+        return self._nxgraph
+
+    def _node_dict(self, i):
+        cg = self.graph
+        d = {'id': cg.ids[i], 'meta': cg.node_meta(i)}
+        if cg.labels[i] is not None:
+            d['label'] = cg.labels[i]
+            d['lbl'] = cg.labels[i]
+        if cg.types[i] is not None:
+            d['type'] = cg.types[i]
+        return d
+
+    def closure_index(self, relations=None):
+        if self._closure_indexes is None:
+            self._closure_indexes = {}
+        key = None if relations is None else frozenset(relations)
+        if key not in self._closure_indexes:
+            cg = self.graph
+            src, dst, _ = cg.edge_arrays()
+            mask = cg.edge_mask(relations)
+            if mask is not None:
+                src, dst = src[mask], dst[mask]
+            self._closure_indexes[key] = ClosureIndex.from_edges(cg.ids, zip(dst.tolist(), src.tolist()),
+                                                                 relations=relations)
+        return self._closure_indexes[key]
+
+    def merge(self, ontologies):
+        """
+        Merges specified ontology into current ontology
+        """
+        self._changed()
+        if self.xref_graph is None:
+            self.xref_graph = nx.MultiGraph()
+        cg = self.graph
+        for ont in ontologies:
+            logger.info("Merging {} into {}".format(ont, self))
+            srcg = ont.get_graph()
+            for n in srcg.nodes():
+                cg.add_node(n, **srcg.nodes[n])
+            for (o,s,m) in srcg.edges(data=True):
+                cg.add_edge(o, s, pred=m.get('pred'))
+            if ont.xref_graph is not None:
+                for (o,s,m) in ont.xref_graph.edges(data=True):
+                    self.xref_graph.add_edge(o,s,**m)
+            if ont.all_logical_definitions is not None:
+                for ld in ont.all_logical_definitions:
+                    self.add_logical_definition(ld)
+            if ont.all_property_chain_axioms is not None:
+                for pca in ont.all_property_chain_axioms:
+                    self.add_property_chain_axiom(pca)
+
+    def subontology(self, nodes=None, minimal=False, relations=None):
+        """
+        Return a new ontology that is an extract of this one
+
+        See :meth:`Ontology.subontology`
+        """
+        if minimal:
+            return CompactOntology(graph=super().subontology(nodes, minimal=True, relations=relations).get_graph(),
+                                   xref_graph=self.xref_graph)
+        cg = self.graph
+        if nodes is None:
+            keep = list(range(len(cg.ids)))
+        else:
+            keep = [cg.id_index[n] for n in nodes if n in cg.id_index]
+        sub = CompactGraph()
+        for i in keep:
+            sub.add_node(cg.ids[i], label=cg.labels[i], type=cg.types[i], meta=cg.node_meta(i))
+        keepset = set(keep)
+        mask = cg.edge_mask(relations)
+        for k, (u, v, p) in enumerate(zip(cg.src, cg.dst, cg.pred)):
+            if (mask is None or mask[k]) and u in keepset and v in keepset:
+                sub.add_edge(cg.ids[u], cg.ids[v], pred=cg.preds[p])
+        ont = CompactOntology(graph=sub, xref_graph=self.xref_graph)
+        if self._closure_indexes is not None:
+            ont.enable_closure_index()
+        return ont
+
+    def nodes(self):
+        """
+        Return all nodes in ontology
+        """
+        return list(self.graph.ids)
+
+    def node(self, id):
+        """
+        Return a node with a given ID. If the node with the ID exists the
+        Node object is returned, otherwise None is returned.
+
+        The node object is a copy; use the add_* methods to modify nodes.
+        """
+        i = self.graph.id_index.get(id)
+        if i is None:
+            return None
+        return self._node_dict(i)
+
+    def has_node(self, id):
+        return id in self.graph.id_index
+
+    def _meta(self, nid):
+        i = self.graph.id_index.get(nid)
+        if i is None:
+            return {}
+        return self.graph.node_meta(i)
+
+    def _get_meta(self, nid):
+        i = self.graph.id_index[nid]
+        return self.graph.node_meta(i)
+
+    def _get_meta_prop(self, nid, prop):
+        return self.graph.get_meta(self.graph.id_index[nid], prop)
+
+    def relations_used(self):
+        cg = self.graph
+        return [cg.preds[p] for p in set(cg.pred)]
+
+    def child_parent_relations(self, subj, obj, graph=None):
+        cg = self.graph
+        i = cg.id_index[subj]
+        j = cg.id_index[obj]
+        indptr, indices, preds = cg.csr()
+        rng = slice(indptr[i], indptr[i+1])
+        return {cg.preds[p] for (k, p) in zip(indices[rng].tolist(), preds[rng].tolist()) if k == j}
+
+    def parents(self, node, relations=None):
+        cg = self.graph
+        i = cg.id_index.get(node)
+        if i is None:
+            return []
+        return [cg.ids[j] for j in cg.neighbors(i, relations)]
+
+    def children(self, node, relations=None):
+        cg = self.graph
+        i = cg.id_index.get(node)
+        if i is None:
+            return []
+        return [cg.ids[j] for j in cg.neighbors(i, relations, reverse=True)]
+
+    def _reachable(self, node, relations, reflexive, reverse):
+        cg = self.graph
+        i = cg.id_index.get(node)
+        if i is None:
+            return [node] if reflexive else []
+        seen = cg.reachable(i, relations, reverse=reverse)
+        if not reflexive:
+            seen.discard(i)
+        return [cg.ids[j] for j in seen]
+
+    def ancestors(self, node, relations=None, reflexive=False):
+        if self._closure_indexes is not None:
+            return self.closure_index(relations).ancestors(node, reflexive=reflexive)
+        return self._reachable(node, relations, reflexive, reverse=False)
+
+    def descendants(self, node, relations=None, reflexive=False):
+        if self._closure_indexes is not None:
+            return self.closure_index(relations).descendants(node, reflexive=reflexive)
+        return self._reachable(node, relations, reflexive, reverse=True)
+
+    def label(self, nid, id_if_null=False):
+        cg = self.graph
+        i = cg.id_index.get(nid)
+        lbl = None if i is None else cg.labels[i]
+        if lbl is None and id_if_null:
+            return nid
+        return lbl
+
+    def synonyms(self, nid, include_label=False):
+        i = self.graph.id_index[nid]
+        syns = [Synonym(nid, **obj) for obj in self.graph.get_meta(i, 'synonyms') or []]
+        if include_label:
+            syns.append(Synonym(nid, val=self.label(nid), pred='label'))
+        return syns
+
+    def all_obsoletes(self):
+        col = self.graph.meta.get('deprecated', {})
+        return [self.graph.ids[i] for i, v in col.items() if v]
+
+    def obo_namespace(self, nid):
+        i = self.graph.id_index.get(nid)
+        if i is None:
+            return None
+        for bpv in self.graph.get_meta(i, 'basicPropertyValues') or []:
+            if bpv['pred'] == "OIO:hasOBONamespace":
+                return bpv['val']
+        return None
+
+    def add_node(self, id, label=None, type='CLASS', meta=None):
+        self.graph.add_node(id, label=label, type=type, meta=meta)
+        self._changed()
+
+    def add_parent(self, id, pid, relation='subClassOf'):
+        self.graph.add_edge(pid, id, pred=relation)
+        self._changed()
+
+    def set_obsolete(self, nid):
+        if nid not in self.graph:
+            self.add_node(nid)
+        self._add_meta_element(nid, 'deprecated', True)
+
+    def _add_meta_element(self, id, k, edict):
+        i = self.graph.id_index.get(id)
+        if i is None:
+            raise ValueError('no such node {}'.format(id))
+        self.graph.set_meta(i, k, edict)
+        self._nxgraph = None
+
+    def _append_meta_element(self, id, k, v):
+        cg = self.graph
+        i = cg.id_index[id]
+        vs = cg.get_meta(i, k) or []
+        vs.append(v)
+        cg.set_meta(i, k, vs)
+        self._nxgraph = None
+
+    def add_synonym(self, syn):
+        self._append_meta_element(syn.class_id, 'synonyms', syn.as_dict())
+        self.invalidate_lexical_index()
+
+    def add_to_subset(self, id, s):
+        self._append_meta_element(id, 'subsets', s)
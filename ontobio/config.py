@@ -29,6 +29,20 @@ class EndpointSchema(Schema):
     def make_object(self, data, **kwargs):
         return Endpoint(**data)
 
+class CacheConfigSchema(Schema):
+    """
+    Configuration for a cache of query results
+    """
+    enabled = fields.Bool(description="if false, do not cache")
+    ttl = fields.Int(allow_none=True, description="seconds until entries expire")
+    max_bytes = fields.Int(description="maximum size of in-memory cache")
+    directory = fields.Str(allow_none=True, description="if set, also cache to disk in this directory")
+    disk_max_bytes = fields.Int(description="maximum size of on-disk cache")
+
+    @post_load
+    def make_object(self, data, **kwargs):
+        return CacheConfig(**data)
+
 class CategorySchema(Schema):
     """
     Maps a category label to a root ontology class
@@ -59,6 +73,7 @@ class ConfigSchema(Schema):
     categories = fields.List(fields.Nested(CategorySchema))
     taxon_restriction = fields.List(fields.Str(description="taxon restriction"))
     use_amigo_for = fields.List(fields.Str(description="category to use amigo for"))
+    golr_cache = fields.Nested(CacheConfigSchema, description="cache for golr query results")
 
     @post_load
     def make_object(self, data, **kwargs):
@@ -74,6 +89,22 @@ class Endpoint():
         self.url = url
         self.timeout = timeout
 
+class CacheConfig():
+    """
+    Settings for a query result cache. See ontobio.golr.golr_cache
+    """
+    def __init__(self,
+                 enabled = True,
+                 ttl = 3600,
+                 max_bytes = 100 * 1000 * 1000,
+                 directory = None,
+                 disk_max_bytes = 1000 * 1000 * 1000):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+
 class OntologyConfig():
     """
     Maps local id of ontology to a handle
@@ -117,7 +148,8 @@ class Config():
                  categories = None,
                  default_solr_schema = None,
                  use_amigo_for = "function",
-                 taxon_restriction = None):
+                 taxon_restriction = None,
+                 golr_cache = None):
         self.solr_assocs = solr_assocs
         self.amigo_solr_assocs = amigo_solr_assocs
         self.solr_search = solr_search
@@ -133,6 +165,7 @@ class Config():
         self.default_solr_schema = default_solr_schema
         self.use_amigo_for = use_amigo_for
         self.taxon_restriction = taxon_restriction
+        self.golr_cache = golr_cache
 
         if self.ontologies is None:
             self.ontologies = []
@@ -1,11 +1,16 @@
 import requests
 from contextlib import closing
+import datetime
 import logging
+import os
 
 from ontobio.util.user_agent import get_user_agent
 
 logger = logging.getLogger(__name__)
 
+# Snapshots of the mappings written by `refresh_snapshot`, read in place of the PURLs when present
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), "data")
+
 
 def get_ecomap_str(url):
     logger.info("Fetching ecomap from {}".format(url))
@@ -14,6 +19,49 @@ def get_ecomap_str(url):
         if resp.status_code == 200:
             return resp.text
 
+def snapshot_path(url):
+    return os.path.join(SNAPSHOT_DIR, url.rsplit("/", 1)[-1])
+
+def get_ecomap_snapshot_str(url):
+    """
+    Contents of the snapshot of the mapping at `url`, or None if there is no snapshot
+    """
+    path = snapshot_path(url)
+    if not os.path.exists(path):
+        return None
+    logger.info("Reading ecomap snapshot {}".format(path))
+    with open(path) as snapshot:
+        return snapshot.read()
+
+def refresh_snapshot(snapshot_dir=None):
+    """
+    Fetch the current mappings from their PURLs, and replace the snapshots with them
+
+    Arguments
+    ---------
+    snapshot_dir : str
+        Directory to write the snapshots to. Defaults to `SNAPSHOT_DIR`
+
+    Return
+    ------
+    list
+        Paths of the written snapshots
+    """
+    snapshot_dir = SNAPSHOT_DIR if snapshot_dir is None else snapshot_dir
+    os.makedirs(snapshot_dir, exist_ok=True)
+    paths = []
+    for url in [EcoMap.PURL, EcoMap.PURL_DERIVED]:
+        s = get_ecomap_str(url)
+        if s is None:
+            raise IOError("Could not fetch ecomap from {}".format(url))
+        path = os.path.join(snapshot_dir, url.rsplit("/", 1)[-1])
+        with open(path, "w") as snapshot:
+            snapshot.write("# Fetched from {} on {}\n".format(url, datetime.date.today().isoformat()))
+            snapshot.write("# Update with ontobio.ecomap.refresh_snapshot()\n")
+            snapshot.write(s)
+        paths.append(path)
+    return paths
+
 #E.g.
 # IEA	Default	ECO:0000501
 # IEA	GO_REF:0000002	ECO:0000256
@@ -23,28 +71,68 @@ class EcoMap():
     """
     Provides mapping between GO Evidence codes (IDA, IEA, ISS, etc) and ECO classes.
 
-    The mapping is actually between a (code, ref) pair and an eco class
+    The mapping is actually between a (code, ref) pair and an eco class.
+
+    The mappings are read from the snapshots in `SNAPSHOT_DIR` (see `refresh_snapshot`), falling back
+    to their PURLs if there is no snapshot. With `use_snapshot=False` they are always fetched from the PURLs.
+
+    Use `get_ecomap` for the instance shared by ontobio's modules.
     """
 
     PURL = 'http://purl.obolibrary.org/obo/eco/gaf-eco-mapping.txt'
     PURL_DERIVED = 'http://purl.obolibrary.org/obo/eco/gaf-eco-mapping-derived.txt'
 
-    def __init__(self):
+    def __init__(self, use_snapshot=True):
+        self.use_snapshot = use_snapshot
         self._mappings = None
         self._derived_mappings = None
-    
+        # Indexes of the mappings, see `_index`
+        self._coderef_index = None
+        self._code_index = None
+        self._class_index = None
+        self._derived_class_index = None
+
+    def _get_ecomap_str(self, url):
+        s = get_ecomap_snapshot_str(url) if self.use_snapshot else None
+        if s is None:
+            s = get_ecomap_str(url)
+        return s
+
     def mappings(self):
         if self._mappings is None:
-            s = get_ecomap_str(self.PURL)
+            s = self._get_ecomap_str(self.PURL)
             self._mappings = self.parse_ecomap_str(s)
         return self._mappings
 
     def derived_mappings(self):
         if self._derived_mappings is None:
-            s = get_ecomap_str(self.PURL_DERIVED)
+            s = self._get_ecomap_str(self.PURL_DERIVED)
             self._derived_mappings = self.parse_derived_ecomap_str(s)
         return self._derived_mappings
 
+    def _index(self):
+        """
+        Build dictionaries for looking up mappings by (code, ref), by code for the default class, and by class.
+        Where the mappings repeat a key, the index keeps the row the linear scan used to find.
+        """
+        coderef_index = {}
+        code_index = {}
+        class_index = {}
+        for (code, ref, cls) in self.mappings():
+            coderef_index.setdefault((str(code), ref), cls)
+            if ref is None:
+                code_index[str(code)] = cls
+            class_index.setdefault(cls, (code, ref))
+        self._coderef_index = coderef_index
+        self._code_index = code_index
+        self._class_index = class_index
+
+    def _derived_index(self):
+        derived_class_index = {}
+        for (code, ref, cls) in self.derived_mappings():
+            derived_class_index.setdefault(cls, (code, ref))
+        self._derived_class_index = derived_class_index
+
     def parse_ecomap_str(self, str):
         lines = str.split("\n")
         tups = []
@@ -92,16 +180,14 @@ class EcoMap():
         str
             ECO class CURIE/ID
         """
-        mcls = None
-        for (this_code, this_ref, cls) in self.mappings():
-            if str(this_code) == str(code):
-                if this_ref == reference:
-                    return cls
-                if this_ref is None:
-                    mcls = cls
-                    
-        return mcls
-                
+        if self._coderef_index is None:
+            self._index()
+        code = str(code)
+        cls = self._coderef_index.get((code, reference))
+        if cls is not None:
+            return cls
+        return self._code_index.get(code)
+
     def ecoclass_to_coderef(self, cls, derived=False):
         """
         Map an ECO class to a GAF code
@@ -120,13 +206,24 @@ class EcoMap():
         (str, str)
             code, reference tuple
         """
-        code = ''
-        ref = None
         if derived:
-            mappings = self.derived_mappings()
+            if self._derived_class_index is None:
+                self._derived_index()
+            index = self._derived_class_index
         else:
-            mappings = self.mappings()
-        for (code, ref, this_cls) in mappings:
-            if cls == this_cls:
-                return code, ref
-        return None, None
+            if self._class_index is None:
+                self._index()
+            index = self._class_index
+        return index.get(cls, (None, None))
+
+
+_ecomap = None
+
+def get_ecomap():
+    """
+    Returns the EcoMap shared by ontobio's modules, so the mappings are loaded and indexed once per process
+    """
+    global _ecomap
+    if _ecomap is None:
+        _ecomap = EcoMap()
+    return _ecomap
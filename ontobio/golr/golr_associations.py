@@ -77,11 +77,11 @@ def search_associations_compact(**kwargs):
     """
     Convenience method: as for search associations, use compact
     """
-    searchresult = search_associations(use_compact_associations=True,
-                                       facet_fields=[],
-                                       **kwargs
-    )
-    return searchresult['compact_associations']
+    logger.info("CREATING_GOLR_QUERY {}".format(kwargs))
+    q = GolrAssociationQuery(use_compact_associations=True,
+                             facet_fields=[],
+                             **kwargs)
+    return list(q.exec_iter(single_page=not q.iterate))
 
 def map2slim(subjects, slim, **kwargs):
     """
@@ -139,21 +139,32 @@ def bulk_fetch(subject_category, object_category, taxon, rows=MAX_ROWS, **kwargs
 
     Additionally, any argument for search_associations can be passed
     """
-    assert subject_category is not None
-    assert object_category is not None
-    time.sleep(1)
-    logger.info("Bulk query: {} {} {}".format(subject_category, object_category, taxon))
-    assocs = search_associations_compact(subject_category=subject_category,
-                                         object_category=object_category,
-                                         subject_taxon=taxon,
-                                         rows=rows,
-                                         iterate=True,
-                                         **kwargs)
+    assocs = list(bulk_fetch_iter(subject_category, object_category, taxon, rows=rows, **kwargs))
     logger.info("Rows retrieved: {}".format(len(assocs)))
     if len(assocs) == 0:
         logger.error("No associations returned for query: {} {} {}".format(subject_category, object_category, taxon))
     return assocs
 
+def bulk_fetch_iter(subject_category, object_category, taxon, rows=MAX_ROWS, **kwargs):
+    """
+    As bulk_fetch, but yields compact associations as they are fetched,
+    rather than returning them all as a list.
+
+    rows is the number of solr documents fetched per request
+    """
+    assert subject_category is not None
+    assert object_category is not None
+    time.sleep(1)
+    logger.info("Bulk query: {} {} {}".format(subject_category, object_category, taxon))
+    q = GolrAssociationQuery(subject_category=subject_category,
+                             object_category=object_category,
+                             subject_taxon=taxon,
+                             rows=rows,
+                             use_compact_associations=True,
+                             facet_fields=[],
+                             **kwargs)
+    return q.exec_iter()
+
 def pivot_query(facet=None, facet_pivot_fields=None, **kwargs):
     """
     Pivot query
@@ -0,0 +1,214 @@
+"""
+Cache for GOlr query results
+
+Results of solr queries are cached keyed on the solr endpoint (the
+namespace) and the query parameters, so that repeated queries, e.g. for
+the same closure or facet counts, do not go back to solr.
+
+There is an in-memory LRU tier, bounded by the total size in bytes of the
+cached responses, and an optional on-disk tier (using diskcache) that is
+shared between processes. Entries in both tiers expire after a TTL.
+
+The cache is configured with a `golr_cache` section in the ontobio config;
+it is off in the default config. E.g.
+
+::
+
+    golr_cache:
+      enabled: true
+      ttl: 3600
+      max_bytes: 100000000
+      directory: /var/cache/ontobio/golr
+      disk_max_bytes: 1000000000
+
+"""
+import hashlib
+import json
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_BYTES = 100 * 1000 * 1000
+DEFAULT_DISK_MAX_BYTES = 1000 * 1000 * 1000
+
+
+def cache_key(params: Dict) -> str:
+    """
+    Normalized form of a dict of solr query parameters
+
+    Parameter order, and the order of filter queries, do not affect the key
+    """
+    normalized = {}
+    for (k, v) in params.items():
+        if k == 'fq' and isinstance(v, (list, tuple)):
+            v = sorted(v)
+        normalized[k] = v
+    return json.dumps(normalized, sort_keys=True, default=str)
+
+
+class GolrCache():
+    """
+    Two tier (memory, disk) cache of solr responses, keyed by namespace and query parameters
+
+    Values are stored pickled, so each `get` returns a fresh copy that callers may modify.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES, directory=None, disk_max_bytes=DEFAULT_DISK_MAX_BYTES):
+        """
+        Arguments
+        ---------
+        ttl : int
+            seconds after which entries expire. None for no expiry
+        max_bytes : int
+            maximum total size of pickled values held in memory
+        directory : str
+            if set, location of the on-disk tier
+        disk_max_bytes : int
+            maximum size of the on-disk tier
+        """
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()  # (namespace, key) --> (expires, pickled value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.disk = None
+        if directory is not None:
+            from diskcache import Cache
+            self.disk = Cache(directory, size_limit=disk_max_bytes)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.namespace_stats = {}  # namespace --> {'hits': n, 'misses': n}
+
+    def _count(self, namespace, outcome):
+        counts = self.namespace_stats.setdefault(namespace, {'hits': 0, 'misses': 0})
+        counts[outcome] += 1
+
+    @staticmethod
+    def _disk_key(namespace, key):
+        return "golr:" + hashlib.sha1("{}\t{}".format(namespace, key).encode('utf-8')).hexdigest()
+
+    def get(self, namespace: str, params: Dict):
+        """
+        Returns the cached value for a query, or None
+        """
+        key = (namespace, cache_key(params))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                (expires, data) = entry
+                if expires is not None and expires < now:
+                    self._remove(key)
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    self._count(namespace, 'hits')
+                    return pickle.loads(data)
+        if self.disk is not None:
+            data = self.disk.get(self._disk_key(*key))
+            if data is not None:
+                with self._lock:
+                    self._store(key, data, now)
+                    self.disk_hits += 1
+                    self._count(namespace, 'hits')
+                return pickle.loads(data)
+        with self._lock:
+            self.misses += 1
+            self._count(namespace, 'misses')
+        return None
+
+    def set(self, namespace: str, params: Dict, value) -> None:
+        """
+        Caches the value for a query
+        """
+        key = (namespace, cache_key(params))
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._store(key, data, time.time())
+        if self.disk is not None:
+            self.disk.set(self._disk_key(*key), data, expire=self.ttl)
+
+    def _store(self, key, data, now):
+        if key in self._entries:
+            self._remove(key)
+        if len(data) > self.max_bytes:
+            return
+        expires = now + self.ttl if self.ttl is not None else None
+        self._entries[key] = (expires, data)
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes:
+            (oldest, _) = next(iter(self._entries.items()))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        (_, data) = self._entries.pop(key)
+        self._bytes -= len(data)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """
+        Removes all entries, or all entries for a namespace, from the memory tier.
+        The disk tier is only cleared when no namespace is given.
+        """
+        with self._lock:
+            for key in list(self._entries.keys()):
+                if namespace is None or key[0] == namespace:
+                    self._remove(key)
+        if namespace is None and self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict:
+        """
+        Returns hit/miss metrics and current size
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                'hits': hits,
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / lookups if lookups > 0 else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'namespaces': {ns: dict(counts) for (ns, counts) in self.namespace_stats.items()}
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_golr_cache(config) -> Optional[GolrCache]:
+    """
+    Returns the GolrCache for a config, or None if the config has no golr_cache section
+
+    Configs with the same cache settings share a cache.
+    """
+    cache_config = getattr(config, 'golr_cache', None)
+    if cache_config is None or not cache_config.enabled:
+        return None
+    settings = (cache_config.ttl, cache_config.max_bytes, cache_config.directory, cache_config.disk_max_bytes)
+    with _caches_lock:
+        cache = _caches.get(settings)
+        if cache is None:
+            cache = GolrCache(*settings)
+            _caches[settings] = cache
+        return cache
@@ -9,6 +9,7 @@ The most efficient strategy may be to pre-load associations and compute in-memor
 """
 
 from ontobio.golr.golr_associations import search_associations, GolrFields
+from ontobio.golr.golr_query import GolrAssociationQuery
 import scipy.stats # TODO - move
 import scipy as sp # TODO - move
 
@@ -22,25 +23,22 @@ def term_matrix(idlist, subject_category, taxon, **kwargs):
     F1       0   5
     not(F1)  6   0
     """
-    results = search_associations(objects=idlist,
-                                  subject_taxon=taxon,
-                                  subject_category=subject_category,
-                                  select_fields=[M.SUBJECT, M.OBJECT_CLOSURE],
-                                  facet_fields=[],
-                                  rows=-1,
-                                  include_raw=True,
-                                  **kwargs)
-    docs = results['raw'].docs
+    q = GolrAssociationQuery(objects=idlist,
+                             subject_taxon=taxon,
+                             subject_category=subject_category,
+                             facet_fields=[],
+                             rows=-1,
+                             **kwargs)
 
     subjects_per_term = {}
     smap = {}
-    for d in docs:
-        smap[d[M.SUBJECT]] = 1
-        for c in d[M.OBJECT_CLOSURE]:
+    for (subj, closure) in q.exec_rows([M.SUBJECT, M.OBJECT_CLOSURE]):
+        smap[subj] = 1
+        for c in closure:
             if c in idlist:
                 if c not in subjects_per_term:
                     subjects_per_term[c] = []
-                subjects_per_term[c].append(d[M.SUBJECT])
+                subjects_per_term[c].append(subj)
     pop_n = len(smap.keys())
 
     cells = []
@@ -40,9 +40,13 @@ import json
 import logging
 import pysolr
 import re
+import requests
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import asdict
 from typing import Dict, List
 import xml.etree.ElementTree as ET
+import pandas as pd
 from collections import OrderedDict
 from ontobio.vocabulary.relations import HomologyTypes
 from ontobio.model.GolrResults import SearchResults, AutocompleteResult, Highlight
@@ -50,6 +54,7 @@ from ontobio.util.user_agent import get_user_agent
 from prefixcommons.curie_util import expand_uri
 from ontobio.util.curie_map import get_curie_map
 from ontobio import ecomap
+from ontobio.golr.golr_cache import get_golr_cache
 
 INVOLVED_IN="involved_in"
 ACTS_UPSTREAM_OF_OR_WITHIN="acts_upstream_of_or_within"
@@ -57,11 +62,22 @@ ACTS_UPSTREAM_OF_OR_WITHIN="acts_upstream_of_or_within"
 ISA_PARTOF_CLOSURE="isa_partof_closure"
 REGULATES_CLOSURE="regulates_closure"
 
-ecomapping = ecomap.EcoMap()
+ecomapping = ecomap.get_ecomap()
 iea_eco = ecomapping.coderef_to_ecoclass("IEA")
 
 logger = logging.getLogger(__name__)
 
+# maximum open connections kept per solr endpoint
+SOLR_POOL_SIZE = 16
+# maximum solr queries in flight at once from subquery_executor
+SUBQUERY_WORKERS = 8
+
+_solr_sessions = {}
+_solr_sessions_lock = threading.Lock()
+_subquery_executor = None
+# set on threads of the subquery executor while they run a sub-query
+_subquery_local = threading.local()
+
 
 class GolrFields:
     """
@@ -296,6 +312,62 @@ def map_field(fn, m) :
     else:
         return fn
 
+def solr_session(url, user_agent=None):
+    """
+    Returns the HTTP session shared by all queries to a solr endpoint
+
+    Sessions keep a pool of up to SOLR_POOL_SIZE open connections to the endpoint,
+    so that successive and concurrent queries do not each pay for a new connection.
+    There is one session per endpoint url and user agent.
+    """
+    key = (url, user_agent)
+    with _solr_sessions_lock:
+        session = _solr_sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            session.stream = False
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=SOLR_POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if user_agent is not None:
+                session.headers['User-Agent'] = user_agent
+            _solr_sessions[key] = session
+        return session
+
+def subquery_executor():
+    """
+    Returns the thread pool used to send independent solr queries concurrently
+    """
+    global _subquery_executor
+    with _solr_sessions_lock:
+        if _subquery_executor is None:
+            _subquery_executor = ThreadPoolExecutor(max_workers=SUBQUERY_WORKERS, thread_name_prefix='golr')
+        return _subquery_executor
+
+def _run_subquery(fn, args, kwargs):
+    _subquery_local.active = True
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _subquery_local.active = False
+
+def submit_subquery(fn, *args, **kwargs) -> Future:
+    """
+    Run `fn` on the subquery executor, returning its future.
+
+    Called from a sub-query already running on the executor (e.g. a query with fetch_objects run
+    by golr_sim.subject_pair_overlap), `fn` runs inline instead: waiting on the executor from its
+    own threads deadlocks once they are all busy.
+    """
+    if getattr(_subquery_local, 'active', False):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return subquery_executor().submit(_run_subquery, fn, args, kwargs)
+
 ### CLASSES
 
 class GolrServer():
@@ -309,11 +381,26 @@ class GolrAbstractQuery():
         return self.config
 
     def _set_solr(self, url, timeout=2):
-        self.solr = pysolr.Solr(url=url, timeout=timeout)
+        self.solr = pysolr.Solr(url=url, timeout=timeout, session=solr_session(url))
         return self.solr
 
     def _set_user_agent(self, user_agent):
-        self.solr.get_session().headers['User-Agent'] = user_agent
+        self.solr.session = solr_session(self.solr.url, user_agent)
+
+    def _search(self, **params):
+        """
+        Execute a solr query, using the golr query cache if one is configured
+        """
+        cache = get_golr_cache(self.get_config()) if self.use_cache else None
+        if cache is None:
+            return self.solr.search(**params)
+        namespace = self.solr.url
+        decoded = cache.get(namespace, params)
+        if decoded is not None:
+            return self.solr.results_cls(decoded)
+        results = self.solr.search(**params)
+        cache.set(namespace, params, results.raw_response)
+        return results
 
     def _use_amigo_schema(self, object_category):
         if object_category is not None and object_category == 'function':
@@ -355,13 +442,15 @@ class GolrSearchQuery(GolrAbstractQuery):
                  minimal_tokenizer=False,
                  include_eqs=False,
                  exclude_groups=False,
-                 user_agent=None):
+                 user_agent=None,
+                 use_cache=True):
         self.term = term
         self.category = category
         self.is_go = is_go
         self.url = url
         self.solr = solr
         self.config = config
+        self.use_cache = use_cache
         self.hl = hl
         self.facet = facet
         self.facet_fields = facet_fields
@@ -567,7 +656,7 @@ class GolrSearchQuery(GolrAbstractQuery):
         """
         params = self.solr_params(mode='search')
         logger.info("PARAMS=" + str(params))
-        results = self.solr.search(**params)
+        results = self._search(**params)
         logger.info("Docs found: {}".format(results.hits))
         return self._process_search_results(results)
 
@@ -578,7 +667,7 @@ class GolrSearchQuery(GolrAbstractQuery):
         self.facet = False
         params = self.solr_params()
         logger.info("PARAMS=" + str(params))
-        results = self.solr.search(**params)
+        results = self._search(**params)
         logger.info("Docs found: {}".format(results.hits))
         return self._process_autocomplete_results(results)
 
@@ -785,7 +874,7 @@ class GolrLayPersonSearch(GolrSearchQuery):
         """
         params = self.set_lay_params()
         logger.info("PARAMS="+str(params))
-        results = self.solr.search(**params)
+        results = self._search(**params)
         logger.info("Docs found: {}".format(results.hits))
         return self._process_layperson_results(results)
 
@@ -889,6 +978,11 @@ class GolrAssociationQuery(GolrAbstractQuery):
         See :ref:`Config` for details. The config object can be used
         to set values for the solr instance to be queried
 
+    use_cache : bool
+
+        If true (the default), results are taken from and stored in the
+        golr query cache, if one is configured. See `ontobio.golr.golr_cache`
+
     TODO - Extract params into their own object
 
     """
@@ -945,6 +1039,7 @@ class GolrAssociationQuery(GolrAbstractQuery):
                  user_agent=None,
                  association_type=None,
                  sort=None,
+                 use_cache=True,
                  **kwargs):
 
         """Fetch a set of association objects based on a query.
@@ -1005,6 +1100,7 @@ class GolrAssociationQuery(GolrAbstractQuery):
         self.non_null_fields = non_null_fields
         self.association_type = association_type
         self.sort = sort
+        self.use_cache = use_cache
 
         self.user_agent = get_user_agent(modules=[requests, pysolr], caller_name=__name__)
         if user_agent is not None:
@@ -1445,21 +1541,53 @@ class GolrAssociationQuery(GolrAbstractQuery):
 
         params = self.solr_params()
         logger.info("PARAMS="+str(params))
-        results = self.solr.search(**params)
-        n_docs = len(results.docs)
-        logger.info("Docs found: {}".format(results.hits))
+
+        # the distinct object and subject queries do not depend on the main query,
+        # so are sent concurrently with it
+        object_field = None
+        objects_future = None
+        if self.fetch_objects:
+            core_object_field = M.OBJECT
+            if self.slim is not None and len(self.slim)>0:
+                core_object_field = M.OBJECT_CLOSURE
+            object_field = map_field(core_object_field, self.field_mapping)
+            if self.invert_subject_object:
+                object_field = map_field(M.SUBJECT, self.field_mapping)
+            oq_params = params.copy()
+            oq_params['fl'] = []
+            oq_params['facet.field'] = [object_field]
+            oq_params['facet.limit'] = -1
+            oq_params['rows'] = 0
+            oq_params['facet.mincount'] = 1
+            objects_future = submit_subquery(self._search, **oq_params)
+
+        subject_field = None
+        subjects_future = None
+        if self.fetch_subjects:
+            core_subject_field = M.SUBJECT
+            if self.slim is not None and len(self.slim)>0:
+                core_subject_field = M.SUBJECT_CLOSURE
+            subject_field = map_field(core_subject_field, self.field_mapping)
+            if self.invert_subject_object:
+                subject_field = map_field(M.SUBJECT, self.field_mapping)
+            sq_params = params.copy()
+            sq_params['fl'] = []
+            sq_params['facet.field'] = [subject_field]
+            sq_params['facet.limit'] = self.max_rows
+            sq_params['rows'] = 0
+            sq_params['facet.mincount'] = 1
+            subjects_future = submit_subquery(self._search, **sq_params)
 
         if self.iterate:
-            docs = results.docs
-            start = n_docs
-            while n_docs >= self.rows:
-                logger.info("Iterating; start={}".format(start))
-                next_results = self.solr.search(start=start, **params)
-                next_docs = next_results.docs
-                n_docs = len(next_docs)
-                docs += next_docs
-                start += self.rows
+            pages = self._cursor_pages(params)
+            results = next(pages)
+            docs = list(results.docs)
+            for next_results in pages:
+                docs += next_results.docs
             results.docs = docs
+        else:
+            results = self._search(**params)
+        logger.info("Docs found: {}".format(results.hits))
 
         fcs = results.facets
 
@@ -1491,44 +1619,18 @@ class GolrAssociationQuery(GolrAbstractQuery):
 
         # For solr, we implement this by finding all facets
         # TODO: no need to do 2nd query, see https://wiki.apache.org/solr/SimpleFacetParameters#Parameters
-        fetch_objects=self.fetch_objects
-        if fetch_objects:
-            core_object_field = M.OBJECT
-            if self.slim is not None and len(self.slim)>0:
-                core_object_field = M.OBJECT_CLOSURE
-            object_field = map_field(core_object_field, self.field_mapping)
-            if self.invert_subject_object:
-                object_field = map_field(M.SUBJECT, self.field_mapping)
-            oq_params = params.copy()
-            oq_params['fl'] = []
-            oq_params['facet.field'] = [object_field]
-            oq_params['facet.limit'] = -1
-            oq_params['rows'] = 0
-            oq_params['facet.mincount'] = 1
-            oq_results = self.solr.search(**oq_params)
+        if objects_future is not None:
+            oq_results = objects_future.result()
             if self.facet:
                 ff = oq_results.facets['facet_fields']
                 ofl = ff.get(object_field)
                 # solr returns facets counts as list, every 2nd element is number, we don't need the numbers here
                 payload['objects'] = ofl[0::2]
 
-        fetch_subjects=self.fetch_subjects
-        if fetch_subjects:
-            core_subject_field = M.SUBJECT
-            if self.slim is not None and len(self.slim)>0:
-                core_subject_field = M.SUBJECT_CLOSURE
-            subject_field = map_field(core_subject_field, self.field_mapping)
-            if self.invert_subject_object:
-                subject_field = map_field(M.SUBJECT, self.field_mapping)
-            oq_params = params.copy()
-            oq_params['fl'] = []
-            oq_params['facet.field'] = [subject_field]
-            oq_params['facet.limit'] = self.max_rows
-            oq_params['rows'] = 0
-            oq_params['facet.mincount'] = 1
-            oq_results = self.solr.search(**oq_params)
+        if subjects_future is not None:
+            sq_results = subjects_future.result()
             if self.facet:
-                ff = oq_results.facets['facet_fields']
+                ff = sq_results.facets['facet_fields']
                 ofl = ff.get(subject_field)
                 # solr returns facets counts as list, every 2nd element is number, we don't need the numbers here
                 payload['subjects'] = ofl[0::2]
@@ -1545,6 +1647,221 @@ class GolrAssociationQuery(GolrAbstractQuery):
 
         return payload
 
+    def _cursor_pages(self, params):
+        """
+        Generator over the pages of results for a solr query, using a cursor
+
+        Unlike paging with start/rows, each page costs the same for the server however
+        deep into the result set it is. The sort is extended with the unique key
+        so that it is total, as solr requires for cursors.
+        """
+        params = params.copy()
+        if params.pop('start', None):
+            logger.warning("Ignoring start={} when iterating with a cursor".format(self.start))
+        sort = [x.strip() for x in (params.get('sort') or '').split(',') if x.strip()]
+        if M.ID not in [x.split()[0] for x in sort]:
+            sort.append("{} asc".format(M.ID))
+        params['sort'] = ",".join(sort)
+        rows = params['rows']
+        cursor = '*'
+        while True:
+            logger.info("Iterating; cursor={}".format(cursor))
+            results = self.solr.search(cursorMark=cursor, **params)
+            yield results
+            next_cursor = results.nextCursorMark
+            if len(results.docs) < rows or next_cursor is None or next_cursor == cursor:
+                return
+            cursor = next_cursor
+
+    def _lean_params(self, page_size=None, iterate=False):
+        # query parameters for fetching documents only, without facets or stats
+        params = self.solr_params()
+        params['facet'] = 'off'
+        params['stats'] = json.dumps(False)
+        for k in ['json.facet', 'stats.field', 'facet.pivot']:
+            params.pop(k, None)
+        if page_size is not None and iterate:
+            params['rows'] = page_size
+        return params
+
+    def _result_pages(self, params, iterate=False):
+        # all pages if iterating, otherwise the first page only
+        if iterate:
+            return self._cursor_pages(params)
+        return iter([self._search(**params)])
+
+    def _source_field(self, field):
+        """
+        Name of the solr field holding the value of a canonical (Monarch schema) field,
+        taking into account the field mapping and subject/object inversion
+        """
+        if self.invert_subject_object:
+            for (x, y) in INVERT_FIELDS_MAP.items():
+                if field == x:
+                    field = y
+                    break
+                if field == y:
+                    field = x
+                    break
+        return map_field(field, self.field_mapping)
+
+    def exec_rows(self, fields, page_size=None, sort=None):
+        """
+        Execute solr query, yielding a tuple of values of the requested fields for each matching document
+
+        This is a lean alternative to `exec` for bulk queries: only the requested fields
+        are fetched from solr, and values are returned as stored, without translating
+        documents into association objects or decoding JSON fields. Missing values are None.
+
+        As with `exec`, all results are fetched if iterate is set, otherwise the first rows results.
+
+        Arguments
+        ---------
+
+        fields: list
+
+            canonical field names, e.g. [M.SUBJECT, M.OBJECT]. Field mapping (e.g. for the
+            AmiGO schema) and subject/object inversion are applied as for `exec`
+
+        page_size: int
+
+            number of documents fetched per request when iterating. Defaults to rows
+
+        sort: str
+
+            overrides the sort of the query
+
+        """
+        return self._rows(fields, page_size, sort, self.iterate)
+
+    def _rows(self, fields, page_size=None, sort=None, iterate=False):
+        params = self._lean_params(page_size, iterate)
+        source_fields = [self._source_field(f) for f in fields]
+        params['fl'] = ",".join(dict.fromkeys(f for f in source_fields if f is not None))
+        if sort is not None:
+            params['sort'] = sort
+        logger.info("PARAMS="+str(params))
+        for results in self._result_pages(params, iterate):
+            for d in results.docs:
+                yield tuple(d.get(f) for f in source_fields)
+
+    def exec_frame(self, fields, page_size=None):
+        """
+        As `exec_rows`, but returns a pandas DataFrame with one column per field
+        """
+        return pd.DataFrame.from_records(self.exec_rows(fields, page_size=page_size), columns=fields)
+
+    def translate_rows_compact(self, rows, slim=None, map_identifiers=None):
+        """
+        Translate (subject, subject_label, relation, object, object_closure, subject_closure) tuples
+        to compact associations, as `translate_docs_compact` does for documents
+
+        object_closure is only used if slim is set, and subject_closure if map_identifiers is set.
+        """
+        amap = {}
+        canonical = {}
+        for (subject, subject_label, rel, obj, object_closure, subject_closure) in rows:
+            if map_identifiers is not None and subject_closure is not None:
+                subject = self.map_id(subject, map_identifiers, subject_closure)
+
+            # this is a list in GO
+            if isinstance(rel, list):
+                if 'not' in rel or 'NOT' in rel:
+                    continue
+                if len(rel) > 1:
+                    logger.warning(">1 relation: {}".format(rel))
+                rel = ";".join(rel)
+            elif rel == 'not' or rel == 'NOT':
+                continue
+
+            canonical_subject = canonical.get(subject)
+            if canonical_subject is None:
+                canonical_subject = self.make_canonical_identifier(subject)
+                canonical[subject] = canonical_subject
+            subject = canonical_subject
+            k = (subject, rel)
+            a = amap.get(k)
+            if a is None:
+                a = {'subject': subject,
+                     'subject_label': subject_label,
+                     'relation': rel,
+                     'objects': []}
+                amap[k] = a
+            if slim is not None and len(slim) > 0:
+                a['objects'] += [x for x in object_closure if x in slim]
+            else:
+                a['objects'].append(obj)
+        for a in amap.values():
+            a['objects'] = list(set(a['objects']))
+        return list(amap.values())
+
+    def _compact_fields(self):
+        use_slim = self.slim is not None and len(self.slim) > 0
+        return [M.SUBJECT, M.SUBJECT_LABEL, M.RELATION, M.OBJECT,
+                M.OBJECT_CLOSURE if use_slim else None,
+                M.SUBJECT_CLOSURE if self.map_identifiers is not None else None]
+
+    def exec_iter(self, page_size=None, single_page=False, **kwargs):
+        """
+        Execute solr query, yielding all matching associations one at a time
+
+        Associations are fetched a page at a time using a solr cursor and translated as they
+        arrive, so the full result set is never held in memory. Yields compact associations if
+        use_compact_associations is set, otherwise full associations, as in the lists returned
+        by `exec`. Facets, raw results and fetch_objects/fetch_subjects are not computed.
+
+        Compact associations are built from only the fields they need (see `exec_rows`).
+        When paging, results are sorted by subject, and all objects for a subject and
+        relation are yielded in a single compact association (unless map_identifiers maps
+        non-adjacent subjects to the same identifier).
+
+        Arguments
+        ---------
+
+        page_size: int
+
+            number of solr documents fetched per request. Defaults to rows
+
+        single_page: bool
+
+            if True, only the first rows results are fetched, as for `exec` without iterate
+
+        """
+        iterate = not single_page
+        if self.use_compact_associations:
+            yield from self._exec_compact_iter(page_size, iterate)
+            return
+        params = self._lean_params(page_size, iterate)
+        logger.info("PARAMS="+str(params))
+        for results in self._result_pages(params, iterate):
+            for a in self.translate_docs(results.docs, field_mapping=self.field_mapping, map_identifiers=self.map_identifiers, **kwargs):
+                if self.slim is not None and len(self.slim)>0:
+                    a['slim'] = [x for x in a['object_closure'] if x in self.slim]
+                    del a['object_closure']
+                yield a
+
+    def _exec_compact_iter(self, page_size=None, iterate=True):
+        sort = None
+        if iterate:
+            sort = "{} asc".format(self._source_field(M.SUBJECT))
+        rows = self._rows(self._compact_fields(), page_size=page_size, sort=sort, iterate=iterate)
+        if not iterate:
+            yield from self.translate_rows_compact(rows, slim=self.slim, map_identifiers=self.map_identifiers)
+            return
+
+        # rows are translated in batches, split between subjects, so that they are
+        # not all held in memory
+        batch = []
+        batch_size = page_size if page_size is not None else max(self.rows, 1)
+        last_subject = None
+        for row in rows:
+            if len(batch) >= batch_size and row[0] != last_subject:
+                yield from self.translate_rows_compact(batch, slim=self.slim, map_identifiers=self.map_identifiers)
+                batch = []
+            batch.append(row)
+            last_subject = row[0]
+        yield from self.translate_rows_compact(batch, slim=self.slim, map_identifiers=self.map_identifiers)
+
     def infer_category(self, id):
         """
         heuristic to infer a category from an id, e.g. DOID:nnn --> disease
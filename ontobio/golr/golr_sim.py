@@ -5,6 +5,7 @@ Quick similarity calculations
 """
 
 from ontobio.golr.golr_associations import search_associations, GolrFields
+from ontobio.golr.golr_query import submit_subquery
 import scipy.stats # TODO - move
 import scipy as sp # TODO - move
 
@@ -27,12 +28,10 @@ def subject_pair_overlap(subject1, subject2, object_category=None, **kwargs):
     """
     Jaccard similarity
     """
-    set1 = get_object_closure(subject1,
-                              object_category=object_category,
-                              **kwargs)
-    set2 = get_object_closure(subject2,
-                              object_category=object_category,
-                              **kwargs)
+    f1 = submit_subquery(get_object_closure, subject1, object_category=object_category, **kwargs)
+    f2 = submit_subquery(get_object_closure, subject2, object_category=object_category, **kwargs)
+    set1 = f1.result()
+    set2 = f2.result()
     return len(set1.intersection(set2)), len(set1.union(set2))
 
 def subject_pair_simj(subject1, subject2, **kwargs):
@@ -9,6 +9,7 @@ The most efficient strategy may be to pre-load associations and compute in-memor
 """
 
 from ontobio.golr.golr_associations import search_associations, GolrFields
+from ontobio.golr.golr_query import submit_subquery
 import scipy.stats # TODO - move
 import scipy as sp # TODO - move
 
@@ -75,6 +76,14 @@ def find_enriched(sample_entities=None,
     if sample_entities is None:
         sample_entites = []
 
+    # with a given background, its counts can be fetched alongside the sample counts
+    bg_future = None
+    if background_entities is not None:
+        bg_future = submit_subquery(get_counts,
+                                    entities=background_entities,
+                                    object_category=object_category,
+                                    **kwargs)
+
     (sample_counts, sample_results) = get_counts(entities=sample_entities,
                                                  object_category=object_category,
                                                  min_count=2,
@@ -95,9 +104,12 @@ def find_enriched(sample_entities=None,
         background_entities = get_background(objects, taxon, object_category)
 
     # TODO: consider caching
-    (bg_counts,_) = get_counts(entities=background_entities,
-                               object_category=object_category,
-                               **kwargs)
+    if bg_future is not None:
+        (bg_counts,_) = bg_future.result()
+    else:
+        (bg_counts,_) = get_counts(entities=background_entities,
+                                   object_category=object_category,
+                                   **kwargs)
 
     sample_n = len(sample_entities) # TODO - annotated only?
     pop_n = len(background_entities)
@@ -15,18 +15,22 @@ from contextlib import closing
 import subprocess
 import logging
 import io
+import copy
 import gzip
 import datetime
+import json
+import multiprocessing
 import dateutil.parser
 
 from dataclasses import dataclass
 
-from collections import namedtuple, defaultdict
+from collections import namedtuple, defaultdict, deque
 from typing import Callable, ClassVar, Collection, Iterable, Optional, List, Dict, Set, TypeVar, Union, Any
 
 from ontobio import ontol
 from ontobio import ecomap
 from ontobio.io import parsereport
+from ontobio.io.parseprofile import ParseProfile
 from ontobio.util.user_agent import get_user_agent
 from ontobio.model import association
 from ontobio.rdfgen import relations
@@ -222,7 +226,7 @@ class AssocParserConfig():
                  class_idspaces=None,
                  entity_idspaces=None,
                  group_idspace=None,
-                 ecomap=ecomap.EcoMap(),
+                 ecomap=ecomap.get_ecomap(),
                  exclude_relations=None,
                  include_relations=None,
                  filter_out_evidence=None,
@@ -241,7 +245,9 @@ class AssocParserConfig():
                  extensions_constraints=None,
                  rule_contexts=[],
                  rule_set=None,
-                 allow_unmapped_eco=False):
+                 allow_unmapped_eco=False,
+                 profile=False,
+                 report_max_examples=None):
 
         self.remove_double_prefixes=remove_double_prefixes
         self.ontology=ontology
@@ -278,6 +284,10 @@ class AssocParserConfig():
         else:
             self.rule_set = RuleSet(rule_set)
         self.allow_unmapped_eco = allow_unmapped_eco
+        # If True, reports include timings of parse stages and GO rules, see `ParseProfile`
+        self.profile = profile
+        # If set, reports count messages and keep at most this many examples per rule, see `parsereport.AggregatedReport`
+        self.report_max_examples = report_max_examples
 
 
         # This is a dictionary from ruleid: `gorule-0000001` to title strings
@@ -360,11 +370,17 @@ class Report(object):
         self.n_lines = 0
         self.n_assocs = 0
         self.skipped = 0
-        self.reporter = parsereport.Report(group, dataset)
         if config is None:
             config = AssocParserConfig()
         self.config = config
+        max_examples = getattr(config, "report_max_examples", None)
+        if max_examples is not None:
+            # messages are only counted and sampled, and not kept in self.messages
+            self.reporter = parsereport.AggregatedReport(group, dataset, max_examples=max_examples)
+        else:
+            self.reporter = parsereport.Report(group, dataset)
         self.header = []
+        self.profile = ParseProfile() if getattr(config, "profile", False) else None
 
     def error(self, line, type, obj, msg="", taxon: str = "", rule=None):
         self.message(self.ERROR, line, type, obj, msg, taxon=taxon, rule=rule)
@@ -373,20 +389,28 @@ class Report(object):
         self.message(self.WARNING, line, type, obj, msg, taxon=taxon, rule=rule)
 
     def message(self, level, line, type, obj, msg="", taxon: str = "", rule=None, dont_record=["INFO"]):
-        message = {
-            'level': level,
-            'line': line,
-            'type': type,
-            'message': msg,
-            'obj': obj,
-            'taxon': taxon,
-            'rule': rule
-        }
-        if not level in dont_record:
-            # Only record a message if we want that
-            self.messages.append(message)
-
-        self.reporter.message(message, rule)
+        if self.profile is not None:
+            self.profile.start("report_messaging")
+        if level == self.INFO and level in dont_record:
+            # Neither recorded here nor by the reporter, e.g. passing GO rules
+            self.reporter.checked(rule)
+        else:
+            message = {
+                'level': level,
+                'line': line,
+                'type': type,
+                'message': msg,
+                'obj': obj,
+                'taxon': taxon,
+                'rule': rule
+            }
+            if not level in dont_record and not isinstance(self.reporter, parsereport.AggregatedReport):
+                # Only record a message if we want that
+                self.messages.append(message)
+
+            self.reporter.message(message, rule)
+        if self.profile is not None:
+            self.profile.stop()
 
     def add_associations(self, associations):
         for a in associations:
@@ -404,6 +428,22 @@ class Report(object):
         # if 'taxon' in association['subject']:
         #     self.taxa.add(association['subject']['taxon']['id'])
 
+    def merge(self, other):
+        """
+        Add the messages and counts of another Report to this one
+
+        Used to combine reports from consecutive shards of a file; merging
+        shards in file order gives the same result as a single Report
+        """
+        self.messages += other.messages
+        self.n_lines += other.n_lines
+        self.n_assocs += other.n_assocs
+        self.skipped += other.skipped
+        self.header += other.header
+        self.reporter.merge(other.reporter)
+        if self.profile is not None and other.profile is not None:
+            self.profile.merge(other.profile)
+
     def report_parsed_result(self, result, output_file, evidence_filtered_file, evidence_to_filter):
 
         self.n_lines += 1
@@ -423,7 +463,10 @@ class Report(object):
         Generate a summary in json format
         """
 
-        return self.reporter.json(self.n_lines, self.n_assocs, self.skipped)
+        result = self.reporter.json(self.n_lines, self.n_assocs, self.skipped)
+        if self.profile is not None:
+            result["profile"] = self.profile.json()
+        return result
     
     def sort_messages(self, r, messages):
         if len(messages) > 0:
@@ -434,58 +477,133 @@ class Report(object):
             messages.sort(key=lambda x: x.get('level'))
 
 
+    def write_report_json(self, out, indent=4, report_json=None):
+        """
+        Write the json summary (see `to_report_json`) to a file handle.
+        report_json is the summary, if already computed
+        """
+        if report_json is None:
+            report_json = self.to_report_json()
+        json.dump(report_json, out, indent=indent)
+
+    def _suppressed(self, rule):
+        # For each tag we say to suppress output for, check if it matches any tag in the rule
+        return self.config.rule_metadata and any([tag in self.config.rule_metadata.get(rule, {}).get("tags", [])
+                                                  for tag in self.config.suppress_rule_reporting_tags])
+
     def to_markdown(self):
         """
         Generate a summary in markdown format
         """
-        json = self.to_report_json()
-        # summary = json['summary']
-
-        s = "# Group: {group} - Dataset: {dataset}\n".format(group=json["group"], dataset=json["dataset"])
-        s += "\n## SUMMARY\n\n"
-        s += "This report generated on {}\n\n".format(datetime.date.today())
-        s += "  * Associations: {}\n" . format(json["associations"])
-        s += "  * Lines in file (incl headers): {}\n" . format(json["lines"])
-        s += "  * Lines skipped: {}\n" . format(json["skipped_lines"])
+        out = io.StringIO()
+        self.write_markdown(out)
+        return out.getvalue()
+
+    def write_markdown(self, out, report_json=None):
+        """
+        Write a summary in markdown format to a file handle, one section at a time.
+        report_json is the json summary (see `to_report_json`), if already computed
+        """
+        json = self.to_report_json() if report_json is None else report_json
+
+        out.write("# Group: {group} - Dataset: {dataset}\n".format(group=json["group"], dataset=json["dataset"]))
+        out.write("\n## SUMMARY\n\n")
+        out.write("This report generated on {}\n\n".format(datetime.date.today()))
+        out.write("  * Associations: {}\n" . format(json["associations"]))
+        out.write("  * Lines in file (incl headers): {}\n" . format(json["lines"]))
+        out.write("  * Lines skipped: {}\n" . format(json["skipped_lines"]))
         # Header from GAF
-        s += "## Header From Original Association File\n\n"
-        s += "\n".join(["> {}  ".format(head) for head in self.header])
+        out.write("## Header From Original Association File\n\n")
+        out.write("\n".join(["> {}  ".format(head) for head in self.header]))
         ## Table of Contents
-        s += "\n\n## Contents\n\n"
-        for rule, messages in sorted(json["messages"].items(), key=lambda t: t[0]):
-            any_suppress_tag_in_rule_metadata = any([tag in self.config.rule_metadata.get(rule, {}).get("tags", []) for tag in self.config.suppress_rule_reporting_tags])
-            # For each tag we say to suppress output for, check if it matches any tag in the rule. If any matches
-            if self.config.rule_metadata and any_suppress_tag_in_rule_metadata:
+        out.write("\n\n## Contents\n\n")
+        rules = sorted(json["messages"].keys())
+        for rule in rules:
+            if self._suppressed(rule):
                 print("Skipping {rule_num} because the tag(s) '{tag}' are suppressed".format(rule_num=rule, tag=", ".join(self.config.suppress_rule_reporting_tags)))
                 continue
 
-            s += "[{rule}](#{rule})\n\n".format(rule=rule)
-
-        s += "\n## MESSAGES\n\n"
-        for (rule, messages) in sorted(json["messages"].items(), key=lambda t: t[0]):
-            any_suppress_tag_in_rule_metadata = any([tag in self.config.rule_metadata.get(rule, {}).get("tags", []) for tag in self.config.suppress_rule_reporting_tags])
+            out.write("[{rule}](#{rule})\n\n".format(rule=rule))
 
-            # Skip if the rule metadata has "silent" as a tag
-            if self.config.rule_metadata and any_suppress_tag_in_rule_metadata:
-                # If there is a rule metadata, and the rule ID is in the config,
-                # get the list of tags if present and check for existence of "silent".
-                # If contained, continue to the next rule.
+        out.write("\n## MESSAGES\n\n")
+        for rule in rules:
+            # Skip if the rule metadata has a suppressed tag, e.g. "silent"
+            if self._suppressed(rule):
                 continue
 
-
-            s += "### {rule}\n\n".format(rule=rule)
+            messages = json["messages"][rule]
+            out.write("### {rule}\n\n".format(rule=rule))
             if rule != "other" and self.config.rule_metadata:
-                s += "{title}\n\n".format(title=self.config.rule_metadata.get(rule, {}).get("title", ""))
-            s += "* total: {amount}\n".format(amount=len(messages))
+                out.write("{title}\n\n".format(title=self.config.rule_metadata.get(rule, {}).get("title", "")))
+            total = self.reporter.message_count(rule)
+            if total > len(messages):
+                # only a sample of the messages was kept
+                out.write("* total: {amount} (showing {shown})\n".format(amount=total, shown=len(messages)))
+                for (level, type, n) in self.reporter.message_counts(rule):
+                    out.write("  * {level} - {type}: {n}\n".format(level=level, type=type, n=n))
+            else:
+                out.write("* total: {amount}\n".format(amount=len(messages)))
             if len(messages) > 0:
-                s += "#### Messages\n"
-                
-            self.sort_messages(rule, messages)    
+                out.write("#### Messages\n")
+
+            self.sort_messages(rule, messages)
             for message in messages:
                 obj = " ({})".format(message["obj"]) if message["obj"] else ""
-                s += "* {level} - {type}: {message}{obj} -- `{line}`\n".format(level=message["level"], type=message["type"], message=message["message"], line=message["line"], obj=obj)
+                out.write("* {level} - {type}: {message}{obj} -- `{line}`\n".format(level=message["level"], type=message["type"], message=message["message"], line=message["line"], obj=obj))
+
+DEFAULT_SHARD_SIZE = 5000
+
+# Parser method name -> profile stage name; time not spent in another stage is counted for parse_line
+PROFILED_STAGES = {
+    "parse_line": "parse_line",
+    "_validate_id": "id_validation",
+    "validate_curie_ids": "id_validation",
+    "_validate_symbol": "id_validation",
+    "_validate_ontology_class_id": "obsolete_repair",
+    "_unroll_withfrom_and_replair_obsoletes": "withfrom_unrolling",
+    "_repair_extensions": "extension_repair",
+    "_validate_taxon": "taxon_check",
+    "_taxon_id": "taxon_check",
+}
+
+# Parser used by worker processes; set in the parent before forking
+_shard_parser = None
+
+
+def _shards(file, shard_size):
+    shard = []
+    for line in file:
+        shard.append(line)
+        if len(shard) == shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+def _parse_shard(lines):
+    """
+    Parse and validate a shard of lines in a worker process
+
+    Returns the associations, a Report for the shard, and the text to write
+    to the filtered evidence file
+    """
+    parser = _shard_parser
+    config = parser.report.config
+    report = Report(group=parser.report.reporter.group, dataset=parser.report.reporter.dataset, config=config)
+    parser._set_report(report)
+    filtered = io.StringIO() if parser.config.filtered_evidence_file else None
+    associations = []
+    for line in lines:
+        parsed_result = parser.parse_line(line)
+        report.report_parsed_result(parsed_result, None, filtered, parser.config.filter_out_evidence)
+        associations += parsed_result.associations
+    # The config (and its ontology) is not sent back to the parent. The report stays the
+    # parser's report, whose config is used for the next shard, so send a copy
+    report = copy.copy(report)
+    report.config = None
+    return associations, report, filtered.getvalue() if filtered else None
 
-        return s
 
 @dataclass
 class ParseResult:
@@ -528,25 +646,111 @@ class AssocParser(object):
         a = list(associations)
         return a
 
-    def association_generator(self, file, skipheader=False, outfile=None) -> Dict:
+    def association_generator(self, file, skipheader=False, outfile=None, workers=1, shard_size=DEFAULT_SHARD_SIZE) -> Dict:
         """
         Returns a generator that yields successive associations from file
 
+        Arguments
+        ---------
+        workers : int
+            If greater than 1, lines are parsed and validated in this many
+            worker processes, each handling consecutive shards of the file.
+            Associations, report messages and the filtered evidence file are
+            produced in the same order as with a single process. Requires
+            the 'fork' start method; otherwise lines are parsed serially
+        shard_size : int
+            Number of lines in each shard sent to a worker
+
         Yields
         ------
         association
         """
         file = self._ensure_file(file)
+        if self.config.profile:
+            self._profile_stages()
+        if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+            associations = self._parallel_association_generator(file, workers, shard_size)
+        else:
+            if workers > 1:
+                logger.warning("Parallel parsing requires the fork start method; parsing serially")
+            associations = self._serial_association_generator(file, outfile=outfile)
+
+        for association in associations:
+            # yield association if we don't care if it's a header or if it's definitely a real gaf line
+            if not skipheader or not isinstance(association, dict):
+                yield association
+
+        logger.info(self.report.short_summary())
+        file.close()
+
+    def _serial_association_generator(self, file, outfile=None):
         for line in file:
             parsed_result = self.parse_line(line)
             self.report.report_parsed_result(parsed_result, outfile, self.config.filtered_evidence_file, self.config.filter_out_evidence)
-            for association in parsed_result.associations:
-                # yield association if we don't care if it's a header or if it's definitely a real gaf line
-                if not skipheader or not isinstance(association, dict):
-                    yield association
+            yield from parsed_result.associations
 
-        logger.info(self.report.short_summary())
-        file.close()
+    def _parallel_association_generator(self, file, workers, shard_size):
+        global _shard_parser
+        # The header and first annotation line are parsed here, so that state set from the
+        # header (e.g. the format version) and lazily computed rule closures are established
+        # before the workers are forked, and shared with them copy-on-write
+        for line in file:
+            parsed_result = self.parse_line(line)
+            self.report.report_parsed_result(parsed_result, None, self.config.filtered_evidence_file, self.config.filter_out_evidence)
+            yield from parsed_result.associations
+            if not self.is_header(line):
+                break
+
+        _shard_parser = self
+        try:
+            with multiprocessing.get_context("fork").Pool(workers) as pool:
+                # Bound the number of shards in flight, so the file is read as results are consumed
+                pending = deque()
+                for shard in _shards(file, shard_size):
+                    pending.append(pool.apply_async(_parse_shard, (shard,)))
+                    if len(pending) >= 2 * workers:
+                        yield from self._merge_shard(pending.popleft().get())
+                while pending:
+                    yield from self._merge_shard(pending.popleft().get())
+        finally:
+            _shard_parser = None
+
+    def _merge_shard(self, shard_result):
+        (associations, report, filtered) = shard_result
+        self.report.merge(report)
+        write_to_file(self.config.filtered_evidence_file, filtered)
+        return associations
+
+    def _set_report(self, report):
+        """
+        Replace the Report that parsed lines are recorded in
+        """
+        self.report = report
+
+    def _profile_stages(self):
+        """
+        Time the stages of `parse_line` into the profile of the current report
+
+        The parser's stage methods are wrapped on this instance, so parsers
+        that are not profiled are unaffected.
+        """
+        if getattr(self, "_profiled_stages", False):
+            return
+        for (name, stage) in PROFILED_STAGES.items():
+            setattr(self, name, self._profiled(stage, getattr(self, name)))
+        self._profiled_stages = True
+
+    def _profiled(self, stage, fn):
+        def profiled_fn(*args, **kwargs):
+            profile = self.report.profile
+            if profile is None:
+                return fn(*args, **kwargs)
+            profile.start(stage)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.stop()
+        return profiled_fn
 
     def generate_associations(self, line, outfile=None):
         associations = self.association_generator(line, outfile=outfile)
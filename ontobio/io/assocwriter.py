@@ -129,7 +129,7 @@ class GpadWriter(AssocWriter):
 
         self._write("!generated-by: {}\n".format("GOC"))
         self._write("!date-generated: {}\n".format(str(datetime.datetime.now().strftime("%Y-%m-%dT%H:%M"))))
-        self.ecomap = ecomap.EcoMap()
+        self.ecomap = ecomap.get_ecomap()
 
     def as_tsv(self, assoc: Union[association.GoAssociation, dict]):
         """
@@ -7,10 +7,18 @@ from ontobio.io import qc
 from ontobio.io.assocparser import Report
 from ontobio.model.association import GoAssociation
 from ontobio.model import collections
-from typing import List
+from typing import Dict, List
 import warnings
-from pandas.core.common import SettingWithCopyWarning
-warnings.simplefilter(action="ignore", category=SettingWithCopyWarning)
+try:
+    from pandas.errors import SettingWithCopyWarning
+except ImportError:
+    try:
+        from pandas.core.common import SettingWithCopyWarning
+    except ImportError:
+        # removed with copy on write in pandas 3
+        SettingWithCopyWarning = None
+if SettingWithCopyWarning is not None:
+    warnings.simplefilter(action="ignore", category=SettingWithCopyWarning)
 
 
 @click.command()
@@ -280,76 +288,61 @@ def get_parser(file1, file2) -> (str, str, List[GoAssociation], List[GoAssociati
     return df_file1, df_file2, assocs1, assocs2
 
 
+def read_csv_columns(filename, names, columns) -> pd:
+    """
+    Read only `columns` of a tab separated association file as strings
+    """
+    df = pd.read_csv(filename,
+                     comment='!',
+                     sep='\t',
+                     header=None,
+                     na_filter=False,
+                     names=names,
+                     usecols=columns,
+                     dtype={column: str for column in columns})
+    return df[columns]
+
+
+def eco_class_to_code_map() -> Dict[str, str]:
+    """
+    Map each ECO class of the GAF to ECO mappings to its GAF evidence code
+    """
+    ecomapping = ecomap.get_ecomap()
+    return {cls: ecomapping.ecoclass_to_coderef(cls)[0] for (code, ref, cls) in ecomapping.mappings()}
+
+
+def normalize_evidence_codes(evidence_codes: pd.Series, eco_codes: Dict[str, str]) -> pd.Series:
+    """
+    Replace ECO classes with their GAF evidence codes, leaving other values as they are
+    """
+    return evidence_codes.map(eco_codes).fillna(evidence_codes)
+
+
 def read_gaf_csv(filename, version) -> pd:
-    ecomapping = ecomap.EcoMap()
-    data_frame = pd.read_csv(filename,
-                             comment='!',
-                             sep='\t',
-                             header=None,
-                             na_filter=False,
-                             names=["DB",
-                                    "DB_Object_ID",
-                                    "DB_Object_Symbol",
-                                    "Qualifier",
-                                    "GO_ID",
-                                    "DB_Reference",
-                                    "Evidence_code",
-                                    "With_or_From",
-                                    "Aspect",
-                                    "DB_Object_Name",
-                                    "DB_Object_Synonym",
-                                    "DB_Object_Type,"
-                                    "Taxon",
-                                    "Date",
-                                    "Assigned_By",
-                                    "Annotation_Extension",
-                                    "Gene_Product_Form_ID"]).fillna("")
-    new_df = data_frame.filter(['DB_Object_ID', 'Qualifier', 'GO_ID', 'Evidence_code', 'DB_Reference'], axis=1)
-    for eco_code in ecomapping.mappings():
-        for ev in new_df['Evidence_code']:
-            if eco_code[2] == ev:
-                new_df['Evidence_code'] = new_df['Evidence_code'].replace([eco_code[2]],
-                                                                              ecomapping.ecoclass_to_coderef(
-                                                                                  eco_code[2])[0])
+    eco_codes = eco_class_to_code_map()
+    columns = ['DB_Object_ID', 'Qualifier', 'GO_ID', 'Evidence_code', 'DB_Reference']
+    new_df = read_csv_columns(filename, gaf_format, columns)
+    new_df['Evidence_code'] = normalize_evidence_codes(new_df['Evidence_code'], eco_codes)
     return new_df
 
 
 def read_gpad_csv(filename, version) -> pd:
-    if version.startswith("1"):
-        data_frame = pd.read_csv(filename,
-                                 comment='!',
-                                 sep='\t',
-                                 header=None,
-                                 na_filter=False,
-                                 names=gpad_1_2_format).fillna("")
-        df = data_frame.filter(['db', 'subject', 'qualifiers', 'relation', 'object', 'evidence_code', 'reference'], axis=1)
-        concat_column = df['db'] + ":" + df['subject']
-        df['concat_column'] = concat_column
-        filtered_df = df.filter(['concat_column', 'qualifiers', 'relation', 'object', 'evidence_code', 'reference'])
-        filtered_df.rename(columns={'concat_column': 'subject'}, inplace=True)
-        new_df = filtered_df
-    else:
-        data_frame = pd.read_csv(filename,
-                                 comment='!',
-                                 sep='\t',
-                                 header=None,
-                                 na_filter=False,
-                                 names=gpad_2_0_format).fillna("")
-        new_df = data_frame.filter(['subject', 'negation', 'relation', 'object', 'evidence_code', 'reference'], axis=1)
-    ecomapping = ecomap.EcoMap()
-    for eco_code in ecomapping.mappings():
-        for ev in new_df['evidence_code']:
-            if eco_code[2] == ev:
-                new_df['evidence_code'] = new_df['evidence_code'].replace([eco_code[2]],
-                                                                          ecomapping.ecoclass_to_coderef(eco_code[2])[0])
-
+    eco_codes = eco_class_to_code_map()
     # normalize ids
     config = assocparser.AssocParserConfig()
     config.remove_double_prefixes = True
     parser = gpadparser.GpadParser(config=config)
-    for i, r in enumerate(new_df['subject']):
-        r1 = parser._normalize_id(r)
-        new_df.at[i, 'subject'] = r1
+
+    if version.startswith("1"):
+        columns = ['subject', 'qualifiers', 'object', 'evidence_code', 'reference']
+        new_df = read_csv_columns(filename, gpad_1_2_format, ['db'] + columns)
+        new_df['subject'] = new_df['db'] + ":" + new_df['subject']
+        new_df = new_df[columns].copy()
+    else:
+        columns = ['subject', 'relation', 'object', 'evidence_code', 'reference']
+        new_df = read_csv_columns(filename, gpad_2_0_format, columns)
+    new_df['evidence_code'] = normalize_evidence_codes(new_df['evidence_code'], eco_codes)
+    new_df['subject'] = new_df['subject'].map(parser._normalize_id)
 
     return new_df
 
@@ -9,6 +9,7 @@ from prefixcommons import curie_util
 
 from ontobio.model import association
 from ontobio.rdfgen import relations
+from ontobio.util.curie_contractor import expand_uri
 
 import functools
 import logging
@@ -137,9 +138,9 @@ def make_conjunctions(extension: List) -> association.ConjunctiveSet:
 relation_tuple = re.compile(r"(.+)\((.+)\)")
 def make_keys_from_gaf(gaf: association.GoAssociation) -> List[AnnotationKey]:
 
-    term = curie_util.expand_uri(str(gaf.object.id), cmaps=[prefix_context])
-    relation = curie_util.expand_uri(str(gaf.relation), cmaps=[prefix_context])
-    taxon = curie_util.expand_uri(str(gaf.object.taxon), cmaps=[prefix_context])
+    term = expand_uri(str(gaf.object.id), cmaps=[prefix_context])
+    relation = expand_uri(str(gaf.relation), cmaps=[prefix_context])
+    taxon = expand_uri(str(gaf.object.taxon), cmaps=[prefix_context])
     extensions = gaf.object_extensions # type: List[association.ConjunctiveSet]
 
     annotation_keys = []  # type: List[AnnotationKey]
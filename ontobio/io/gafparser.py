@@ -15,7 +15,7 @@ from ontobio.io import entityparser
 from ontobio.io import entitywriter
 from ontobio.model import association
 from ontobio.model import collections
-from ontobio.ecomap import EcoMap
+from ontobio.ecomap import get_ecomap
 from ontobio.rdfgen import relations
 from ontobio.ontol import Ontology
 
@@ -248,7 +248,7 @@ class GafParser(assocparser.AssocParser):
 
         ## Run GO Rules, save split values into individual variables
         # print("Config is {}".format(self.config.__dict__.keys()))
-        go_rule_results = qc.test_go_rules(assoc, self.config, group=self.group)
+        go_rule_results = qc.test_go_rules(assoc, self.config, group=self.group, profile=self.report.profile)
         for rule, result in go_rule_results.all_results.items():
             if result.result_type == qc.ResultType.WARNING:
                 self.report.warning(line, assocparser.Report.VIOLATES_GO_RULE, "",
@@ -358,7 +358,7 @@ class GafParser(assocparser.AssocParser):
                             taxon=str(assoc.subject.taxon), rule=59)
         return assoc
 
-ecomap = EcoMap()
+ecomap = get_ecomap()
 ecomap.mappings()
 
 
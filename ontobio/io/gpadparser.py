@@ -186,7 +186,7 @@ class GpadParser(assocparser.AssocParser):
             return assocparser.ParseResult(line, [], True)
         assoc.object.id = association.Curie.from_str(valid_goid)
 
-        go_rule_results = qc.test_go_rules(assoc, self.config)
+        go_rule_results = qc.test_go_rules(assoc, self.config, profile=self.report.profile)
         for rule, result in go_rule_results.all_results.items():
             if isinstance(rule, qc.GoRule28):
                 # ignore result of GORULE:0000028 since aspect check will always fail for GPAD and get repaired
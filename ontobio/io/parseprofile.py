@@ -0,0 +1,68 @@
+import time
+
+from typing import Dict, List
+
+
+class ParseProfile(object):
+    """
+    Cumulative timings for the stages of parsing and validating association lines,
+    and per GO rule call counts, timings and outcomes.
+
+    Rules are only counted when their test is called: rules a `qc.GoRulePlan` passes without
+    calling (see `qc.GoRule.dispatch`) have no calls and no outcomes.
+
+    Stage times are exclusive: time spent in a stage nested inside another
+    (e.g. report messaging during ID validation) is only counted for the inner stage.
+    """
+
+    RULE_OUTCOMES = ["pass", "warning", "error", "repaired"]
+
+    def __init__(self):
+        self.stages = {}  # type: Dict[str, List] # stage --> [calls, seconds]
+        self.rules = {}  # type: Dict[str, Dict] # rule id --> counts and seconds
+        self._stack = []
+
+    def start(self, stage: str) -> None:
+        self._stack.append([stage, time.perf_counter(), 0.0])
+
+    def stop(self) -> None:
+        (stage, start, nested) = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        totals = self.stages.setdefault(stage, [0, 0.0])
+        totals[0] += 1
+        totals[1] += elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def _rule(self, rule_id: str) -> Dict:
+        counts = self.rules.get(rule_id)
+        if counts is None:
+            counts = {"calls": 0, "time": 0.0}
+            for outcome in self.RULE_OUTCOMES:
+                counts[outcome] = 0
+            self.rules[rule_id] = counts
+        return counts
+
+    def rule_call(self, rule_id: str, seconds: float) -> None:
+        counts = self._rule(rule_id)
+        counts["calls"] += 1
+        counts["time"] += seconds
+
+    def rule_outcome(self, rule_id: str, outcome: str) -> None:
+        self._rule(rule_id)[outcome] += 1
+
+    def merge(self, other: "ParseProfile") -> None:
+        for stage, (calls, seconds) in other.stages.items():
+            totals = self.stages.setdefault(stage, [0, 0.0])
+            totals[0] += calls
+            totals[1] += seconds
+        for rule_id, other_counts in other.rules.items():
+            counts = self._rule(rule_id)
+            for k, v in other_counts.items():
+                counts[k] += v
+
+    def json(self) -> Dict:
+        return {
+            "stages": {stage: {"calls": calls, "time": seconds} for stage, (calls, seconds) in sorted(self.stages.items())},
+            "rules": {rule_id: dict(counts) for rule_id, counts in sorted(self.rules.items())}
+        }
@@ -1,10 +1,13 @@
 import json
+import random
 
 import typing
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 Message = Dict[str, str]
 
+DEFAULT_MAX_EXAMPLES = 100
+
 class Report(object):
 
     def __init__(self, group, dataset):
@@ -38,6 +41,36 @@ class Report(object):
         if len(self.messages[rule_id]) < self._rule_message_cap and message["level"] != "INFO":
             self.messages[rule_id].append(message)
 
+    def checked(self, rule: Optional[int]) -> None:
+        """
+        Note that a rule was tested, without adding a message
+        """
+        self.messages.setdefault(self._rule_id(rule), [])
+
+    def message_count(self, rule_id: str) -> int:
+        """
+        Number of messages for a rule id, e.g. gorule-0000001
+        """
+        return len(self.messages.get(rule_id, []))
+
+    def message_counts(self, rule_id: str) -> List[Tuple[str, str, int]]:
+        """
+        (level, type, number of messages) for a rule id, most frequent first
+        """
+        counts = {}
+        for message in self.messages.get(rule_id, []):
+            key = (message["level"], message["type"])
+            counts[key] = counts.get(key, 0) + 1
+        return sorted([(level, type, n) for ((level, type), n) in counts.items()], key=lambda t: (-t[2], t[0], t[1]))
+
+    def merge(self, other: "Report") -> None:
+        """
+        Add the messages of another Report, keeping the per rule message cap
+        """
+        for rule_id, messages in other.messages.items():
+            existing = self.messages.setdefault(rule_id, [])
+            existing += messages[:max(0, self._rule_message_cap - len(existing))]
+
     def json(self, lines, associations, skipped) -> Dict:
         result = {
             "group": self.group,
@@ -48,3 +81,84 @@ class Report(object):
             "messages": self.messages
         }
         return result
+
+
+class AggregatedReport(Report):
+    """
+    Report that counts messages per (rule, level, type), keeping only a
+    bounded random sample of example messages for each rule.
+
+    Memory use does not grow with the number of messages, so this is suited
+    to validating large files with many problems. `messages` holds the
+    examples, and `json` adds the counts as "message_counts".
+    """
+
+    def __init__(self, group, dataset, max_examples=DEFAULT_MAX_EXAMPLES, seed=0):
+        """
+        Arguments
+        ---------
+        max_examples : int
+            maximum number of example messages kept per rule
+        seed : int
+            seed for sampling the examples
+        """
+        super().__init__(group, dataset)
+        self._rule_message_cap = max_examples
+        self.counts = {}  # type: Dict[Tuple[str, str, str], int] # (rule id, level, type) --> number of messages
+        self.seen = {}  # type: Dict[str, int] # rule id --> number of messages the examples were sampled from
+        self._random = random.Random(seed)
+
+    def message(self, message: Message, rule: Optional[int]) -> None:
+        rule_id = self._rule_id(rule)
+        examples = self.messages.setdefault(rule_id, [])
+        if message["level"] == "INFO":
+            return
+        key = (rule_id, message["level"], message["type"])
+        self.counts[key] = self.counts.get(key, 0) + 1
+        n = self.seen.get(rule_id, 0) + 1
+        self.seen[rule_id] = n
+        # reservoir sampling: each message is kept with probability cap/n
+        if len(examples) < self._rule_message_cap:
+            examples.append(message)
+        else:
+            k = self._random.randrange(n)
+            if k < self._rule_message_cap:
+                examples[k] = message
+
+    def message_count(self, rule_id: str) -> int:
+        return self.seen.get(rule_id, 0)
+
+    def message_counts(self, rule_id: str) -> List[Tuple[str, str, int]]:
+        counts = [(level, type, n) for ((r, level, type), n) in self.counts.items() if r == rule_id]
+        return sorted(counts, key=lambda t: (-t[2], t[0], t[1]))
+
+    def merge(self, other: "AggregatedReport") -> None:
+        """
+        Add the counts and examples of another AggregatedReport
+
+        Where the examples do not all fit, they are resampled, weighting each
+        example by the number of messages it was sampled from.
+        """
+        for (key, n) in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + n
+        for (rule_id, examples) in other.messages.items():
+            existing = self.messages.setdefault(rule_id, [])
+            n1 = self.seen.get(rule_id, 0)
+            n2 = other.seen.get(rule_id, 0)
+            self.seen[rule_id] = n1 + n2
+            if len(existing) + len(examples) <= self._rule_message_cap:
+                existing += examples
+                continue
+            weighted = [(n1 / len(existing), m) for m in existing] + [(n2 / len(examples), m) for m in examples]
+            # weighted sampling without replacement (Efraimidis-Spirakis), keeping the original order
+            keys = sorted(((self._random.random() ** (1 / w), i) for (i, (w, _)) in enumerate(weighted)), reverse=True)
+            chosen = sorted(i for (_, i) in keys[:self._rule_message_cap])
+            self.messages[rule_id] = [weighted[i][1] for i in chosen]
+
+    def json(self, lines, associations, skipped) -> Dict:
+        result = super().json(lines, associations, skipped)
+        result["message_counts"] = {
+            rule_id: [{"level": level, "type": type, "count": n} for (level, type, n) in self.message_counts(rule_id)]
+            for rule_id in sorted(self.messages.keys())
+        }
+        return result
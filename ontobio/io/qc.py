@@ -3,6 +3,7 @@ import enum
 import collections
 import datetime
 import copy
+import time
 import logging
 
 from dataclasses import dataclass
@@ -23,7 +24,7 @@ FailMode = enum.Enum("FailMode", {"SOFT": "soft", "HARD": "hard"})
 ResultType = enum.Enum("Result", {"PASS": "Pass", "WARNING": "Warning", "ERROR": "Error"})
 RepairState = enum.Enum("RepairState", {"OKAY": "Okay", "REPAIRED": "Repaired", "FAILED": "Failed"})
 
-ecomapping = ecomap.EcoMap()
+ecomapping = ecomap.get_ecomap()
 iea_eco = ecomapping.coderef_to_ecoclass("IEA")
 ida_eco = ecomapping.coderef_to_ecoclass("IDA")
 ipi_eco = ecomapping.coderef_to_ecoclass("IPI")
@@ -142,6 +143,26 @@ class GoRule(object):
         result.result = annotation
         return result
 
+    def prepare(self, config: assocparser.AssocParserConfig):
+        """
+        Eagerly compute anything the rule would otherwise compute lazily in `test`, for config.
+
+        Called when a :class:`GoRulePlan` is compiled. Rules that cache ontology closures override this.
+        """
+        pass
+
+    def dispatch(self, config: assocparser.AssocParserConfig) -> Optional[Tuple[Optional[Set[str]], Optional[Set[str]]]]:
+        """
+        Describe which annotations this rule can fail or repair under config, after `prepare`.
+
+        Returns:
+            None if the rule passes every annotation under config. Otherwise a pair of
+            (evidence ECO classes, GO term ids) the rule can fail on; either is None if
+            the rule can fail on any value. A :class:`GoRulePlan` passes annotations
+            outside these sets without calling `test`.
+        """
+        return (None, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         """
         Subclasses should override this function to implement the logic of the rule.
@@ -184,6 +205,9 @@ class GoRule02(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000002", "No 'NOT' annotations to 'binding ; GO:0005488' or 'protein binding ; GO:0005515'", FailMode.HARD)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return (None, {"GO:0005488", "GO:0005515"})
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         annotation_obj_id = str(annotation.object.id)
         fails = ((annotation_obj_id == "GO:0005488" or annotation_obj_id == "GO:0005515") and annotation.negated)
@@ -194,6 +218,9 @@ class GoRule05(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000005", "IEA, ISS, ISO, ISM, ISA, IBA, RCA annotations ae not allowed for direct annotations to 'binding ; GO:0005488' or 'protein binding ; GO:0005515'", FailMode.SOFT)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return ({iea_eco, iss_eco, iso_eco, ism_eco, isa_eco, iba_eco, rca_eco}, {"GO:0005488", "GO:0005515"})
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         evidence = str(annotation.evidence.type)
         annotation_obj_id = str(annotation.object.id)
@@ -205,6 +232,11 @@ class GoRule06(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000006", "IEP and HEP usage is restricted to terms from the Biological Process ontology", FailMode.HARD)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.ontology is None:
+            return None
+        return ({iep_eco, hep_eco}, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         if config.ontology is None:
             return self._result(True)
@@ -214,8 +246,7 @@ class GoRule06(GoRule):
         #Annotations with code IEP and HEP assigned by GOC are not restricted to Biological Process terms
         if evidence in [iep_eco, hep_eco] and assigned_by == "GOC":
             return self._result(True)
-        go_namespace = [predval for predval in config.ontology.get_graph().nodes.get(str(annotation.object.id), {}).get("meta", {}).get("basicPropertyValues", []) if predval["pred"]=="OIO:hasOBONamespace"]
-        fails = evidence in [iep_eco, hep_eco] and "biological_process" not in [o["val"] for o in go_namespace]
+        fails = evidence in [iep_eco, hep_eco] and config.ontology.obo_namespace(str(annotation.object.id)) != "biological_process"
         return self._result(not fails)
 
 
@@ -225,6 +256,16 @@ class GoRule07(GoRule):
         super().__init__("GORULE:0000007", "IPI should not be used with catalytic activity molecular function terms", FailMode.SOFT)
         self.children_of_catalytic_activity = None
 
+    def prepare(self, config: assocparser.AssocParserConfig):
+        self.children_of_catalytic_activity = None
+        if config.ontology is not None:
+            self.children_of_catalytic_activity = set(config.ontology.descendants("GO:0003824", relations=["subClassOf"], reflexive=True))
+
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if self.children_of_catalytic_activity is None:
+            return None
+        return ({ipi_eco}, self.children_of_catalytic_activity)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         catalytic_activity = "GO:0003824"
         if config.ontology is not None and self.children_of_catalytic_activity is None:
@@ -249,6 +290,18 @@ class GoRule08(GoRule):
         self.do_not_annotate = None
         self.do_not_manually_annotate = None
 
+    def prepare(self, config: assocparser.AssocParserConfig):
+        self.do_not_annotate = None
+        self.do_not_manually_annotate = None
+        if config.ontology is not None:
+            self.do_not_annotate = set(config.ontology.extract_subset("gocheck_do_not_annotate"))
+            self.do_not_manually_annotate = set(config.ontology.extract_subset("gocheck_do_not_manually_annotate"))
+
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.ontology is None:
+            return None
+        return (None, self.do_not_annotate | self.do_not_manually_annotate)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         # Cache the subsets
         if config.ontology is None:
@@ -295,6 +348,11 @@ class GoRule13(GoRule):
         super().__init__("GORULE:0000013", "Taxon-appropriate annotation check", FailMode.HARD)
         self.non_experimental_evidence = self.get_non_experimental_evidence_eco()
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.annotation_inferences is None:
+            return None
+        return (None, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         if config.annotation_inferences is None:
             # Auto pass if we don't have inferences
@@ -334,6 +392,19 @@ class GoRule15(GoRule):
         super().__init__("GORULE:0000015", "Dual species taxon check", FailMode.SOFT)
         self.allowed_dual_species_terms = None
 
+    def prepare(self, config: assocparser.AssocParserConfig):
+        self.allowed_dual_species_terms = None
+        if config.ontology is not None:
+            interaction_terms = config.ontology.descendants("GO:0044419", relations=["subClassOf", "BFO:0000050"], reflexive=True)
+            interspecies_interactions_regulation = config.ontology.descendants("GO:0043903", relations=["subClassOf"], reflexive=True)
+            host_cellular_component = config.ontology.descendants("GO:0018995", relations=["subClassOf"], reflexive=True)
+            self.allowed_dual_species_terms = set(interaction_terms + interspecies_interactions_regulation + host_cellular_component)
+
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.ontology is None:
+            return None
+        return (None, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
 
         # Cache the allowed terms
@@ -368,6 +439,9 @@ class GoRule16(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000016", "All IC annotations should include a GO ID in the \"With/From\" column that is also different from the entry in the \"GO ID\" column", FailMode.SOFT)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return ({ic_eco}, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         evidence = str(annotation.evidence.type)
         withfrom = annotation.evidence.with_support_from
@@ -398,6 +472,9 @@ class GoRule17(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000017", "IDA annotations must not have a With/From entry", FailMode.SOFT)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return ({ida_eco}, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         evidence = str(annotation.evidence.type)
         withfrom = annotation.evidence.with_support_from
@@ -413,6 +490,9 @@ class GoRule18(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000018", "IPI annotations require a With/From entry", FailMode.SOFT)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return ({ipi_eco}, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         evidence = str(annotation.evidence.type)
         withfrom = annotation.evidence.with_support_from
@@ -427,6 +507,11 @@ class GoRule22(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000022", "Check for, and filter, annotations made to retracted publications", FailMode.HARD)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.retracted_pub_set is None:
+            return None
+        return (None, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         if config.retracted_pub_set is not None:
             references = annotation.evidence.has_supporting_reference
@@ -444,6 +529,11 @@ class GoRule26(GoRule):
         self.offending_evidence = ["IBA"]
         self.offending_evidence_eco = [ecomapping.coderef_to_ecoclass(ev) for ev in self.offending_evidence]
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.paint:
+            return None
+        return (set(self.offending_evidence_eco), None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         evidence = str(annotation.evidence.type)
         # If we see a bad evidence, and we're not in a paint file then fail.
@@ -460,6 +550,11 @@ class GoRule28(RepairRule):
             "molecular_function": "F"
         }
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.ontology is None:
+            return None
+        return (None, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         aspect = annotation.aspect
         goterm = str(annotation.object.id)
@@ -467,15 +562,11 @@ class GoRule28(RepairRule):
         if config.ontology is None:
             return TestResult(ResultType.PASS, self.title, annotation)
 
-        namespaces = [predval for predval in config.ontology.get_graph().nodes.get(goterm, {}).get("meta", {}).get("basicPropertyValues", []) if predval["pred"]=="OIO:hasOBONamespace"]
-        # the namespaces expression cascades through the json representation of this
-        # ontology using empty dict/list if the key is not present
-
-        if len(namespaces) == 0:
+        namespace = config.ontology.obo_namespace(goterm)
+        if namespace is None:
             # If this doesn't exist, then it's fine
             return TestResult(ResultType.PASS, self.title, annotation)
 
-        namespace = namespaces[0]["val"]
         expected_aspect = self.namespace_aspect_map[namespace]
 
         correct_aspect = expected_aspect == aspect
@@ -497,6 +588,9 @@ class GoRule29(GoRule):
         self.one_year = datetime.timedelta(days=365)
         self.three_years = datetime.timedelta(days=1095)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return ({iea_eco}, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         evidence = str(annotation.evidence.type)
         date = annotation.date
@@ -531,6 +625,11 @@ class GoRule30(GoRule):
         """
         return goref.lower().replace("_", "").replace(":", "-")
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.goref_metadata is None:
+            return None
+        return (None, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         references = annotation.evidence.has_supporting_reference
         for ref in references:
@@ -547,6 +646,9 @@ class GoRule37(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000037", "IBA annotations should ONLY be assigned_by GO_Central and have GO_REF:0000033 as a reference", FailMode.HARD)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return ({iba_eco}, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         # If the evidence code is IBA, then (1) the assigned_by field must be GO_Central and (2) the reference field must be PMID:21873635
         evidence = str(annotation.evidence.type)
@@ -566,6 +668,15 @@ class GoRule39(GoRule):
         super().__init__("GORULE:0000039", "Protein complexes can not be annotated to GO:0032991 (protein-containing complex) or its descendants", FailMode.HARD)
         self.protein_containing_complex_descendents = None
         
+    def prepare(self, config: assocparser.AssocParserConfig):
+        self.protein_containing_complex_descendents = None
+        self.make_protein_complex_descendents_if_not_present(config.ontology)
+
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.ontology is None:
+            return None
+        return (None, self.protein_containing_complex_descendents)
+
     def make_protein_complex_descendents_if_not_present(self, ontology: Optional[ontol.Ontology]) -> Set:
         if ontology is not None and self.protein_containing_complex_descendents is None:
             closure = gafparser.protein_complex_sublcass_closure(ontology)
@@ -595,6 +706,9 @@ class GoRule42(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000042", "Qualifier: IKR evidence code requires a NOT qualifier", FailMode.HARD)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return ({ikr_eco}, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         evidence = str(annotation.evidence.type)
 
@@ -616,6 +730,11 @@ class GoRule43(GoRule):
         """
         return goref.lower().replace("_", "").replace(":", "-")
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.goref_metadata is None:
+            return None
+        return (None, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         if config.goref_metadata is None:
             return self._result(True)
@@ -641,6 +760,19 @@ class GoRule46(GoRule):
         self.self_binding_roots = ["GO:0042803", "GO:0051260", "GO:0051289", "GO:0070207", "GO:0043621", "GO:0032840"]
         self.self_binding_terms = None
 
+    def prepare(self, config: assocparser.AssocParserConfig):
+        self.self_binding_terms = None
+        if config.ontology is not None:
+            all_terms = []
+            for binding_root in self.self_binding_roots:
+                all_terms += config.ontology.descendants(binding_root, relations=["subClassOf"], reflexive=True)
+            self.self_binding_terms = set(all_terms)
+        else:
+            self.self_binding_terms = self.self_binding_roots
+
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return (None, set(self.self_binding_terms))
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         if config.ontology is not None and self.self_binding_terms is None:
             all_terms = []
@@ -675,6 +807,9 @@ class GoRule50(GoRule):
         self.the_evidences = ["ISS", "ISA", "ISO"]
         self.the_evidences_eco = [ecomapping.coderef_to_ecoclass(ev) for ev in self.the_evidences]
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return (set(self.the_evidences_eco), None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         # should not have the same identifier in the 'gene product column' (column 2) and in the 'with/from' column
         # (column 8)
@@ -721,6 +856,11 @@ class GoRule58(RepairRule):
         super().__init__("GORULE:0000058", "Object extensions should conform to the extensions-patterns.yaml "
                                            "file in metadata", FailMode.HARD, tags=["context-import"])
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.extensions_constraints is None or config.ontology is None:
+            return None
+        return (None, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
 
         if config.extensions_constraints is None:
@@ -808,6 +948,19 @@ class GoRule61(RepairRule):
         self.allowed_cc_complex = set([association.Curie("BFO", "0000050")])
         self.allowed_cc_other = set([association.Curie("RO", "0001025"), association.Curie("RO", "0002432"), association.Curie("RO", "0002325")])
 
+    def prepare(self, config: assocparser.AssocParserConfig):
+        self.protein_containing_complex_descendents = None
+        self.cellular_anatomical_entity_subclass_closure = None
+        self.virion_component_subclass_closure = None
+        self.make_protein_complex_descendents_if_not_present(config.ontology)
+        self.make_cellular_anatomical_entity_descendents_if_not_present(config.ontology)
+        self.make_virion_component_descendents_if_not_present(config.ontology)
+
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.ontology is None:
+            return None
+        return (None, None)
+
     def make_protein_complex_descendents_if_not_present(self, ontology: Optional[ontol.Ontology]) -> Set:
         if ontology is not None and self.protein_containing_complex_descendents is None:
             closure = gafparser.protein_complex_sublcass_closure(ontology)
@@ -929,6 +1082,9 @@ class GoRule63(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000063", "Annotations using ISS/ISA/ISO evidence should refer to a gene product (in the 'with' column)", FailMode.SOFT)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        return ({iss_eco, isa_eco, iso_eco}, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         evidence = str(annotation.evidence.type)
         withfrom = annotation.evidence.with_support_from
@@ -944,6 +1100,11 @@ class GoRule64(GoRule):
     def __init__(self):
         super().__init__("GORULE:0000064", "TreeGrafter ('GO_REF:0000118') IEAs should be filtered for GO reference species", FailMode.HARD)
 
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.ref_species_metadata is None:
+            return None
+        return ({iea_eco}, None)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         references = [str(ref) for ref in annotation.evidence.has_supporting_reference]
         evidence = str(annotation.evidence.type)
@@ -961,6 +1122,16 @@ class GoRule65(GoRule):
         super().__init__("GORULE:0000065", "Annotations to term that are candidates for obsoletion should be removed", FailMode.SOFT)
         self.candidate_for_obsoletion = None
 
+    def prepare(self, config: assocparser.AssocParserConfig):
+        self.candidate_for_obsoletion = None
+        if config.ontology is not None:
+            self.candidate_for_obsoletion = set(config.ontology.extract_subset("gocheck_obsoletion_candidate"))
+
+    def dispatch(self, config: assocparser.AssocParserConfig):
+        if config.ontology is None:
+            return None
+        return (None, self.candidate_for_obsoletion)
+
     def test(self, annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> TestResult:
         # Cache the subsets
         if config.ontology is None:
@@ -1016,14 +1187,173 @@ GoRules = enum.Enum("GoRules", {
 GoRulesResults = collections.namedtuple("GoRulesResults", ["all_results", "annotation"])
 
 
-def test_go_rules(annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None) -> GoRulesResults:
-    all_results = {}
+class GoRulePlan(object):
+    """
+    The GoRules to run for an AssocParserConfig, compiled once and reused for every annotation.
+
+    Compiling a plan resolves which rules are active for the config's rule_set and rule_contexts,
+    eagerly computes the ontology closures rules depend on (see `GoRule.prepare`), and indexes
+    rules by the evidence codes and GO terms they can fail on (see `GoRule.dispatch`). Running
+    the plan on an annotation only calls `test` on rules that can fire; all other rules pass.
+    Results are the same as running every rule in turn.
 
-    active_annotation = annotation
-    for rule in list(GoRules):
-        result = rule.value.run_test(active_annotation, config, group=group)
-        # Accumulate all repairs performed  by all tests to the annotation
-        active_annotation = result.result
-        all_results[rule.value] = result
+    The plan keeps per rule call counts and cumulative time, see `rule_timings`.
+    """
 
-    return GoRulesResults(all_results, active_annotation)
+    def __init__(self, config: assocparser.AssocParserConfig, rules=None):
+        self.config = config
+        self.rules = [rule.value for rule in GoRules] if rules is None else rules
+        self.calls = [0] * len(self.rules)
+        self.elapsed = [0.0] * len(self.rules)
+        self.prepare()
+        # (index, rule, evidence codes, terms) for each rule that can fire under config, in rule order
+        self.steps = []
+        for k, rule in enumerate(self.rules):
+            if not self._is_active(rule):
+                continue
+            dispatch = rule.dispatch(config)
+            if dispatch is None:
+                continue
+            (evidence_codes, terms) = dispatch
+            self.steps.append((k, rule, evidence_codes, terms))
+        self._steps_by_evidence = {}
+
+    def _is_active(self, rule: GoRule) -> bool:
+        return self.config.rule_set.should_run_rule(rule.id.split(":")[1]) and rule._is_run_from_context(self.config)
+
+    def prepare(self):
+        """
+        Compute rule closures for this plan's config.
+
+        Rules are shared module level objects, so this is repeated if another plan has been prepared since.
+        """
+        global _prepared_plan
+        for rule in self.rules:
+            if self._is_active(rule):
+                rule.prepare(self.config)
+        _prepared_plan = self
+
+    def _steps_for_evidence(self, evidence: str):
+        steps = self._steps_by_evidence.get(evidence)
+        if steps is None:
+            steps = [(k, rule, terms) for (k, rule, evidence_codes, terms) in self.steps
+                     if evidence_codes is None or evidence in evidence_codes]
+            self._steps_by_evidence[evidence] = steps
+        return steps
+
+    def run(self, annotation: association.GoAssociation, group=None, profile=None) -> "GoRulesResults":
+        """
+        Run the plan's rules on annotation. If profile (a `parseprofile.ParseProfile`) is given,
+        rule calls, times and outcomes are also recorded there, for the rules whose `test` is called.
+        """
+        if _prepared_plan is not self:
+            self.prepare()
+
+        results = {}
+        active_annotation = annotation
+        evidence = str(annotation.evidence.type)
+        term = str(annotation.object.id)
+        for (k, rule, terms) in self._steps_for_evidence(evidence):
+            if terms is not None and term not in terms:
+                continue
+            start = time.perf_counter()
+            result = rule.test(active_annotation, self.config, group=group)
+            elapsed = time.perf_counter() - start
+            self.elapsed[k] += elapsed
+            self.calls[k] += 1
+            if profile is not None:
+                profile.rule_call(rule.id, elapsed)
+            results[rule] = result
+            if isinstance(rule, RepairRule):
+                if result.result is not active_annotation:
+                    # A repair may change the fields later rules are dispatched on
+                    active_annotation = result.result
+                    if str(active_annotation.evidence.type) != evidence or str(active_annotation.object.id) != term:
+                        return self._run_all_from(k, active_annotation, results, group, profile)
+            else:
+                result.result = active_annotation
+
+        return self._results(results, active_annotation, profile)
+
+    def _run_all_from(self, k, annotation, results, group, profile):
+        # Fall back to running each remaining active rule in turn
+        for rule in self.rules[k+1:]:
+            if self._is_active(rule):
+                start = time.perf_counter()
+                result = rule.run_test(annotation, self.config, group=group)
+                if profile is not None:
+                    profile.rule_call(rule.id, time.perf_counter() - start)
+                annotation = result.result
+                results[rule] = result
+        return self._results(results, annotation, profile)
+
+    def _results(self, results, annotation, profile):
+        if profile is not None:
+            # only rules whose test was called, so that outcomes add up to calls
+            for rule, result in results.items():
+                profile.rule_outcome(rule.id, _outcome(rule, result))
+        return GoRulesResults(self._in_rule_order(results, annotation), annotation)
+
+    def _in_rule_order(self, results, annotation):
+        all_results = {}
+        for rule in self.rules:
+            result = results.get(rule)
+            if result is None:
+                result = TestResult(ResultType.PASS, "", annotation)
+            all_results[rule] = result
+        return all_results
+
+    def rule_timings(self) -> Dict[str, Dict[str, Union[int, float]]]:
+        """
+        Returns a dictionary of rule id to the number of times `test` was called and cumulative seconds spent in it
+        """
+        return {rule.id: {"calls": self.calls[k], "time": self.elapsed[k]} for k, rule in enumerate(self.rules)}
+
+
+def _outcome(rule: GoRule, result: TestResult) -> str:
+    if result.result_type == ResultType.PASS:
+        return "pass"
+    if result.result_type == ResultType.WARNING:
+        # Repair rules warn when they have repaired the annotation
+        return "repaired" if isinstance(rule, RepairRule) else "warning"
+    return "error"
+
+
+# Plan whose config the shared GoRules are currently prepared for
+_prepared_plan = None
+
+# id(config) -> (config, key, plan), for a bounded number of recent configs
+_plans = {}
+
+
+def _plan_key(config: assocparser.AssocParserConfig):
+    rules = config.rule_set.rules
+    return (id(config.ontology), id(config.annotation_inferences), id(config.retracted_pub_set),
+            id(config.goref_metadata), id(config.extensions_constraints), id(config.ref_species_metadata),
+            config.paint, None if rules is None else frozenset(rules), tuple(config.rule_contexts))
+
+
+def rule_plan(config: assocparser.AssocParserConfig) -> GoRulePlan:
+    """
+    Returns the GoRulePlan for config, compiling it on first use or if the config has changed
+    """
+    key = _plan_key(config)
+    entry = _plans.get(id(config))
+    if entry is not None and entry[0] is config and entry[1] == key:
+        return entry[2]
+    plan = GoRulePlan(config)
+    if len(_plans) >= 16:
+        _plans.clear()
+    _plans[id(config)] = (config, key, plan)
+    return plan
+
+
+def test_go_rules(annotation: association.GoAssociation, config: assocparser.AssocParserConfig, group=None, profile=None) -> GoRulesResults:
+    if profile is None:
+        return rule_plan(config).run(annotation, group=group)
+
+    profile.start("go_rules")
+    try:
+        return rule_plan(config).run(annotation, group=group, profile=profile)
+    finally:
+        profile.stop()
@@ -0,0 +1,173 @@
+"""
+Index of the labels and synonyms of an ontology
+
+See also:
+
+ - ontol.py
+
+"""
+
+from bisect import bisect_left
+from collections import defaultdict
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def normalize(v):
+    """
+    Lower case, with runs of whitespace collapsed to a single space
+    """
+    if v is None:
+        return ''
+    return ' '.join(v.lower().split())
+
+
+def tokenize(v):
+    """
+    Normalized words in a string
+    """
+    return TOKEN_PATTERN.findall(normalize(v))
+
+
+class LexicalIndex():
+    """
+    Maps label and synonym strings of an ontology to node ids.
+
+    Values are indexed as given, for exact matching, and normalized (see
+    :func:`normalize`) for case-insensitive, prefix and token lookups.
+    Regular expression and partial matches are tested once per distinct
+    value, rather than once per synonym object.
+
+    The index also keeps the :class:`Synonym` objects it was built from, in
+    node order, so that they are created only once.
+
+    Instances are snapshots of the ontology they were built from.
+    Normally you do not create these directly; see :meth:`Ontology.lexical_index`
+    """
+
+    def __init__(self, ontology):
+        """
+        Arguments
+        ---------
+        ontology : Ontology
+            ontology to index
+        """
+        from ontobio.ontol import Synonym
+        self.labels = defaultdict(set)  # label --> ids
+        self.synonyms = defaultdict(set)  # synonym value --> ids
+        self.normalized = defaultdict(set)  # normalized label or synonym --> ids
+        self.tokens = defaultdict(set)  # word --> ids
+        # (Synonym, is_label) pairs, with each node's synonyms followed by its label
+        self.synonym_objects = []
+        num_nodes = 0
+        for nid in ontology.nodes():
+            num_nodes += 1
+            for syn in ontology.synonyms(nid):
+                self.synonym_objects.append((syn, False))
+                self._add(self.synonyms, syn.val, nid)
+            label = ontology.label(nid)
+            self.synonym_objects.append((Synonym(nid, val=label, pred='label'), True))
+            self._add(self.labels, label, nid)
+        self.sorted_normalized = sorted(self.normalized.keys())
+        logger.info("Indexed {} lexical values for {} nodes".format(len(self.normalized), num_nodes))
+
+    def _add(self, m, v, nid):
+        if v is None:
+            v = ''
+        m[v].add(nid)
+        self.normalized[normalize(v)].add(nid)
+        for w in tokenize(v):
+            self.tokens[w].add(nid)
+
+    def all_synonyms(self, include_label=False):
+        """
+        Synonym objects, as returned by :meth:`Ontology.all_synonyms`
+        """
+        return [syn for (syn, is_label) in self.synonym_objects if include_label or not is_label]
+
+    def exact(self, v, synonyms=True):
+        """
+        ids for which v is the label, or a synonym
+        """
+        ids = set(self.labels.get(v, set()))
+        if synonyms:
+            ids.update(self.synonyms.get(v, set()))
+        return ids
+
+    def normalized_match(self, v):
+        """
+        ids with a label or synonym equal to v, ignoring case and whitespace
+        """
+        return set(self.normalized.get(normalize(v), set()))
+
+    def prefix(self, p):
+        """
+        ids with a label or synonym starting with p, ignoring case and whitespace
+        """
+        p = normalize(p)
+        ids = set()
+        keys = self.sorted_normalized
+        for i in range(bisect_left(keys, p), len(keys)):
+            if not keys[i].startswith(p):
+                break
+            ids.update(self.normalized[keys[i]])
+        return ids
+
+    def token_match(self, v):
+        """
+        ids with all the words of v in their label or one of their synonyms
+
+        Words may come from different synonyms of the same node.
+        """
+        ids = None
+        for w in tokenize(v):
+            wids = self.tokens.get(w, set())
+            ids = set(wids) if ids is None else ids & wids
+            if len(ids) == 0:
+                break
+        return ids if ids is not None else set()
+
+    def match(self, term, synonyms=False, is_partial_match=False, is_regex=False, **args):
+        """
+        ids matching a search term, with the semantics of :meth:`Ontology.resolve_names`
+
+        Arguments
+        ---------
+        term : str
+            search term. '%' treated as wildcard
+        synonyms : bool
+            if true, match synonyms in addition to labels
+        is_regex : bool
+            if true, treats term as a regular expression
+        is_partial_match : bool
+            if true, matches values containing term
+        """
+        if term == '%':
+            # always match if client passes '%'
+            ids = set()
+            for v in self.labels.values():
+                ids.update(v)
+            return ids
+        maps = [self.labels]
+        if synonyms:
+            maps.append(self.synonyms)
+        if term.find('%') > -1:
+            term = term.replace('%', '.*')
+            is_regex = True
+        if is_regex:
+            pattern = re.compile(term)
+            test = lambda v: pattern.search(v) is not None
+        elif is_partial_match:
+            test = lambda v: v.find(term) > -1
+        else:
+            return self.exact(term, synonyms=synonyms)
+        ids = set()
+        for m in maps:
+            for (v, vids) in m.items():
+                if test(v):
+                    ids.update(vids)
+        return ids
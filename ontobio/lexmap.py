@@ -32,12 +32,30 @@ from collections import defaultdict
 import pandas as pd
 import numpy as np
 import math
+import multiprocessing
 
 from marshmallow import Schema, fields, pprint, post_load
 
 LABEL_OR_EXACT = 'label_or_exact'
 logger = logging.getLogger(__name__)
 
+# lexical values shared by more classes than this are not used for matching
+DEFAULT_MAX_BUCKET_SIZE = 1000
+
+# number of edges scored by a worker at a time in score_xrefs_by_semsim
+SEMSIM_CHUNK_SIZE = 500
+
+# engine and xref adjacency used by worker processes; set in the parent before forking
+_semsim_engine = None
+_semsim_adjacency = None
+
+
+def _semsim_chunk_scores(edges):
+    """
+    Semantic similarity scores for a chunk of xref graph edges, in a worker process
+    """
+    return [_semsim_engine._semsim_score(_semsim_adjacency, i, j) for (i,j) in edges]
+
 
 def logit(p):
     return math.log2(p/(1-p))
@@ -85,7 +103,7 @@ class LexicalMapEngine():
     SIMSCORES='simscores'
     CONDITIONAL_PR='cpr'
     
-    def __init__(self, wsmap=default_wsmap(), config=None):
+    def __init__(self, wsmap=default_wsmap(), config=None, workers=1):
         """
         Arguments
         ---------
@@ -93,6 +111,8 @@ class LexicalMapEngine():
             maps words to normalized synonyms.
         config: dict
             A configuration conforming to LexicalMapConfigSchema
+        workers: int
+            number of processes used to score matches by semantic similarity
         """
         # maps label or syn value to Synonym object
         self.lmap = {}
@@ -105,7 +125,10 @@ class LexicalMapEngine():
         self.id_to_ontology_map = defaultdict(list)
         self.merged_ontology = Ontology()
         self.config = config if config is not None else {}
+        self.workers = workers
         self.stats = {}
+        # node id --> frozenset of ancestors and descendants; see _blanket
+        self._blankets = {}
 
     def index_ontologies(self, onts):
         logger.info('Indexing: {}'.format(onts))
@@ -119,6 +142,7 @@ class LexicalMapEngine():
         This iterates through all labels and synonyms in the ontology, creating an index
         """
         self.merged_ontology.merge([ont])
+        self._blankets = {}
         syns = ont.all_synonyms(include_label=True)
         
         include_id = self._is_meaningful_ids()
@@ -263,9 +287,11 @@ class LexicalMapEngine():
           Note that Synonyms include the primary label
 
         - Each key in the dictionary is examined to determine if there exist two Synonyms from
-          different ontology classes
+          different ontology classes. Synonyms are grouped by class, and only the best
+          scoring pair of synonyms is kept for each pair of classes. See ref:`_candidate_pairs`
 
-        This avoids N^2 pairwise comparisons: instead the time taken is linear
+        This avoids N^2 pairwise comparisons: instead the time taken is linear,
+        apart from values shared by many classes, which are capped by max_bucket_size
 
         After initial mapping is made, additional scoring is performed on each mapping
 
@@ -286,62 +312,26 @@ class LexicalMapEngine():
             nx graph (bidirectional)
         """
 
-        # initial graph; all matches
-        g = nx.MultiDiGraph()
-
-        # lmap collects all syns by token
-        items = self.lmap.items()
-        logger.info("collecting initial xref graph, items={}".format(len(items)))
-        i = 0
-        sum_nsyns = 0
-        n_skipped = 0
-        has_self_comparison = False
-        if self.ontology_pairs:
-            for (o1id,o2id) in self.ontology_pairs:
-                if o1id == o2id:
-                    has_self_comparison = True
-
-        for (v,syns) in items:
-            sum_nsyns += len(syns)
-            i += 1
-            if i % 1000 == 1:
-                logger.info('{}/{}  lexical items avgSyns={}, skipped={}'.format(i,len(items), sum_nsyns/len(items), n_skipped))
-            if len(syns) < 2:
-                n_skipped += 1
-                next
-            if len(syns) > 10:
-                logger.info('Syns for {} = {}'.format(v,len(syns)))
-            for s1 in syns:
-                s1oid = s1.ontology.id
-                s1cid = s1.class_id
-                for s2 in syns:
-                    # optimization step: although this is redundant with _is_comparable,
-                    # we avoid inefficient additional calls
-                    if s1oid == s2.ontology.id and not has_self_comparison:
-                        next
-                    if s1cid != s2.class_id:
-                        if self._is_comparable(s1,s2):
-                            g.add_edge(s1.class_id, s2.class_id, syns=(s1,s2))
+        # best (score, s1, s2) for each comparable pair of classes
+        best = {}
+        for (c1, c2, score, s1, s2) in self._candidate_pairs():
+            current = best.get((c1, c2))
+            if current is None or score > current[0]:
+                best[(c1, c2)] = (score, s1, s2)
+        logger.info("candidate class pairs: {}".format(len(best)))
+        self.stats['candidate_pairs'] = len(best)
 
         logger.info("getting best supporting synonym pair for each match")
         # graph of best matches
         xg = nx.Graph()
-        for i in g.nodes():
-            for j in g.neighbors(i):
-                best = 0
-                bestm = None
-                for m in g.get_edge_data(i,j).values():
-                    (s1,s2) = m['syns']
-                    score = self._combine_syns(s1,s2)
-                    if score > best:
-                        best = score
-                        bestm = m
-                syns = bestm['syns']
-                xg.add_edge(i, j,
-                            score=best,
-                            lexscore=best,
-                            syns=syns,
-                            idpair=(i,j))
+        for ((i, j), (score, s1, s2)) in best.items():
+            if xg.has_edge(i, j) and xg[i][j][self.LEXSCORE] >= score:
+                continue
+            xg.add_edge(i, j,
+                        score=score,
+                        lexscore=score,
+                        syns=(s1, s2),
+                        idpair=(i,j))
 
         self.score_xrefs_by_semsim(xg)
         self.assign_best_matches(xg)
@@ -352,6 +342,57 @@ class LexicalMapEngine():
         logger.info("finished xref graph")
         return xg
 
+    def _candidate_pairs(self):
+        """
+        Generate candidate matches from the lexical index
+
+        Synonyms sharing a lexical value are grouped by (ontology, class), and
+        each comparable pair of classes is yielded once per lexical value, with its
+        best scoring pair of synonyms, as (class1, class2, score, syn1, syn2).
+
+        Values with fewer than two classes, or with no comparable ontologies, are
+        skipped. Values shared by more than max_bucket_size classes (see config) are
+        too generic to support a match, and are also skipped.
+        """
+        max_bucket_size = self.config.get('max_bucket_size', DEFAULT_MAX_BUCKET_SIZE)
+        items = self.lmap.items()
+        logger.info("collecting initial xref graph, items={}".format(len(items)))
+        n_skipped = 0
+        n_oversized = 0
+        for (i, (v, syns)) in enumerate(items):
+            if i % 1000 == 0:
+                logger.info('{}/{}  lexical items, skipped={}'.format(i, len(items), n_skipped))
+            groups = defaultdict(list)
+            for syn in syns:
+                groups[(syn.ontology.id, syn.class_id)].append(syn)
+            if len(groups) < 2:
+                n_skipped += 1
+                continue
+            if self.ontology_pairs is not None:
+                oids = set(oid for (oid, _) in groups.keys())
+                if not any((o1, o2) in self.ontology_pairs for o1 in oids for o2 in oids):
+                    n_skipped += 1
+                    continue
+            if max_bucket_size is not None and len(groups) > max_bucket_size:
+                logger.warning('Skipping lexical value "{}", shared by {} classes'.format(v, len(groups)))
+                n_oversized += 1
+                continue
+            groups = list(groups.values())
+            for syns1 in groups:
+                for syns2 in groups:
+                    if not self._is_comparable(syns1[0], syns2[0]):
+                        continue
+                    best = None
+                    for s1 in syns1:
+                        for s2 in syns2:
+                            score = self._combine_syns(s1, s2)
+                            if best is None or score > best[0]:
+                                best = (score, s1, s2)
+                    yield (syns1[0].class_id, syns2[0].class_id) + best
+        self.stats['lexical_values'] = len(items)
+        self.stats['skipped_lexical_values'] = n_skipped
+        self.stats['oversized_lexical_values'] = n_oversized
+
     # true if syns s1 and s2 should be compared.
     #  - if ontology_pairs is set, then only consider (s1,s2) if their respective source ontologies are in the list of pairs
     #  - otherwise compare all classes, but only in one direction
@@ -365,44 +406,97 @@ class LexicalMapEngine():
             return s1.class_id < s2.class_id
 
     def _blanket(self, nid):
-        nodes = set()
-        for ont in self.id_to_ontology_map[nid]:
-            nodes.update(ont.ancestors(nid))
-            nodes.update(ont.descendants(nid))
-        return list(nodes)
+        """
+        Ancestors and descendants of a node, over all indexed ontologies it is in
+
+        Memoized until the next ontology is indexed
+        """
+        nodes = self._blankets.get(nid)
+        if nodes is None:
+            nodes = set()
+            for ont in self.id_to_ontology_map[nid]:
+                nodes.update(ont.ancestors(nid))
+                nodes.update(ont.descendants(nid))
+            nodes = frozenset(nodes)
+            self._blankets[nid] = nodes
+        return nodes
+
+    def _xref_adjacency(self, xg):
+        """
+        Neighbors of each node in an xref graph, partitioned by prefix
+
+        Returns a dict: node id --> prefix --> set of neighbor ids
+        """
+        prefixes = {n: self._id_to_ontology(n) for n in xg.nodes()}
+        adjacency = {}
+        for n in xg.nodes():
+            by_prefix = defaultdict(set)
+            for x in xg.neighbors(n):
+                by_prefix[prefixes[x]].add(x)
+            adjacency[n] = dict(by_prefix)
+        return adjacency
     
     def score_xrefs_by_semsim(self, xg, ont=None):
         """
         Given an xref graph (see ref:`get_xref_graph`), this will adjust scores based on
         the semantic similarity of matches.
+
+        With more than one worker (see `__init__`), edges are scored in forked worker
+        processes, in chunks of SEMSIM_CHUNK_SIZE edges.
         """
         logger.info("scoring xrefs by semantic similarity for {} nodes in {}".format(len(xg.nodes()), ont))
-        for (i,j,d) in xg.edges(data=True):
-            pfx1 = self._id_to_ontology(i)
-            pfx2 = self._id_to_ontology(j)
-            ancs1 = self._blanket(i)
-            ancs2 = self._blanket(j)
-            s1,_,_ = self._sim(xg, ancs1, ancs2, pfx1, pfx2)
-            s2,_,_ = self._sim(xg, ancs2, ancs1, pfx2, pfx1)
+        edges = list(xg.edges())
+        adjacency = self._xref_adjacency(xg)
+        if self.workers > 1 and len(edges) > SEMSIM_CHUNK_SIZE and "fork" in multiprocessing.get_all_start_methods():
+            scores = self._parallel_semsim_scores(adjacency, edges)
+        else:
+            scores = [self._semsim_score(adjacency, i, j) for (i,j) in edges]
+        for ((i,j), (s1,s2)) in zip(edges, scores):
             s = 1 - ((1-s1) * (1-s2))
-            logger.debug("Score {} x {} = {} x {} = {} // {}".format(i,j,s1,s2,s, d))
+            logger.debug("Score {} x {} = {} x {} = {} // {}".format(i,j,s1,s2,s, xg[i][j]))
             xg[i][j][self.SIMSCORES] = (s1,s2)
             xg[i][j][self.SCORE] *= s
 
-    def _sim(self, xg, ancs1, ancs2, pfx1, pfx2):
+    def _semsim_score(self, adjacency, i, j):
+        pfx1 = self._id_to_ontology(i)
+        pfx2 = self._id_to_ontology(j)
+        ancs1 = self._blanket(i)
+        ancs2 = self._blanket(j)
+        s1,_,_ = self._sim(adjacency, ancs1, ancs2, pfx1, pfx2)
+        s2,_,_ = self._sim(adjacency, ancs2, ancs1, pfx2, pfx1)
+        return (s1, s2)
+
+    def _parallel_semsim_scores(self, adjacency, edges):
+        global _semsim_engine, _semsim_adjacency
+        # the engine and adjacency are shared with the forked workers copy-on-write
+        _semsim_engine = self
+        _semsim_adjacency = adjacency
+        try:
+            chunks = [edges[k:k + SEMSIM_CHUNK_SIZE] for k in range(0, len(edges), SEMSIM_CHUNK_SIZE)]
+            with multiprocessing.get_context("fork").Pool(self.workers) as pool:
+                scores = []
+                for chunk_scores in pool.imap(_semsim_chunk_scores, chunks):
+                    scores += chunk_scores
+                return scores
+        finally:
+            _semsim_engine = None
+            _semsim_adjacency = None
+
+    def _sim(self, adjacency, ancs1, ancs2, pfx1, pfx2):
         """
         Compare two lineages
+
+        adjacency is the prefix-partitioned xref graph from _xref_adjacency
         """
         xancs1 = set()
         for a in ancs1:
-            if a in xg:
-                # TODO: restrict this to neighbors in single ontology
-                for n in xg.neighbors(a):
-                    pfx = self._id_to_ontology(n)
-                    if pfx == pfx2:
-                        xancs1.add(n)
-        logger.debug('SIM={}/{} ## {}'.format(len(xancs1.intersection(ancs2)), len(xancs1), xancs1.intersection(ancs2), xancs1))
-        n_shared = len(xancs1.intersection(ancs2))
+            by_prefix = adjacency.get(a)
+            if by_prefix is not None and pfx2 in by_prefix:
+                xancs1.update(by_prefix[pfx2])
+        shared = xancs1.intersection(ancs2)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('SIM={}/{} ## {}'.format(len(shared), len(xancs1), shared))
+        n_shared = len(shared)
         n_total = len(xancs1)
         return (1+n_shared) / (1+n_total), n_shared, n_total
 
@@ -941,3 +1035,4 @@ class LexicalMapConfigSchema(Schema):
     match_weights = fields.List(fields.Nested(MatchWeights()))
     cardinality_weights = fields.List(fields.Nested(CardinalityWeights()))
     xref_weights = fields.List(fields.Nested(XrefWeights()))
+    max_bucket_size = fields.Integer(default=DEFAULT_MAX_BUCKET_SIZE, allow_none=True, description="lexical values shared by more classes than this are not used for matching. null for no limit")
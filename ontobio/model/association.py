@@ -20,9 +20,9 @@ import bidict
 from prefixcommons import curie_util
 
 from ontobio.rdfgen import relations
-from ontobio.ecomap import EcoMap
+from ontobio.ecomap import get_ecomap
 
-ecomap = EcoMap()
+ecomap = get_ecomap()
 ecomap.mappings()
 
 
@@ -555,11 +555,10 @@ class GoAssociation:
 
         qualifier = "|".join(qual_labels)
 
-        self.object.taxon.namespace = "taxon"
-        taxon = str(self.object.taxon)
+        # GAF uses the taxon prefix; the association itself is left unchanged
+        taxon = "taxon:{}".format(self.object.taxon.identity)
         if self.interacting_taxon:
-            self.interacting_taxon.namespace = "taxon"
-            taxon = "{taxon}|{interacting}".format(taxon=taxon, interacting=str(self.interacting_taxon))
+            taxon = "{taxon}|taxon:{interacting}".format(taxon=taxon, interacting=self.interacting_taxon.identity)
 
         # For extensions, we provide the to string function on ConjunctElement that
         # calls its `display` method, with the flag to use labels instead of the CURIE.
@@ -597,11 +596,10 @@ class GoAssociation:
 
         qualifier = "|".join(qual_labels)
 
-        self.object.taxon.namespace = "taxon"
-        taxon = str(self.object.taxon)
+        # GAF uses the taxon prefix; the association itself is left unchanged
+        taxon = "taxon:{}".format(self.object.taxon.identity)
         if self.interacting_taxon:
-            self.interacting_taxon.namespace = "taxon"
-            taxon = "{taxon}|{interacting}".format(taxon=taxon, interacting=str(self.interacting_taxon))
+            taxon = "{taxon}|taxon:{interacting}".format(taxon=taxon, interacting=self.interacting_taxon.identity)
 
         return [
             self.subject.id.namespace,
@@ -147,6 +147,8 @@ class GeneralAssocParser(assocparser.AssocParser):
                 if parser is not None:
                     self.annotation_parser = parser
                     self.report = parser.report
+                    if self.config.profile:
+                        parser._profile_stages()
 
             self.headers.append(line)
             return assocparser.ParseResult(line, [], skipped=False)
@@ -159,3 +161,13 @@ class GeneralAssocParser(assocparser.AssocParser):
 
         # Just hand off parse responsibility to underlying `annotation_parser`
         return self.annotation_parser.parse_line(line)
+
+    def _set_report(self, report):
+        self.report = report
+        if self.annotation_parser is not None:
+            self.annotation_parser._set_report(report)
+
+    def _profile_stages(self):
+        # Stages are timed in the underlying `annotation_parser`, once it is selected from the header
+        if self.annotation_parser is not None:
+            self.annotation_parser._profile_stages()
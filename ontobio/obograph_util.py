@@ -3,23 +3,25 @@ Mapping between obograph-JSON format and networkx
 """
 
 from ontobio.ontol import LogicalDefinition, PropertyChainAxiom
+from ontobio.compact_ontol import CompactGraph
 from ontobio.vocabulary.relations import map_legacy_pred
 from ontobio.util.curie_map import get_curie_map
+from ontobio.util.curie_contractor import get_contractor
+from ontobio.util.json_stream import JsonStreamReader
 from ontobio.golr.golr_associations import search_associations
+from ontobio.golr.golr_cache import GolrCache
 
 import json
 import networkx
 import logging
 from prefixcommons.curie_util import expand_uri, contract_uri
-from diskcache import Cache
-import tempfile
-
-
-cache = Cache(tempfile.gettempdir())
-
 
 logger = logging.getLogger(__name__)
 
+# Evidence tables by association id, kept in memory (bounded in size and by TTL)
+# whether or not the golr_cache config is enabled
+evidence_cache = GolrCache()
+
 
 class OboJsonMapper(object):
     def __init__(self,
@@ -27,6 +29,8 @@ class OboJsonMapper(object):
                  context=None):
         self.digraph = digraph
         self.context = context if context is not None else {}
+        self.context_contractor = get_contractor([self.context]) if len(self.context) > 0 else None
+        self.default_contractor = get_contractor()
 
     def add_obograph_digraph(
             self,
@@ -42,78 +46,107 @@ class OboJsonMapper(object):
         """
         Converts a single obograph to Digraph edges and adds to an existing networkx DiGraph
         """
-        digraph = self.digraph
         logger.info("NODES: {}".format(len(og.get('nodes', []))))
-
-        # If client passes an xref_graph, we must parse metadata
-        if xref_graph is not None:
-            parse_meta = True
-
         for node in og.get('nodes', []):
-            is_obsolete = node.get('is_obsolete') == 'true'
-            if is_obsolete:
-                continue
-            if node_type is not None and node.get('type') != node_type:
-                continue
-            id = self.contract_uri(node['id'])
-            digraph.add_node(id, **node)
-            if 'lbl' in node:
-                digraph.nodes[id]['label'] = node['lbl']
-            if parse_meta and 'meta' in node:
-                if node['meta'] is None:
-                    node['meta'] = {}
-                meta = self.transform_meta(node['meta'])
-                if xref_graph is not None and 'xrefs' in meta:
-                    for x in meta.get('xrefs', []):
-                        xref_graph.add_edge(self.contract_uri(x.get('val')), id, source=id)
+            self.add_obograph_node(node, node_type=node_type, xref_graph=xref_graph, parse_meta=parse_meta)
 
         logger.info("EDGES: {}".format(len(og.get('edges', []))))
         for edge in og.get('edges', []):
-            sub = self.contract_uri(edge.get('sub'))
-            obj = self.contract_uri(edge.get('obj'))
-            pred = self.contract_uri(edge.get('pred'))
-            pred = map_legacy_pred(pred)
-            if pred == 'is_a':
-                pred = 'subClassOf'
-            if predicates is None or pred in predicates:
-                meta = edge.get('meta', {})
-                if reverse_edges:
-                    digraph.add_edge(obj, sub, pred=pred, **meta)
-                else:
-                    digraph.add_edge(sub, obj, pred=pred, **meta)
+            self.add_obograph_edge(edge, predicates=predicates, reverse_edges=reverse_edges)
 
         if 'equivalentNodesSets' in og:
             nslist = og.get('equivalentNodesSets', [])
             logger.info("CLIQUES: {}".format(len(nslist)))
             for ns in nslist:
-                equivNodeIds = ns.get('nodeIds', [])
-                for i in equivNodeIds:
-                    ix = self.contract_uri(i)
-                    for j in equivNodeIds:
-                        if i != j:
-                            jx = self.contract_uri(j)
-                            digraph.add_edge(ix, jx, pred='equivalentTo')
+                self.add_equivalent_nodes_set(ns)
 
         if logical_definitions is not None:
             for a in og.get('logicalDefinitionAxioms', []):
-                defined_class_id = a.get('definedClassId')
-                genus_ids = [self.contract_uri(x) for x in a.get('genusIds', [])]
-                restrictions = [
-                    (self.contract_uri(x.get('propertyId')), self.contract_uri(x.get('fillerId')))
-                    for x in a.get('restrictions', []) if x is not None
-                ]
-                if defined_class_id:
-                    ld = LogicalDefinition(self.contract_uri(defined_class_id), genus_ids, restrictions)
-                    logical_definitions.append(ld)
+                self.add_logical_definition_axiom(a, logical_definitions)
 
         if property_chain_axioms is not None:
             for a in og.get('propertyChainAxioms', []):
-                predicate_id = a.get('predicateId')
-                chain_predicate_ids = [self.contract_uri(x) for x in a.get('chainPredicateIds', [])]
-                if predicate_id:
-                    pca = PropertyChainAxiom(predicate_id=self.contract_uri(predicate_id),
-                                             chain_predicate_ids=chain_predicate_ids)
-                    property_chain_axioms.append(pca)
+                self.add_property_chain_axiom(a, property_chain_axioms)
+
+    def add_obograph_node(self, node, node_type=None, xref_graph=None, parse_meta=True):
+        """
+        Adds a single obograph node object to the digraph
+        """
+        # If client passes an xref_graph, we must parse metadata
+        if xref_graph is not None:
+            parse_meta = True
+        is_obsolete = node.get('is_obsolete') == 'true'
+        if is_obsolete:
+            return
+        if node_type is not None and node.get('type') != node_type:
+            return
+        id = self.contract_uri(node['id'])
+        if parse_meta and 'meta' in node:
+            if node['meta'] is None:
+                node['meta'] = {}
+            meta = self.transform_meta(node['meta'])
+            if xref_graph is not None and 'xrefs' in meta:
+                for x in meta.get('xrefs', []):
+                    xref_graph.add_edge(self.contract_uri(x.get('val')), id, source=id)
+        if 'lbl' in node:
+            # lbl replaces any label key of the node
+            self.digraph.add_node(id, **dict(node, label=node['lbl']))
+        else:
+            self.digraph.add_node(id, **node)
+
+    def add_obograph_edge(self, edge, predicates=None, reverse_edges=True):
+        """
+        Adds a single obograph edge object to the digraph
+        """
+        sub = self.contract_uri(edge.get('sub'))
+        obj = self.contract_uri(edge.get('obj'))
+        pred = self.contract_uri(edge.get('pred'))
+        pred = map_legacy_pred(pred)
+        if pred == 'is_a':
+            pred = 'subClassOf'
+        if predicates is None or pred in predicates:
+            meta = edge.get('meta', {})
+            if reverse_edges:
+                self.digraph.add_edge(obj, sub, pred=pred, **meta)
+            else:
+                self.digraph.add_edge(sub, obj, pred=pred, **meta)
+
+    def add_equivalent_nodes_set(self, ns):
+        """
+        Adds equivalentTo edges between all pairs of an obograph equivalentNodesSet
+        """
+        equivNodeIds = ns.get('nodeIds', [])
+        for i in equivNodeIds:
+            ix = self.contract_uri(i)
+            for j in equivNodeIds:
+                if i != j:
+                    jx = self.contract_uri(j)
+                    self.digraph.add_edge(ix, jx, pred='equivalentTo')
+
+    def add_logical_definition_axiom(self, a, logical_definitions):
+        """
+        Appends a LogicalDefinition for an obograph logicalDefinitionAxiom
+        """
+        defined_class_id = a.get('definedClassId')
+        genus_ids = [self.contract_uri(x) for x in a.get('genusIds', [])]
+        restrictions = [
+            (self.contract_uri(x.get('propertyId')), self.contract_uri(x.get('fillerId')))
+            for x in a.get('restrictions', []) if x is not None
+        ]
+        if defined_class_id:
+            ld = LogicalDefinition(self.contract_uri(defined_class_id), genus_ids, restrictions)
+            logical_definitions.append(ld)
+
+    def add_property_chain_axiom(self, a, property_chain_axioms):
+        """
+        Appends a PropertyChainAxiom for an obograph propertyChainAxiom
+        """
+        predicate_id = a.get('predicateId')
+        chain_predicate_ids = [self.contract_uri(x) for x in a.get('chainPredicateIds', [])]
+        if predicate_id:
+            pca = PropertyChainAxiom(predicate_id=self.contract_uri(predicate_id),
+                                     chain_predicate_ids=chain_predicate_ids)
+            property_chain_axioms.append(pca)
 
     def transform_meta(self, meta):
         if 'basicPropertyValues' in meta:
@@ -123,37 +156,41 @@ class OboJsonMapper(object):
         return meta
 
     def contract_uri(self, uri):
-        if len(self.context.keys()) > 0:
-            curies = contract_uri(uri, cmaps=[self.context])
-            if len(curies) > 0:
-                return sorted(curies, key=len)[0] # sort by length
-
-        curies = sorted(contract_uri(uri), key=len) # Sort by length
-        if len(curies) > 0:
-            return curies[0]
-        else:
-            return uri
+        if self.context_contractor is not None:
+            curie = self.context_contractor.contract_one(uri)
+            if curie is not None:
+                return curie
+        return self.default_contractor.contract_one(uri, default=uri)
 
 
-def convert_json_file(obographfile, **args):
+def convert_json_file(obographfile, stream=False, **args):
     """
     Return a networkx MultiDiGraph of the ontologies
     serialized as a json string
 
+    If stream is True, the file is parsed incrementally, see :func:`stream_json_file`
+
     """
+    if stream:
+        return stream_json_file(obographfile, **args)
     file = open(obographfile, 'r')
     jsonstr = file.read()
     file.close()
     return convert_json_object(json.loads(jsonstr), **args)
 
 
-def convert_json_object(obographdoc, reverse_edges=True, **args):
+def convert_json_object(obographdoc, reverse_edges=True, compact=False, retain_graphdoc=True, **args):
     """
     Return a networkx MultiDiGraph of the ontologies
     serialized as a json object
 
+    If compact is True, the graph is a :class:`CompactGraph` instead
+
+    If retain_graphdoc is False, the 'graphdoc' entry of the result is None,
+    so that the parsed document can be freed once the graph is built
+
     """
-    digraph = networkx.MultiDiGraph()
+    digraph = CompactGraph() if compact else networkx.MultiDiGraph()
     xref_graph = networkx.MultiGraph()
     logical_definitions = []
     property_chain_axioms = []
@@ -175,7 +212,84 @@ def convert_json_object(obographdoc, reverse_edges=True, **args):
         'meta': base_og.get('meta'),
         'graph': mapper.digraph,
         'xref_graph': xref_graph,
-        'graphdoc': obographdoc,
+        'graphdoc': obographdoc if retain_graphdoc else None,
+        'logical_definitions': logical_definitions,
+        'property_chain_axioms': property_chain_axioms
+        }
+
+
+def stream_json_file(obographfile, reverse_edges=True, compact=False, node_type=None,
+                     predicates=None, parse_meta=True, chunk_size=1 << 20, **args):
+    """
+    Return the same result as :func:`convert_json_object`, parsing the
+    file incrementally
+
+    Each node, edge and axiom is decoded and added to the graph in turn, so
+    the whole document is never held in memory; the 'graphdoc' entry of the
+    result is None. If the file has a top-level '@context' after its graphs,
+    the file is loaded with :func:`convert_json_file` instead, as ids cannot
+    be contracted until the context is read.
+
+    Arguments
+    ---------
+    obographfile : str
+        path to an obographs json file
+    chunk_size : int
+        number of characters read from the file at a time
+    """
+    digraph = CompactGraph() if compact else networkx.MultiDiGraph()
+    xref_graph = networkx.MultiGraph()
+    logical_definitions = []
+    property_chain_axioms = []
+    mapper = OboJsonMapper(digraph=digraph)
+    base_og = {}
+    seen_graphs = False
+    with open(obographfile, 'r') as file:
+        reader = JsonStreamReader(file, chunk_size=chunk_size)
+        for key in reader.iter_object():
+            if key == '@context':
+                context = reader.value()
+                if seen_graphs:
+                    logger.warning("@context follows graphs in {}; loading without streaming".format(obographfile))
+                    return convert_json_file(obographfile, reverse_edges=reverse_edges, compact=compact,
+                                             node_type=node_type, predicates=predicates,
+                                             parse_meta=parse_meta, retain_graphdoc=False, **args)
+                logger.info("CONTEXT: {}".format(context))
+                mapper = OboJsonMapper(digraph=digraph, context=context)
+            elif key == 'graphs':
+                for n in reader.iter_array():
+                    seen_graphs = True
+                    for gkey in reader.iter_object():
+                        if gkey == 'nodes':
+                            for node in reader.iter_values():
+                                mapper.add_obograph_node(node, node_type=node_type, xref_graph=xref_graph,
+                                                         parse_meta=parse_meta)
+                        elif gkey == 'edges':
+                            for edge in reader.iter_values():
+                                mapper.add_obograph_edge(edge, predicates=predicates, reverse_edges=reverse_edges)
+                        elif gkey == 'equivalentNodesSets':
+                            for ns in reader.iter_values():
+                                mapper.add_equivalent_nodes_set(ns)
+                        elif gkey == 'logicalDefinitionAxioms':
+                            for a in reader.iter_values():
+                                mapper.add_logical_definition_axiom(a, logical_definitions)
+                        elif gkey == 'propertyChainAxioms':
+                            for a in reader.iter_values():
+                                mapper.add_property_chain_axiom(a, property_chain_axioms)
+                        elif n == 0 and gkey in ('id', 'meta'):
+                            base_og[gkey] = reader.value()
+                        else:
+                            reader.skip()
+            else:
+                reader.skip()
+    logger.info("Streamed {}: NODES: {}".format(obographfile, len(digraph.nodes())))
+
+    return {
+        'id': base_og.get('id'),
+        'meta': base_og.get('meta'),
+        'graph': mapper.digraph,
+        'xref_graph': xref_graph,
+        'graphdoc': None,
         'logical_definitions': logical_definitions,
         'property_chain_axioms': property_chain_axioms
         }
@@ -332,8 +446,11 @@ def obograph_to_assoc_results(digraph, assoc_type, is_publication=False):
     return association_results
 
 
-@cache.memoize()
 def get_evidence_tables(id, is_publication, user_agent):
+    params = {'id': id, 'is_publication': is_publication}
+    cached = evidence_cache.get('evidence_tables', params)
+    if cached is not None:
+        return cached
 
     results = search_associations(
             fq={'id': id},
@@ -351,4 +468,5 @@ def get_evidence_tables(id, is_publication, user_agent):
             'associations': assoc_results,
             'numFound': len(assoc_results)
         }
+    evidence_cache.set('evidence_tables', params, assoc_results)
     return assoc_results
@@ -11,6 +11,9 @@ import networkx as nx
 import logging
 import re
 
+from ontobio.closure import ClosureIndex
+from ontobio.lexical_index import LexicalIndex
+
 logger = logging.getLogger(__name__)
 
 class Ontology():
@@ -23,6 +26,12 @@ class Ontology():
 
     """
 
+    # maps relation sets to ClosureIndex objects; None unless enabled
+    _closure_indexes = None
+
+    # LexicalIndex over labels and synonyms; built on first use
+    _lexical_index = None
+
     def __init__(self,
                  handle=None,
                  id=None,
@@ -134,10 +143,77 @@ class Ontology():
         logger.info("Filtered edges: {}".format(num_edges))
         return g
 
+    def enable_closure_index(self, enabled=True):
+        """
+        Use precomputed transitive closures for ancestor and descendant queries
+
+        When enabled, the first call to :meth:`ancestors` or :meth:`descendants`
+        for a given set of relations builds a :class:`ClosureIndex`, and subsequent
+        calls for the same relations are answered from it.
+
+        Indexes are discarded when the graph is modified via :meth:`add_node`,
+        :meth:`add_parent` or :meth:`merge`. Clients that modify the networkx graph
+        directly should call this method again to reset the indexes.
+
+        Arguments
+        ---------
+        enabled : bool
+            if False, drop any indexes and revert to graph traversal
+        """
+        self._closure_indexes = {} if enabled else None
+
+    def closure_index(self, relations=None):
+        """
+        Return the closure index for a set of relations, building it if required
+
+        Arguments
+        ---------
+        relations : list
+             relation (object property) IDs used to filter. If None, all are used
+
+        Returns
+        -------
+        ClosureIndex
+        """
+        if self._closure_indexes is None:
+            self._closure_indexes = {}
+        key = None if relations is None else frozenset(relations)
+        if key not in self._closure_indexes:
+            self._closure_indexes[key] = ClosureIndex(self.get_graph(), relations=relations)
+        return self._closure_indexes[key]
+
+    def _invalidate_closures(self):
+        if self._closure_indexes is not None:
+            self._closure_indexes = {}
+
+    def lexical_index(self):
+        """
+        Return the index of labels and synonyms, building it if required
+
+        The index is discarded when nodes or synonyms are added via :meth:`add_node`,
+        :meth:`add_synonym` or :meth:`merge`. Clients that modify labels or synonyms
+        directly should call :meth:`invalidate_lexical_index`.
+
+        Returns
+        -------
+        LexicalIndex
+        """
+        if self._lexical_index is None:
+            self._lexical_index = LexicalIndex(self)
+        return self._lexical_index
+
+    def invalidate_lexical_index(self):
+        """
+        Discard the index of labels and synonyms
+        """
+        self._lexical_index = None
+
     def merge(self, ontologies):
         """
         Merges specified ontology into current ontology
         """
+        self._invalidate_closures()
+        self.invalidate_lexical_index()
         if self.xref_graph is None:
             self.xref_graph = nx.MultiGraph()
         logger.info("Merging source: {} xrefs: {}".format(self, len(self.xref_graph.edges())))
@@ -195,6 +271,8 @@ class Ontology():
         if relations is not None:
             g = ont.get_filtered_graph(relations)
             ont = Ontology(graph=g, xref_graph=self.xref_graph)
+        if self._closure_indexes is not None:
+            ont.enable_closure_index()
         return ont
 
     def create_slim_mapping(self, subset=None, subset_nodes=None, relations=None, disable_checks=False):
@@ -486,6 +564,8 @@ class Ontology():
             ancestor node IDs
 
         """
+        if self._closure_indexes is not None:
+            return self.closure_index(relations).ancestors(node, reflexive=reflexive)
         seen = set()
         nextnodes = [node]
         while len(nextnodes) > 0:
@@ -520,6 +600,8 @@ class Ontology():
         list[str]
             descendant node IDs
         """
+        if self._closure_indexes is not None:
+            return self.closure_index(relations).descendants(node, reflexive=reflexive)
         seen = set()
         nextnodes = [node]
         while len(nextnodes) > 0:
@@ -822,6 +904,8 @@ class Ontology():
         if meta is None:
             meta={}
         g.add_node(id, label=label, type=type, meta=meta)
+        self._invalidate_closures()
+        self.invalidate_lexical_index()
 
     def add_text_definition(self, textdef):
         """
@@ -857,6 +941,7 @@ class Ontology():
         """
         g = self.get_graph()
         g.add_edge(pid, id, pred=relation)
+        self._invalidate_closures()
 
     def add_xref(self, id, xref):
         """
@@ -878,6 +963,7 @@ class Ontology():
         if 'synonyms' not in meta:
             meta['synonyms'] = []
         meta['synonyms'].append(syn.as_dict())
+        self.invalidate_lexical_index()
 
     def add_to_subset(self, id, s):
         """
@@ -905,10 +991,7 @@ class Ontology():
         list[Synonym]
             :class:`Synonym` objects
         """
-        syns = []
-        for n in self.nodes():
-            syns = syns + self.synonyms(n, include_label=include_label)
-        return syns
+        return self.lexical_index().all_synonyms(include_label=include_label)
 
     def all_obsoletes(self):
         """
@@ -992,21 +1075,14 @@ class Ontology():
         is_partial_match : bool
            if true, treats each name as a regular expression .*name.*
         """
-        g = self.get_graph()
+        index = self.lexical_index()
         r_ids = []
         for n in names:
             logger.debug("Searching for {} syns={}".format(n,synonyms))
             if len(n.split(":")) == 2:
                 r_ids.append(n)
             else:
-                matches = set([nid for nid in g.nodes() if self._is_match(self.label(nid), n, **args)])
-                if synonyms:
-                    logger.debug("Searching syns for {}".format(names))
-                    for nid in g.nodes():
-                        for s in self.synonyms(nid):
-                            if self._is_match(s.val, n, **args):
-                                matches.add(nid)
-                r_ids += list(matches)
+                r_ids += list(index.match(n, synonyms=synonyms, **args))
         return r_ids
 
     def _is_match(self, label, term, is_partial_match=False, is_regex=False, **args):
@@ -6,6 +6,7 @@ See :ref:`inputs` on readthedocs for more details
 
 import ontobio.obograph_util as obograph_util
 from ontobio.ontol import Ontology
+from ontobio.compact_ontol import CompactOntology
 from ontobio.sparql.sparql_ontology import EagerRemoteSparqlOntology
 import os
 import subprocess
@@ -58,6 +59,18 @@ class OntologyFactory():
         ---------
         handle : str
             specifies how to retrieve the ontology info
+        compact : bool
+            if True, obographs-json based handles are loaded into a
+            :class:`CompactOntology` rather than a networkx-backed :class:`Ontology`
+        snapshot : bool
+            if True, obographs-json files are loaded via a memory-mapped binary
+            snapshot, created on first use (implies compact). See :mod:`ontobio.snapshot`
+        snapshot_dir : str
+            directory for snapshot files; defaults to the system temp directory
+        stream : bool
+            if True, obographs-json files are parsed incrementally and the
+            source document is not retained as `graphdoc`. Always used for
+            the large obo: ontologies (chebi, ncbitaxon, pr)
 
         """
         if handle is None:
@@ -74,10 +87,11 @@ class OntologyFactory():
 def create_ontology(handle=None, **args):
     ont = None
     logger.info("Determining strategy to load '{}' into memory...".format(handle))
+    ontology_class = CompactOntology if args.get('compact') else Ontology
 
     if handle.find("+") > -1:
         handles = handle.split("+")
-        onts = [create_ontology(ont) for ont in handles]
+        onts = [create_ontology(ont, **args) for ont in handles]
         ont = onts.pop()
         ont.merge(onts)
         return ont
@@ -88,9 +102,11 @@ def create_ontology(handle=None, **args):
         ont = translate_file_to_ontology(handle, **args)
     elif handle.startswith("obo:"):
         logger.info("Fetching from OBO PURL")
+        stream = args.get('stream', False)
         if handle.find(".") == -1:
             if handle == 'chebi' or handle == 'ncbitaxon' or handle == 'pr':
                 handle += '.obo'
+                stream = True
                 logger.info("using obo for large ontology: {}".format(handle))
             else:
                 handle += '.owl'
@@ -102,8 +118,8 @@ def create_ontology(handle=None, **args):
             logger.info(cp)
         else:
             logger.info("using cached file: "+fn)
-        g = obograph_util.convert_json_file(fn)
-        ont = Ontology(handle=handle, payload=g)
+        g = obograph_util.convert_json_file(fn, compact=args.get('compact', False), stream=stream)
+        ont = ontology_class(handle=handle, payload=g)
     elif handle.startswith("wdq:"):
         from ontobio.sparql.wikidata_ontology import EagerWikidataOntology
         logger.info("Fetching from Wikidata")
@@ -131,8 +147,9 @@ def create_ontology(handle=None, **args):
             logger.info(cp)
         else:
             logger.info("using cached file: "+fn)
-        g = obograph_util.convert_json_file(fn)
-        ont = Ontology(handle=handle, payload=g)
+        g = obograph_util.convert_json_file(fn, compact=args.get('compact', False),
+                                            stream=args.get('stream', False))
+        ont = ontology_class(handle=handle, payload=g)
     else:
         logger.info("Fetching from SPARQL")
         ont = EagerRemoteSparqlOntology(handle=handle)
@@ -146,9 +163,12 @@ def create_ontology_from_obograph(og):
     return ont
 
 def translate_file_to_ontology(handle, **args):
+    ontology_class = CompactOntology if args.get('compact') else Ontology
+    if handle.endswith(".json") and args.get('snapshot'):
+        return translate_file_to_snapshot(handle, **args)
     if handle.endswith(".json"):
         g = obograph_util.convert_json_file(handle, **args)
-        return Ontology(handle=handle, payload=g)
+        return ontology_class(handle=handle, payload=g)
     elif handle.endswith(".ttl"):
         from ontobio.sparql.rdf2nx import RdfMapper
         logger.info("RdfMapper: {}".format(args))
@@ -167,12 +187,49 @@ def translate_file_to_ontology(handle, **args):
         else:
             logger.info("using cached file: "+fn)
         g = obograph_util.convert_json_file(fn, **args)
-        return Ontology(handle=handle, payload=g)
+        return ontology_class(handle=handle, payload=g)
+
+def translate_file_to_snapshot(handle, snapshot_dir=None, **args):
+    """
+    Load an obographs json file via a binary snapshot, creating the snapshot if required
+
+    Snapshots are keyed by the checksum of the file and the load options, so a
+    modified file, or one loaded with other options, is re-parsed. See :mod:`ontobio.snapshot`
+
+    Arguments
+    ---------
+    handle : str
+        path to obographs json file
+    snapshot_dir : str
+        directory holding snapshots; defaults to the system temp directory
+
+    Returns
+    -------
+    CompactOntology
+    """
+    from ontobio import snapshot
+    checksum = get_checksum(handle)
+    fn = snapshot.snapshot_path(snapshot.snapshot_key(checksum, **args), snapshot_dir)
+    if os.path.isfile(fn):
+        logger.info("using snapshot: "+fn)
+        try:
+            return snapshot.read_snapshot(fn)
+        except ValueError as e:
+            logger.warning("Ignoring snapshot {}: {}".format(fn, e))
+    args['compact'] = True
+    # the source document is not kept in a snapshot, so never hold all of it in memory
+    args['stream'] = True
+    g = obograph_util.convert_json_file(handle, **args)
+    ont = CompactOntology(handle=handle, payload=g)
+    snapshot.write_snapshot(ont, fn, checksum=checksum)
+    return ont
 
 def get_checksum(file):
     """
     Get SHA256 hash from the contents of a given file
     """
+    h = hashlib.sha256()
     with open(file, 'rb') as FH:
-        contents = FH.read()
-    return hashlib.sha256(contents).hexdigest()
+        for chunk in iter(lambda: FH.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
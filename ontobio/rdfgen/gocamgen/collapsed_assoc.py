@@ -8,7 +8,7 @@ from ontobio import ecomap
 
 logger = logging.getLogger(__name__)
 
-ecomapping = ecomap.EcoMap()
+ecomapping = ecomap.get_ecomap()
 ipi_eco = ecomapping.coderef_to_ecoclass("IPI")
 
 GPAD_PARSER = GpadParser()
@@ -2,7 +2,7 @@ from ontobio.rdfgen.assoc_rdfgen import CamRdfTransform, TurtleRdfWriter, genid,
 from ontobio.rdfgen import relations
 from ontobio.vocabulary.relations import OboRO, Evidence
 from ontobio.vocabulary.upper import UpperLevel
-from prefixcommons.curie_util import expand_uri, contract_uri
+from ontobio.util.curie_contractor import expand_uri, contract_uri
 from rdflib.namespace import OWL, RDF
 from rdflib import Literal
 from rdflib.term import URIRef
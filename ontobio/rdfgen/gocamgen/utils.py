@@ -7,7 +7,7 @@ from typing import List
 from ontobio.rdfgen.assoc_rdfgen import prefix_context
 from ontobio.rdfgen.gocamgen.errors import ShexException
 from ontobio.model.association import Curie
-from prefixcommons.curie_util import expand_uri, contract_uri
+from ontobio.util.curie_contractor import expand_uri, contract_uri
 from pyshexc.parser_impl import generate_shexj
 
 logger = logging.getLogger(__name__)
@@ -55,6 +55,21 @@ class FilteredSearchable(metaclass=ABCMeta):
         pass
 
 
+class BatchComparable(metaclass=ABCMeta):
+
+    @abstractmethod
+    def compare_profiles(self,
+                         reference_classes: Iterable,
+                         query_profiles: Iterable[Iterable],
+                         method: Optional) -> SimResult:
+        """
+        Given a list of classes and many lists of classes, return the
+        similarity of each of the latter to the former, as one match
+        per profile, in order
+        """
+        pass
+
+
 class InformationContentStore(metaclass=ABCMeta):
     """
     Interface for an IC cache or store needed
@@ -0,0 +1,219 @@
+"""
+Indexed top-k profile search
+
+ProfileSearchIndex answers "which subjects are most similar to this
+profile" locally, from an AssociationSet, without scoring every subject.
+
+An inverted index maps each annotated class to the subjects inferred to
+have it. Classes are numbered in order of decreasing information content
+(IC), as in SemSearchEngine, so the ancestors of a query are visited from
+the most to the least informative. Each query class contributes to a
+subject's score at most the IC of the best of its ancestors the subject has,
+so a subject that has none of the query ancestors above some IC can score
+at most that IC (or its square root, for phenodigm). Subjects are gathered
+from the postings of the most informative ancestors until there are enough
+candidates; these are scored exactly, and the search widens only if the
+bound on the remaining subjects does not fall below the k-th best score.
+
+E.g.
+
+::
+
+    aset = AssociationSetFactory().create(ontology=hp, subject_category='disease', object_category='phenotype', taxon=HUMAN)
+    index = ProfileSearchIndex(aset)
+    result = index.search(['HP:0000252', 'HP:0001250'], [], limit=100)
+
+"""
+from typing import List, Optional, Tuple, Iterable, Dict
+from ontobio.model.similarity import SimResult
+from ontobio.sim.api.interfaces import FilteredSearchable
+from ontobio.sim.api.semsearch import SemSearchEngine, ClassId, SubjectId
+from ontobio.vocabulary.similarity import SimAlgorithm
+import logging
+
+import numpy as np
+import scipy.sparse
+
+logger = logging.getLogger(__name__)
+
+# relative slack when comparing a bound against the k-th best score
+BOUND_TOLERANCE = 1e-9
+
+
+def _normalize_taxon(taxon: Optional[str]) -> Optional[str]:
+    if taxon is None:
+        return None
+    return taxon.replace('NCBITaxon:', '')
+
+
+class ProfileSearchIndex(SemSearchEngine, FilteredSearchable):
+    """
+    SemSearchEngine with an inverted class --> subject index for top-k search
+    """
+
+    def __init__(self,
+                 assocmodel=None,
+                 subject_taxon_map: Optional[Dict[SubjectId, str]] = None,
+                 subject_category_map: Optional[Dict[SubjectId, str]] = None,
+                 cache_dir=None):
+        """
+        Arguments
+        ---------
+        assocmodel : AssociationSet
+            annotated subjects, with an ontology
+        subject_taxon_map : dict
+            taxon of each subject, e.g. NCBITaxon:9606 or 9606. Defaults to the taxon of the association set
+        subject_category_map : dict
+            category of each subject, e.g. gene. Defaults to the subject category of the association set
+        cache_dir : str
+            passed to SemSearchEngine
+        """
+        super().__init__(assocmodel, cache_dir=cache_dir)
+        meta = assocmodel.meta
+        default_taxon = getattr(meta, 'taxon', None)
+        default_category = getattr(meta, 'subject_category', None)
+        if subject_taxon_map is None:
+            subject_taxon_map = {}
+        if subject_category_map is None:
+            subject_category_map = {}
+        self.subject_taxa = np.array([_normalize_taxon(subject_taxon_map.get(s, default_taxon))
+                                      for s in self.profile_subjects], dtype=object)
+        categories = [subject_category_map.get(s, default_category) for s in self.profile_subjects]
+        self.subject_categories = np.array([c.lower() if c is not None else None for c in categories], dtype=object)
+        # position of each subject when sorted by id, for breaking ties
+        self._subject_order = np.empty(len(self.profile_subjects), dtype=np.int64)
+        self._subject_order[sorted(range(len(self.profile_subjects)), key=lambda k: self.profile_subjects[k])] = \
+            np.arange(len(self.profile_subjects))
+        self._index_postings()
+
+    def _index_postings(self):
+        indptr = [0]
+        indices = []
+        for s in self.profile_subjects:
+            indices.extend(self.class_bit[c] for c in self.assocmodel.inferred_types(s) if c in self.class_bit)
+            indptr.append(len(indices))
+        m = scipy.sparse.csr_matrix((np.ones(len(indices), dtype=np.int32), np.array(indices, dtype=np.int64),
+                                     np.array(indptr, dtype=np.int64)),
+                                    shape=(len(self.profile_subjects), len(self.ic_classes)))
+        self.inferred_sizes = np.diff(m.indptr)
+        # subjects x classes; column j lists the subjects inferred to have class j
+        self.postings = m.tocsc()
+        self.postings.sort_indices()
+        logger.info("Indexed {} subjects over {} classes".format(len(self.profile_subjects), len(self.ic_classes)))
+
+    def _posting(self, j: int) -> np.ndarray:
+        p = self.postings
+        return p.indices[p.indptr[j]:p.indptr[j+1]]
+
+    @staticmethod
+    def _bit_indices(bits: int) -> np.ndarray:
+        """
+        Indices of the set bits of a bitset, ascending
+        """
+        nbytes = (bits.bit_length() + 7) // 8
+        return np.flatnonzero(np.unpackbits(np.frombuffer(bits.to_bytes(nbytes, 'little'), dtype=np.uint8),
+                                            bitorder='little'))
+
+    def filtered_search(self,
+                        id_list: Iterable,
+                        negated_classes: Iterable,
+                        limit: Optional[int] = 100,
+                        taxon_filter: Optional[str] = None,
+                        category_filter: Optional[str] = None,
+                        method: Optional[SimAlgorithm] = SimAlgorithm.PHENODIGM) -> SimResult:
+        """
+        search, restricted to subjects of a taxon and/or category
+        """
+        allowed = np.ones(len(self.profile_subjects), dtype=bool)
+        if taxon_filter is not None:
+            allowed &= self.subject_taxa == _normalize_taxon(taxon_filter)
+        if category_filter is not None:
+            allowed &= self.subject_categories == category_filter.lower()
+        return self._search(id_list, negated_classes, limit, method, allowed=allowed)
+
+    def _negated_mask(self, negated_classes: List[ClassId]) -> np.ndarray:
+        mask = np.zeros(len(self.profile_subjects), dtype=bool)
+        for c in negated_classes:
+            j = self.class_bit.get(c)
+            if j is not None:
+                mask[self._posting(j)] = True
+        return mask
+
+    def _ranked(self, candidates: np.ndarray, scores: np.ndarray) -> List[Tuple[int, float]]:
+        order = np.lexsort((self._subject_order[candidates], -scores))
+        return [(int(candidates[i]), float(scores[i])) for i in order]
+
+    def _score_candidates(self, query: List[ClassId], candidates: np.ndarray, method: SimAlgorithm) -> List[Tuple[int, float]]:
+        """
+        Exact scores for some of the profile_subjects, best first
+        """
+        starts = self._profile_indptr[candidates]
+        lens = self._profile_indptr[candidates + 1] - starts
+        indptr = np.concatenate([[0], np.cumsum(lens)])
+        gather = np.arange(indptr[-1]) - np.repeat(indptr[:-1], lens) + np.repeat(starts, lens)
+        (used, indices) = np.unique(self._profile_indices[gather], return_inverse=True)
+        cols = [self.profile_classes[j] for j in used]
+        (scores, _) = self._score_profiles(query, cols, indptr, indices.ravel(), method)
+        return self._ranked(candidates, scores)
+
+    def _rank_subjects(self,
+                       query: List[ClassId],
+                       limit: Optional[int],
+                       method: SimAlgorithm,
+                       allowed: np.ndarray) -> List[Tuple[int, float]]:
+        qbits = 0
+        for c in query:
+            qbits |= self._ancestor_bits(c)
+        levels = self._bit_indices(qbits)
+        if method == SimAlgorithm.JACCARD:
+            return self._rank_jaccard(levels, limit, allowed)
+        if limit is None or len(levels) == 0:
+            return super()._rank_subjects(query, limit, method, allowed)
+        if method == SimAlgorithm.PHENODIGM:
+            # a pair scores at most sqrt(IC of its MICA)
+            bound = np.sqrt
+            threshold = lambda score: score * score
+        else:
+            bound = lambda ic: ic
+            threshold = lambda score: score
+
+        seen = np.zeros(len(self.profile_subjects), dtype=bool)
+        n = 0
+        pos = 0
+        while pos < len(levels) and n < limit:
+            p = self._posting(levels[pos])
+            new = p[allowed[p] & ~seen[p]]
+            seen[new] = True
+            n += len(new)
+            pos += 1
+        ranked = self._score_candidates(query, np.flatnonzero(seen), method)
+        if pos < len(levels) and len(ranked) >= limit:
+            kth = ranked[limit - 1][1]
+            if bound(self.ic_values[levels[pos]]) >= kth * (1 - BOUND_TOLERANCE):
+                # widen to every ancestor that could lift a subject to the k-th score
+                min_ic = threshold(kth) * (1 - BOUND_TOLERANCE)
+                while pos < len(levels) and self.ic_values[levels[pos]] >= min_ic:
+                    p = self._posting(levels[pos])
+                    seen[p[allowed[p]]] = True
+                    pos += 1
+                logger.debug("Widened search to {} candidates".format(seen.sum()))
+                ranked = self._score_candidates(query, np.flatnonzero(seen), method)
+        elif len(ranked) < limit:
+            # the remaining subjects have no ancestors in common with the query
+            rest = np.flatnonzero(allowed & ~seen)
+            ranked = self._ranked(np.concatenate([[k for (k, _) in ranked], rest]).astype(np.int64),
+                                  np.concatenate([[s for (_, s) in ranked], np.zeros(len(rest))]))
+        return ranked[:limit]
+
+    def _rank_jaccard(self, levels: np.ndarray, limit: Optional[int], allowed: np.ndarray) -> List[Tuple[int, float]]:
+        """
+        Jaccard similarity of the query closure with every subject closure, in one sparse product
+        """
+        shared = np.asarray(self.postings[:, levels].sum(axis=1)).ravel()
+        union = len(levels) + self.inferred_sizes - shared
+        scores = np.divide(shared, union, out=np.zeros(len(shared)), where=union > 0)
+        candidates = np.flatnonzero(allowed)
+        ranked = self._ranked(candidates, scores[candidates])
+        if limit is not None:
+            ranked = ranked[:limit]
+        return ranked
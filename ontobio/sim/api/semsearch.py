@@ -1,17 +1,30 @@
 """
 Semantic Search (ALPHA)
+
+Local similarity engine over an AssociationSet. Information content (IC)
+is computed from the annotation frequency of each class, and the reflexive
+ancestor closure of each class is stored as a bitset (a python int), with
+bits assigned to annotated classes in order of decreasing IC. The most
+informative common ancestor (MICA) of two classes is then the lowest set bit
+of the intersection of their bitsets.
+
+Bitsets are computed lazily, parents before children, so only the
+ancestors of classes that are actually compared are visited.
 """
-from typing import Union, List, Dict, Set, Optional, Tuple
+from typing import Union, List, Dict, Set, Optional, Tuple, Iterable
 from collections import defaultdict
-from ontobio.model.similarity import SimResult
-from ontobio.sim.api.interfaces import SimApi
+from ontobio.model.similarity import SimResult, SimMatch, SimQuery, SimMetadata, \
+    PairwiseMatch, ICNode, Node
+from ontobio.sim.api.interfaces import SimApi, BatchComparable
+from ontobio.vocabulary.similarity import SimAlgorithm
+import hashlib
 import math
+import os
 import logging
 
 import pandas as pd
 import numpy as np
 from scipy.spatial.distance import cosine
-import networkx.algorithms.traversal.depth_first_search as dfs
 import networkx as nx
 
 ClassId = str
@@ -23,24 +36,107 @@ InformationContent = float
 logger = logging.getLogger(__name__)
 
 
-class SemSearchEngine(SimApi):
+def _lowest_bit(x: int) -> int:
+    """
+    Index of the lowest set bit of x, or -1 if x is 0
+    """
+    return (x & -x).bit_length() - 1
+
+
+def _popcount(x: int) -> int:
+    return bin(x).count('1')
+
+
+class SemSearchEngine(SimApi, BatchComparable):
     """
     A semantic search engine can be used to compare individual annotated entities,
     or to compare pairs of entities.
 
     It wraps an assocmodel
     """
-    
-    def __init__(self, assocmodel=None):
+
+    def __init__(self, assocmodel=None, cache_dir=None):
+        """
+        Arguments
+        ---------
+        assocmodel : AssociationSet
+            annotated subjects, with an ontology
+        cache_dir : str
+            if set, all-pairs MICA tables are cached in this directory
+        """
         self.assocmodel = assocmodel # type: AssociationSet
-        self.assoc_df = assocmodel.as_dataframe()
-        # TODO: test for cyclicity
+        self.cache_dir = cache_dir
         self.G = assocmodel.ontology.get_graph()
+        self._acyclic = nx.is_directed_acyclic_graph(self.G)
+        self._assoc_df = None
         self.ics = None # Optional
-        # TODO: class x class df
-        self.ancmap = {}
-        for c in self.G.nodes():
-            self.ancmap[c] = nx.ancestors(self.G, c)
+        self.ancmap = {}  # filled on demand by _ancestors
+        self._bits = {}  # class --> reflexive ancestor bitset
+        self._profile_bits = {}  # subject --> union of class bitsets
+        self.mica_ic_df = None
+        self._mica_df = None
+        self._index_information_content()
+        self._index_profiles()
+
+    @property
+    def assoc_df(self):
+        """
+        subject x class dataframe of inferred associations, built on first use
+        """
+        if self._assoc_df is None:
+            self._assoc_df = self.assocmodel.as_dataframe()
+        return self._assoc_df
+
+    @assoc_df.setter
+    def assoc_df(self, df):
+        self._assoc_df = df
+
+    def _index_information_content(self):
+        am = self.assocmodel
+        freqs = defaultdict(int)
+        for s in am.subjects:
+            for c in am.inferred_types(s):
+                freqs[c] += 1
+        self.n_subjects = len(am.subjects)
+        self.frequencies = dict(freqs)
+        # bit i is the i-th most informative class
+        self.ic_classes = sorted(freqs.keys(), key=lambda c: (freqs[c], c))
+        self.class_bit = {c: i for (i, c) in enumerate(self.ic_classes)}
+        n = self.n_subjects
+        self.ic_values = np.array([-math.log(freqs[c] / n) / math.log(2) for c in self.ic_classes], dtype=np.float64)
+        # IC by bit index; index -1 (no common ancestor) gives 0
+        self._ic_lookup = np.append(self.ic_values, 0.0)
+        # last bit index with the same IC, for finding tied MICAs
+        self._tie_end = np.zeros(len(self.ic_classes), dtype=np.int64)
+        for i in reversed(range(len(self.ic_classes))):
+            if i + 1 < len(self.ic_classes) and self.ic_values[i + 1] == self.ic_values[i]:
+                self._tie_end[i] = self._tie_end[i + 1]
+            else:
+                self._tie_end[i] = i
+
+    def _index_profiles(self):
+        am = self.assocmodel
+        class_index = {}
+        indptr = [0]
+        indices = []
+        subjects = []
+        for s in am.subjects:
+            classes = set(am.annotations(s))
+            if len(classes) == 0:
+                continue
+            for c in classes:
+                j = class_index.get(c)
+                if j is None:
+                    j = len(class_index)
+                    class_index[c] = j
+                indices.append(j)
+            indptr.append(len(indices))
+            subjects.append(s)
+        # all classes used to describe a subject
+        self.profile_classes = list(class_index.keys())
+        self.profile_subjects = subjects
+        self._profile_indptr = np.array(indptr, dtype=np.int64)
+        self._profile_indices = np.array(indices, dtype=np.int64)
 
     def pw_score_jaccard(self, s1 : ClassId, s2 : ClassId) -> SimScore:
         """
@@ -78,34 +174,78 @@ class SemSearchEngine(SimApi):
         slice1 = df.loc[s1].values
         slice2 = df.loc[s2].values
         return 1 - cosine(slice1, slice2)
-    
+
     def calculate_all_information_content(self) -> pd.Series:
         """
         Calculate the Information Content (IC) value of every class
 
-        Sets the internal icmap cache and returns an array 
+        Sets the internal icmap cache and returns an array
 
         Return
         ------
         Series
             a pandas Series indexed by class id and with IC as value
         """
-        logger.info("Calculating all class ICs")
-        df = self.assoc_df
-        freqs = df.sum(axis=0)
-        n_subjects, _ = df.shape
-        ics = freqs.apply(lambda x: -math.log(x / n_subjects)/math.log(2))
-        self.ics = ics
-        logger.info("DONE calculating all class ICs")
-        return ics
+        self.ics = pd.Series(self.ic_values, index=self.ic_classes)
+        return self.ics
 
     def _information_content_frame(self) -> pd.Series:
-        if self.ics == None:
+        if self.ics is None:
             self.calculate_all_information_content()
         return self.ics
 
     def _ancestors(self, c1 : ClassId) -> Set[ClassId]:
-        return self.ancmap[c1]
+        ancs = self.ancmap.get(c1)
+        if ancs is None:
+            ancs = nx.ancestors(self.G, c1) if c1 in self.G else set()
+            self.ancmap[c1] = ancs
+        return ancs
+
+    def _own_bit(self, c: ClassId) -> int:
+        i = self.class_bit.get(c)
+        return 1 << i if i is not None else 0
+
+    def _ancestor_bits(self, c: ClassId) -> int:
+        """
+        Bitset of the annotated reflexive ancestors of a class
+        """
+        bits = self._bits.get(c)
+        if bits is not None:
+            return bits
+        G = self.G
+        if c not in G:
+            bits = self._own_bit(c)
+        elif not self._acyclic:
+            bits = self._own_bit(c)
+            for a in self._ancestors(c):
+                bits |= self._own_bit(a)
+        else:
+            # depth-first, computing parents before children
+            stack = [c]
+            while len(stack) > 0:
+                n = stack[-1]
+                if n in self._bits:
+                    stack.pop()
+                    continue
+                pending = [p for p in G.predecessors(n) if p not in self._bits]
+                if len(pending) > 0:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                b = self._own_bit(n)
+                for p in G.predecessors(n):
+                    b |= self._bits[p]
+                self._bits[n] = b
+            return self._bits[c]
+        self._bits[c] = bits
+        return bits
+
+    def _micas_from_bits(self, common: int) -> Set[ClassId]:
+        i = _lowest_bit(common)
+        if i < 0:
+            return set()
+        end = int(self._tie_end[i])
+        return set(self.ic_classes[j] for j in range(i, end + 1) if (common >> j) & 1)
 
     def calculate_mrcas(self, c1 : ClassId, c2 : ClassId) -> Set[ClassId]:
         """
@@ -121,98 +261,367 @@ class SemSearchEngine(SimApi):
             redundant = redundant | nx.ancestors(G, a)
         return common_ancestors - redundant
 
-    #def calculate_mrcas_ic(self, c1 : ClassId, c2 : ClassId) -> InformationContent, Set[ClassId]:
-    #    mrcas = self.calculate_mrcas(c1, c2)
-        
-    
-    def calculate_all_micas(self):
+    def _pairwise(self, rows: List[ClassId], cols: List[ClassId], jaccard=False) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        MICA bit index (-1 if none) and optionally the jaccard similarity of
+        the ancestor closures, for every pair of classes in rows x cols
+        """
+        rbits = [self._ancestor_bits(c) for c in rows]
+        cbits = [self._ancestor_bits(c) for c in cols]
+        micas = np.empty((len(rows), len(cols)), dtype=np.int64)
+        sims = None
+        if jaccard:
+            sims = np.zeros((len(rows), len(cols)), dtype=np.float64)
+            ccounts = [_popcount(y) for y in cbits]
+        for (i, x) in enumerate(rbits):
+            commons = [x & y for y in cbits]
+            micas[i] = [_lowest_bit(z) for z in commons]
+            if jaccard:
+                xcount = _popcount(x)
+                for (j, z) in enumerate(commons):
+                    if z:
+                        shared = _popcount(z)
+                        sims[i, j] = shared / (xcount + ccounts[j] - shared)
+        return (micas, sims)
+
+    def calculate_all_micas(self, classes: Optional[List[ClassId]] = None):
         """
         Calculate the MICA (Most Informative Common Ancestor) of every class-pair
+
+        Sets mica_ic_df (IC of the MICA) and mica_df (the set of MICAs, computed
+        on first access) as classes x classes dataframes.
+
+        Arguments
+        ---------
+        classes : list
+            classes to compare; defaults to all classes used in subject profiles
         """
-        G = self.G
-        ics = self._information_content_frame()
-        classes = list(dfs.dfs_preorder_nodes(G))
-        #mica_df = pd.DataFrame(index=classes, columns=classes)
-        #mica_ic_df = pd.DataFrame(index=classes, columns=classes)
+        if classes is None:
+            classes = self.profile_classes
+        classes = list(classes)
         ncs = len(classes)
-        ic_grid = np.empty([ncs,ncs])
-        mica_arrs = []
-        logger.info('Calculating ICs for {} x {} classes'.format(ncs, ncs))
-        for c1i in range(0,ncs):
-            c1 = classes[c1i]
-            logger.debug('Calculating ICs for {}'.format(c1))
-            ancs1r = self._ancestors(c1) | {c1}
-            c2i = 0
-            mica_arr = []            
-            for c2i in range(0,ncs):
-                c2 = classes[c2i]
-                # TODO: optimize; matrix is symmetrical
-                #if c1i > c2i:
-                #    continue
-                ancs2r = self._ancestors(c2) | {c2}
-                common_ancs = ancs1r & ancs2r
-                if len(common_ancs) > 0:
-                    ic_cas = ics.loc[common_ancs]
-                    max_ic = float(ic_cas.max())
-                    ic_micas = ic_cas[ic_cas >= max_ic]
-                    micas = set(ic_micas.index)
-                    mica_arr.append(micas)
-                    #mica_grid[c1i, c2i] = micas
-                    #mica_grid[c2i, c1i] = micas
-                    ic_grid[c1i, c2i] = max_ic
-                    #ic_grid[c2i, c1i] = max_ic
-                else:
-                    ic_grid[c1i, c2i] = 0
-                    mica_arr.append(set())
-                    #ic_grid[c2i, c1i] = 0
-                    # TODO: consider optimization step; blank out all anc pairs
-            mica_arrs.append(mica_arr)
-        logger.info('DONE Calculating ICs for {} x {} classes'.format(ncs, ncs))
-        #self.mica_df = pd.DataFrame(mica_grid, index=classes, columns=classes)
-        self.mica_df = pd.DataFrame(mica_arrs, index=classes, columns=classes)
-        self.mica_ic_df = pd.DataFrame(ic_grid, index=classes, columns=classes)
+        logger.info('Calculating MICAs for {} x {} classes'.format(ncs, ncs))
+        path = None
+        micas = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, 'mica-{}.npz'.format(self._mica_cache_key(classes)))
+            if os.path.exists(path):
+                logger.info('Loading MICAs from {}'.format(path))
+                with np.load(path) as data:
+                    micas = data['mica']
+        if micas is None:
+            (micas, _) = self._pairwise(classes, classes)
+            if path is not None:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                np.savez_compressed(path, mica=micas)
+        logger.info('DONE Calculating MICAs for {} x {} classes'.format(ncs, ncs))
+        self.mica_ic_df = pd.DataFrame(self._ic_lookup[micas], index=classes, columns=classes)
+        self._mica_df = None
+
+    def _mica_cache_key(self, classes: List[ClassId]) -> str:
+        h = hashlib.sha1()
+        for c in self.ic_classes:
+            h.update('{}\t{}\n'.format(c, self.frequencies[c]).encode('utf-8'))
+        h.update(b'\n')
+        for c in classes:
+            h.update('{}\t{:x}\n'.format(c, self._ancestor_bits(c)).encode('utf-8'))
+        return h.hexdigest()
+
+    @property
+    def mica_df(self):
+        """
+        classes x classes dataframe of MICA sets, for the classes in mica_ic_df
+        """
+        if self._mica_df is None and self.mica_ic_df is not None:
+            classes = list(self.mica_ic_df.index)
+            bits = [self._ancestor_bits(c) for c in classes]
+            rows = [[self._micas_from_bits(x & y) for y in bits] for x in bits]
+            self._mica_df = pd.DataFrame(rows, index=classes, columns=classes)
+        return self._mica_df
 
     def pw_score_resnik_bestmatches(self, s1: SubjectId, s2: SubjectId) -> Tuple[ICValue, ICValue, ICValue]:
         am = self.assocmodel
         return self.pw_compare_class_sets(am.annotations(s1), am.annotations(s2))
-        
+
     def pw_compare_class_sets(self, cset1: Set[ClassId], cset2: Set[ClassId]) -> Tuple[ICValue, ICValue, ICValue]:
         """
         Compare two class profiles
         """
-        pairs = self.mica_ic_df.loc[cset1, cset2]
+        cset1 = list(cset1)
+        cset2 = list(cset2)
+        df = self.mica_ic_df
+        if df is not None and all(c in df.index for c in cset1 + cset2):
+            pairs = df.loc[cset1, cset2].values
+        else:
+            (micas, _) = self._pairwise(cset1, cset2)
+            pairs = self._ic_lookup[micas]
         max0 = pairs.max(axis=0)
         max1 = pairs.max(axis=1)
-        idxmax0 = pairs.idxmax(axis=0)
-        idxmax1 = pairs.idxmax(axis=1)
         mean0 = max0.mean()
         mean1 = max1.mean()
         return (mean0+mean1)/2, mean0, mean1
-        #return (mean0+mean1)/2, mean0, mean1, idxmax0, idxmax1
+
+    def _resolve(self, ids: Iterable[str]) -> Tuple[List[ClassId], List[str]]:
+        """
+        Classes for a list of class or subject ids, and the ids that are neither
+        """
+        classes = []
+        unresolved = []
+        for i in ids:
+            if i in self.G or i in self.class_bit:
+                classes.append(i)
+            elif i in self.assocmodel.association_map:
+                classes.extend(self.assocmodel.annotations(i))
+            else:
+                unresolved.append(i)
+        return (list(dict.fromkeys(classes)), unresolved)
+
+    def _subject_bits(self, s: SubjectId) -> int:
+        bits = self._profile_bits.get(s)
+        if bits is None:
+            bits = 0
+            for c in self.assocmodel.annotations(s):
+                bits |= self._ancestor_bits(c)
+            self._profile_bits[s] = bits
+        return bits
+
+    def _score_profiles(self,
+                        query: List[ClassId],
+                        cols: List[ClassId],
+                        indptr: np.ndarray,
+                        indices: np.ndarray,
+                        method: SimAlgorithm) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Scores a query profile against many target profiles in one pass
+
+        Target profiles are given in compressed form: profile k is the
+        classes cols[indices[indptr[k]:indptr[k+1]]]; each must be non-empty.
+
+        Returns the score of each profile, and the query x cols MICA bit indices
+        """
+        (micas, sims) = self._pairwise(query, cols, jaccard=(method != SimAlgorithm.RESNIK and
+                                                             method != SimAlgorithm.SYMMETRIC_RESNIK))
+        nprofiles = len(indptr) - 1
+        if nprofiles == 0 or len(query) == 0:
+            return (np.zeros(nprofiles), micas)
+        starts = indptr[:-1]
+        sizes = np.diff(indptr)
+        if method == SimAlgorithm.JACCARD:
+            qbits = 0
+            for c in query:
+                qbits |= self._ancestor_bits(c)
+            qcount = _popcount(qbits)
+            scores = np.zeros(nprofiles)
+            for k in range(nprofiles):
+                tbits = 0
+                for j in indices[indptr[k]:indptr[k+1]]:
+                    tbits |= self._ancestor_bits(cols[j])
+                union = qcount + _popcount(tbits) - _popcount(qbits & tbits)
+                scores[k] = _popcount(qbits & tbits) / union if union > 0 else 0.0
+            return (scores, micas)
+        pair_scores = self._ic_lookup[micas]
+        if method == SimAlgorithm.PHENODIGM:
+            pair_scores = np.sqrt(pair_scores * sims)
+        # best match in each profile for each query class
+        query_best = np.maximum.reduceat(pair_scores[:, indices], starts, axis=1)
+        forward = query_best.mean(axis=0)
+        if method == SimAlgorithm.RESNIK:
+            return (forward, micas)
+        # best match in the query for each profile class
+        target_best = pair_scores.max(axis=0)[indices]
+        backward = np.add.reduceat(target_best, starts) / sizes
+        return ((forward + backward) / 2, micas)
+
+    def _icnode(self, c: ClassId) -> ICNode:
+        i = self.class_bit.get(c)
+        ic = float(self.ic_values[i]) if i is not None else None
+        return ICNode(id=c, label=self.assocmodel.ontology.label(c), IC=ic)
+
+    def _pairwise_matches(self, query: List[ClassId], targets: List[ClassId], micas: np.ndarray) -> List[PairwiseMatch]:
+        """
+        Best matching target class for each query class, with their MICA
+
+        micas is the query x targets array of MICA bit indices
+        """
+        matches = []
+        ics = self._ic_lookup[micas]
+        for (i, q) in enumerate(query):
+            j = int(np.argmax(ics[i]))
+            b = int(micas[i, j])
+            if b < 0:
+                continue
+            matches.append(PairwiseMatch(reference=self._icnode(q),
+                                         match=self._icnode(targets[j]),
+                                         lcs=self._icnode(self.ic_classes[b])))
+        return matches
+
+    def _metadata(self) -> SimMetadata:
+        max_ic = float(self.ic_values.max()) if len(self.ic_values) > 0 else 0.0
+        return SimMetadata(max_max_ic=max_ic)
+
+    def _nodes(self, ids: Iterable[str]) -> List[Node]:
+        return [Node(id=i, label=self.assocmodel.label(i)) for i in ids]
 
     def search(self,
-               id_list: Set,
-               negated_classes: Set,
-               method: Optional) -> List[SimResult]:
+               id_list: Iterable,
+               negated_classes: Iterable,
+               limit: Optional[int] = 100,
+               method: Optional[SimAlgorithm] = SimAlgorithm.PHENODIGM) -> SimResult:
+        """
+        Rank all subjects of the association set by similarity to a profile
+
+        Arguments
+        ---------
+        id_list : list
+            class ids, or subject ids standing for their annotations
+        negated_classes : list
+            subjects inferred to have any of these classes are excluded
+        limit : int
+            maximum number of matches
+        method : SimAlgorithm
+            one of matchers()
+        """
+        return self._search(id_list, negated_classes, limit, method)
+
+    def _search(self,
+                id_list: Iterable,
+                negated_classes: Iterable,
+                limit: Optional[int],
+                method: SimAlgorithm,
+                allowed: Optional[np.ndarray] = None) -> SimResult:
+        """
+        search, restricted to the profile_subjects for which allowed is True
+        """
+        if method not in self.matchers():
+            raise NotImplementedError("{} not implemented".format(method))
+        id_list = list(id_list)
+        negated_classes = list(negated_classes)
+        (query, unresolved) = self._resolve(id_list)
+        if allowed is None:
+            allowed = np.ones(len(self.profile_subjects), dtype=bool)
+        if len(negated_classes) > 0:
+            allowed = allowed & ~self._negated_mask(negated_classes)
+        ranked = self._rank_subjects(query, limit, method, allowed)
+
+        matches = []
+        rank = 0
+        previous_score = None
+        for (k, score) in ranked:
+            if previous_score is None or score < previous_score:
+                rank += 1
+            previous_score = score
+            s = self.profile_subjects[k]
+            targets = list(dict.fromkeys(self.assocmodel.annotations(s)))
+            (micas, _) = self._pairwise(query, targets)
+            matches.append(SimMatch(id=s,
+                                    label=self.assocmodel.label(s),
+                                    rank=rank,
+                                    score=score,
+                                    significance="NaN",
+                                    pairwise_match=self._pairwise_matches(query, targets, micas)))
+        return SimResult(
+            query=SimQuery(
+                ids=self._nodes(id_list),
+                negated_ids=self._nodes(negated_classes),
+                unresolved_ids=unresolved,
+                target_ids=[[]]
+            ),
+            matches=matches,
+            metadata=self._metadata()
+        )
+
+    def _negated_mask(self, negated_classes: List[ClassId]) -> np.ndarray:
+        """
+        True for each of the profile_subjects inferred to have any of the classes
         """
-        def search(self, cset: Set[ClassId]):
-            slice = self.mica_ic_df.loc[cset]
-            am = self.assocmodel
-            for i in am.subjects:
-                pass # TODO
+        negated_bits = 0
+        for c in negated_classes:
+            negated_bits |= self._own_bit(c)
+        return np.array([bool(self._subject_bits(s) & negated_bits) for s in self.profile_subjects], dtype=bool)
+
+    def _rank_subjects(self,
+                       query: List[ClassId],
+                       limit: Optional[int],
+                       method: SimAlgorithm,
+                       allowed: np.ndarray) -> List[Tuple[int, float]]:
+        """
+        Top (index into profile_subjects, score) pairs, best first, ties ordered by subject id
         """
-        raise NotImplementedError
+        (scores, _) = self._score_profiles(query, self.profile_classes, self._profile_indptr,
+                                           self._profile_indices, method)
+        ranked = sorted(np.flatnonzero(allowed), key=lambda k: (-scores[k], self.profile_subjects[k]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [(int(k), float(scores[k])) for k in ranked]
 
     def compare(self,
-                query_classes: Set,
-                reference_classes: Set,
-                method: Optional) -> SimResult:
+                reference_classes: Iterable,
+                query_classes: Iterable,
+                method: Optional[SimAlgorithm] = SimAlgorithm.PHENODIGM) -> SimResult:
         """
         Given two lists of entites (classes, individual)
         return their similarity
+
+        Asymmetric scores (resnik) are of the reference profile against the query profile
+        """
+        return self.compare_profiles(reference_classes, [query_classes], method)
+
+    def compare_profiles(self,
+                         reference_classes: Iterable,
+                         query_profiles: Iterable[Iterable],
+                         method: Optional[SimAlgorithm] = SimAlgorithm.PHENODIGM) -> SimResult:
         """
-        raise NotImplementedError
+        Compare a reference profile with many query profiles in one pass
+
+        Returns one match per query profile, in order
+        """
+        if method not in self.matchers():
+            raise NotImplementedError("{} not implemented".format(method))
+        reference_classes = list(reference_classes)
+        query_profiles = [list(p) for p in query_profiles]
+        (reference, unresolved) = self._resolve(reference_classes)
+        class_index = {}
+        indptr = [0]
+        indices = []
+        scored = []  # positions of profiles with at least one resolved class
+        for (k, profile) in enumerate(query_profiles):
+            (targets, unresolved_targets) = self._resolve(profile)
+            unresolved.extend(unresolved_targets)
+            if len(targets) == 0:
+                continue
+            for c in targets:
+                indices.append(class_index.setdefault(c, len(class_index)))
+            indptr.append(len(indices))
+            scored.append(k)
+        cols = list(class_index.keys())
+        indptr = np.array(indptr, dtype=np.int64)
+        indices = np.array(indices, dtype=np.int64)
+        (scores, micas) = self._score_profiles(reference, cols, indptr, indices, method)
+
+        matches = [SimMatch(id="", label="", rank="NaN", score=0.0, significance="NaN")
+                   for _ in query_profiles]
+        for (n, k) in enumerate(scored):
+            js = indices[indptr[n]:indptr[n+1]]
+            matches[k].score = float(scores[n])
+            matches[k].pairwise_match = self._pairwise_matches(reference, [cols[j] for j in js], micas[:, js])
+        return SimResult(
+            query=SimQuery(
+                ids=self._nodes(reference_classes),
+                unresolved_ids=unresolved,
+                target_ids=[self._nodes(profile) for profile in query_profiles]
+            ),
+            matches=matches,
+            metadata=self._metadata()
+        )
 
     @staticmethod
-    def matchers() -> List:
-        raise NotImplementedError
+    def matchers() -> List[SimAlgorithm]:
+        """
+        Matchers in the local engine
+        """
+        return [
+            SimAlgorithm.PHENODIGM,
+            SimAlgorithm.JACCARD,
+            SimAlgorithm.RESNIK,
+            SimAlgorithm.SYMMETRIC_RESNIK
+        ]
@@ -2,9 +2,13 @@ from ontobio.sim.api.interfaces import SimApi
 from typing import Iterable, Collection, Union, Optional, List
 from ontobio.model.similarity import SimResult, TypedNode
 from ontobio.vocabulary.similarity import SimAlgorithm
-from ontobio.sim.api.interfaces import FilteredSearchable
+from ontobio.sim.api.interfaces import FilteredSearchable, BatchComparable
 from ontobio.golr.golr_associations import get_objects_for_subject
-from ontobio.util.scigraph_util import get_id_type_map, typed_node_from_id
+from ontobio.util.scigraph_util import get_id_type_map, typed_nodes_from_ids
+from concurrent.futures import ThreadPoolExecutor
+
+# maximum concurrent comparisons against a remote sim api
+COMPARE_WORKERS = 8
 
 
 class PhenoSimEngine():
@@ -15,8 +19,14 @@ class PhenoSimEngine():
     are resolved to a list of phenotypes
     """
 
-    def __init__(self, sim_api: SimApi):
+    def __init__(self, sim_api: SimApi, max_workers: int = COMPARE_WORKERS):
+        """
+        :param sim_api: similarity API
+        :param max_workers: maximum number of concurrent calls to sim_api
+                            (and to resolve profiles) in compare
+        """
         self.sim_api = sim_api
+        self.max_workers = max_workers
 
     def search(
             self,
@@ -91,41 +101,55 @@ class PhenoSimEngine():
             raise NotImplementedError("Sim method not implemented "
                                       "in {}".format(str(self.sim_api)))
 
-        is_first_result = True
-        comparisons = None
+        query_profiles = [list(query_profile) for query_profile in query_profiles]
 
-        if is_feature_set:
-            reference_phenos = reference_ids
-        else:
-            reference_phenos = PhenoSimEngine._resolve_nodes_to_phenotypes(reference_ids)
-        for query_profile in query_profiles:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             if is_feature_set:
-                query_phenos = query_profile
+                reference_phenos = reference_ids
+                query_phenos_list = query_profiles
             else:
-                query_phenos = PhenoSimEngine._resolve_nodes_to_phenotypes(query_profile)
+                reference_phenos = PhenoSimEngine._resolve_nodes_to_phenotypes(reference_ids)
+                query_phenos_list = list(executor.map(PhenoSimEngine._resolve_nodes_to_phenotypes,
+                                                      query_profiles))
 
-            sim_result = self.sim_api.compare(reference_phenos, query_phenos, method)
+            if isinstance(self.sim_api, BatchComparable):
+                comparisons = self.sim_api.compare_profiles(reference_phenos, query_phenos_list, method)
+                sim_results = None
+            else:
+                sim_results = list(executor.map(
+                    lambda query_phenos: self.sim_api.compare(reference_phenos, query_phenos, method),
+                    query_phenos_list
+                ))
+
+        # Resolve all single id profiles, and the reference, in one scigraph query
+        single_ids = [query_profile[0] for query_profile in query_profiles if len(query_profile) == 1]
+        if len(reference_ids) == 1:
+            single_ids.append(reference_ids[0])
+        typed_nodes = typed_nodes_from_ids(single_ids)
+
+        if sim_results is not None:
+            comparisons = None
+            for sim_result in sim_results:
+                if comparisons is None:
+                    comparisons = sim_result
+                else:
+                    comparisons.matches.append(sim_result.matches[0])
+                    comparisons.query.target_ids.append(sim_result.query.target_ids[0])
+
+        for (query_profile, match) in zip(query_profiles, comparisons.matches):
             if len(query_profile) > 1:
                 id = " + ".join(query_profile)
-                sim_result.matches[0].id = id
-                sim_result.matches[0].label = id
-            else:
-                node = typed_node_from_id(query_profile[0])
-                if sim_result.matches:
-                    sim_result.matches[0].id = node.id
-                    sim_result.matches[0].label = node.label
-                    sim_result.matches[0].type = node.type
-                    sim_result.matches[0].taxon = node.taxon
-
-            if is_first_result:
-                comparisons = sim_result
-                is_first_result = False
-            else:
-                comparisons.matches.append(sim_result.matches[0])
-                comparisons.query.target_ids.append(sim_result.query.target_ids[0])
+                match.id = id
+                match.label = id
+            elif query_profile[0] in typed_nodes:
+                node = typed_nodes[query_profile[0]]
+                match.id = node.id
+                match.label = node.label
+                match.type = node.type
+                match.taxon = node.taxon
 
         if len(reference_ids) == 1:
-            comparisons.query.reference = typed_node_from_id(reference_ids[0])
+            comparisons.query.reference = typed_nodes.get(reference_ids[0])
         else:
             reference_id = " + ".join(reference_ids)
             comparisons.query.reference = TypedNode(
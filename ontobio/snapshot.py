@@ -0,0 +1,284 @@
+"""
+Binary snapshots of parsed ontologies
+
+A snapshot holds the contents of a :class:`CompactOntology` - the interned
+node and relation tables, edge arrays, labels and node metadata - in a
+single file that is memory-mapped on load. Loading a snapshot avoids
+re-parsing obographs JSON, and processes that load the same snapshot share
+the same physical pages.
+
+Snapshots are keyed by the checksum of the source file, e.g.
+
+::
+
+    ont = OntologyFactory().create('go.json', snapshot=True)
+
+will parse go.json and write ``<tmpdir>/<sha256 of go.json>.ontobio.bin`` the
+first time, and load from the snapshot subsequently.
+
+File layout: an 8 byte magic string, an 8 byte little-endian header length,
+a JSON header, then 64-byte aligned array blocks described by the header.
+Node metadata columns are stored as one JSON document per node, and are
+only decoded when accessed.
+
+See also:
+
+ - compact_ontol.py
+ - ontol_factory.py
+
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import numpy as np
+import networkx as nx
+import logging
+
+from ontobio.compact_ontol import CompactGraph, CompactOntology
+from ontobio.ontol import LogicalDefinition, PropertyChainAxiom
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'ONTOBIO\x01'
+VERSION = 1
+SUFFIX = '.ontobio.bin'
+ALIGN = 64
+
+# Load options of obograph_util.convert_json_file that change the loaded graph, with their defaults
+LOAD_OPTIONS = {'node_type': None, 'predicates': None, 'parse_meta': True, 'reverse_edges': True}
+
+
+def snapshot_key(checksum, **load_args):
+    """
+    Return the key of the snapshot of a source file, loaded with load_args
+
+    The key covers the checksum of the source file, the snapshot format VERSION, and
+    the load options that change the loaded graph (LOAD_OPTIONS), so loading the same
+    file with other options creates another snapshot
+    """
+    options = {k: load_args.get(k, default) for (k, default) in LOAD_OPTIONS.items()}
+    if options['predicates'] is not None:
+        options['predicates'] = sorted(options['predicates'])
+    key = json.dumps({'checksum': checksum, 'version': VERSION, 'options': options}, sort_keys=True, default=str)
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def snapshot_path(key, snapshot_dir=None):
+    """
+    Return path of the snapshot for a key, see `snapshot_key`
+    """
+    if snapshot_dir is None:
+        snapshot_dir = tempfile.gettempdir()
+    return os.path.join(snapshot_dir, key + SUFFIX)
+
+
+class SnapshotColumn():
+    """
+    Read-only mapping from integer node id to a JSON-decoded value, backed by mapped arrays.
+
+    Values that are set after loading are held in memory and take precedence.
+    """
+
+    def __init__(self, nodes, offsets, data):
+        self.nodes = nodes
+        self.offsets = offsets
+        self.data = data
+        self.overrides = {}
+
+    def _find(self, i):
+        k = np.searchsorted(self.nodes, i)
+        if k < len(self.nodes) and self.nodes[k] == i:
+            return k
+        return None
+
+    def _decode(self, k):
+        return json.loads(self.data[self.offsets[k]:self.offsets[k+1]].tobytes())
+
+    def get(self, i, default=None):
+        if i in self.overrides:
+            return self.overrides[i]
+        k = self._find(i)
+        if k is None:
+            return default
+        return self._decode(k)
+
+    def __getitem__(self, i):
+        v = self.get(i, self)
+        if v is self:
+            raise KeyError(i)
+        return v
+
+    def __setitem__(self, i, v):
+        self.overrides[i] = v
+
+    def __contains__(self, i):
+        return i in self.overrides or self._find(i) is not None
+
+    def keys(self):
+        ks = set(self.nodes.tolist())
+        ks.update(self.overrides.keys())
+        return sorted(ks)
+
+    def items(self):
+        for i in self.keys():
+            yield i, self[i]
+
+    def __len__(self):
+        return len(self.keys())
+
+
+def _encode_strings(strs):
+    data = bytearray()
+    offsets = [0]
+    for s in strs:
+        data += s.encode('utf-8')
+        offsets.append(len(data))
+    return np.frombuffer(bytes(data), dtype=np.uint8), np.array(offsets, dtype=np.int64)
+
+
+def _decode_strings(data, offsets):
+    buf = data.tobytes()
+    offsets = offsets.tolist()
+    return [buf[offsets[k]:offsets[k+1]].decode('utf-8') for k in range(len(offsets) - 1)]
+
+
+def write_snapshot(ont, path, checksum=None):
+    """
+    Write an ontology to a snapshot file
+
+    The file is written to a temporary name and then renamed, so concurrent
+    readers never see a partial snapshot.
+
+    Arguments
+    ---------
+    ont : Ontology
+        ontology to write; converted to a :class:`CompactOntology` if required
+    path : str
+        file to write
+    checksum : str
+        checksum of the source file, recorded in the header
+    """
+    if not isinstance(ont, CompactOntology):
+        compact = CompactOntology(handle=ont.handle, id=ont.id, graph=ont.get_graph(),
+                                  xref_graph=ont.xref_graph, meta=ont.meta)
+        compact.all_logical_definitions = ont.all_logical_definitions
+        compact.all_property_chain_axioms = ont.all_property_chain_axioms
+        ont = compact
+    cg = ont.graph
+    arrays = {}
+    arrays['ids.data'], arrays['ids.offsets'] = _encode_strings(cg.ids)
+    arrays['labels.data'], arrays['labels.offsets'] = _encode_strings([l or '' for l in cg.labels])
+    arrays['labels.present'] = np.array([l is not None for l in cg.labels], dtype=np.bool_)
+    types = sorted({t for t in cg.types if t is not None})
+    type_index = {t: k for k, t in enumerate(types)}
+    arrays['types'] = np.array([type_index.get(t, -1) for t in cg.types], dtype=np.int16)
+    src, dst, pred = cg.edge_arrays()
+    arrays['edges.src'], arrays['edges.dst'], arrays['edges.pred'] = src, dst, pred
+    meta_keys = sorted(cg.meta.keys())
+    for k in meta_keys:
+        items = sorted(cg.meta[k].items())
+        arrays['meta.{}.nodes'.format(k)] = np.array([i for i, _ in items], dtype=np.int32)
+        data, offsets = _encode_strings([json.dumps(v) for _, v in items])
+        arrays['meta.{}.data'.format(k)], arrays['meta.{}.offsets'.format(k)] = data, offsets
+    xg = ont.xref_graph
+    xref_edges = [] if xg is None else ["{}\t{}\t{}".format(u, v, d.get('source', ''))
+                                        for (u, v, d) in xg.edges(data=True)]
+    arrays['xrefs.data'], arrays['xrefs.offsets'] = _encode_strings(xref_edges)
+
+    header = {
+        'version': VERSION,
+        'checksum': checksum,
+        'id': ont.id,
+        'handle': ont.handle,
+        'meta': ont.meta,
+        'types': types,
+        'preds': cg.preds,
+        'meta_keys': meta_keys,
+        'has_xref_graph': xg is not None,
+        'logical_definitions': [[ld.class_id, ld.genus_ids, ld.restrictions]
+                                for ld in ont.all_logical_definitions or []],
+        'property_chain_axioms': [pca.as_dict() for pca in ont.all_property_chain_axioms or []],
+        'arrays': {}
+    }
+    offset = 0
+    for name, a in arrays.items():
+        a = np.ascontiguousarray(a)
+        arrays[name] = a
+        header['arrays'][name] = {'offset': offset, 'dtype': a.dtype.str, 'length': len(a)}
+        offset += -(-a.nbytes // ALIGN) * ALIGN
+    header_bytes = json.dumps(header).encode('utf-8')
+    start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGN) * ALIGN
+
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for name, a in arrays.items():
+            f.seek(start + header['arrays'][name]['offset'])
+            f.write(a.tobytes())
+        f.truncate(start + offset)
+    os.replace(tmp_path, path)
+    logger.info("Wrote snapshot: {}".format(path))
+
+
+def read_snapshot(path):
+    """
+    Load an ontology from a snapshot file
+
+    Arrays are memory-mapped read-only; node metadata is decoded on access.
+
+    Returns
+    -------
+    CompactOntology
+    """
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not an ontobio snapshot: {}".format(path))
+    (header_len,) = struct.unpack('<Q', mm[len(MAGIC):len(MAGIC)+8])
+    header_start = len(MAGIC) + 8
+    header = json.loads(mm[header_start:header_start+header_len].decode('utf-8'))
+    if header['version'] != VERSION:
+        raise ValueError("Unsupported snapshot version {} in {}".format(header['version'], path))
+    start = -(-(header_start + header_len) // ALIGN) * ALIGN
+
+    def arr(name):
+        spec = header['arrays'][name]
+        return np.frombuffer(mm, dtype=np.dtype(spec['dtype']), count=spec['length'],
+                             offset=start + spec['offset'])
+
+    cg = CompactGraph()
+    cg.ids = _decode_strings(arr('ids.data'), arr('ids.offsets'))
+    cg.id_index = {n: i for i, n in enumerate(cg.ids)}
+    labels = _decode_strings(arr('labels.data'), arr('labels.offsets'))
+    cg.labels = [l if present else None for (l, present) in zip(labels, arr('labels.present').tolist())]
+    types = header['types']
+    cg.types = [types[t] if t >= 0 else None for t in arr('types').tolist()]
+    cg.preds = header['preds']
+    cg.pred_index = {p: k for k, p in enumerate(cg.preds)}
+    cg.src, cg.dst, cg.pred = arr('edges.src'), arr('edges.dst'), arr('edges.pred')
+    for k in header['meta_keys']:
+        cg.meta[k] = SnapshotColumn(arr('meta.{}.nodes'.format(k)),
+                                    arr('meta.{}.offsets'.format(k)),
+                                    arr('meta.{}.data'.format(k)))
+
+    def xref_graph():
+        xg = nx.MultiGraph()
+        for line in _decode_strings(arr('xrefs.data'), arr('xrefs.offsets')):
+            (u, v, source) = line.split('\t')
+            xg.add_edge(u, v, source=source)
+        return xg
+
+    ont = CompactOntology(handle=header['handle'], id=header['id'], graph=cg, meta=header['meta'])
+    ont.xref_graph = xref_graph if header['has_xref_graph'] else None
+    ont.all_logical_definitions = [LogicalDefinition(c, g, [tuple(r) for r in rs])
+                                   for (c, g, rs) in header['logical_definitions']]
+    ont.all_property_chain_axioms = [PropertyChainAxiom(d['predicateId'], d['chainPredicateIds'])
+                                     for d in header['property_chain_axioms']]
+    logger.info("Loaded snapshot: {}".format(path))
+    return ont
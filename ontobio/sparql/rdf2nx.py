@@ -6,7 +6,7 @@ from rdflib.namespace import OWL
 from rdflib import URIRef
 import networkx
 
-from prefixcommons.curie_util import contract_uri
+from ontobio.util.curie_contractor import contract_uri
 from ontobio.ontol import LogicalDefinition
 from ontobio.ontol import Ontology
 import ontobio.ontol
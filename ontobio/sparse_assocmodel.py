@@ -0,0 +1,298 @@
+"""Sparse matrix backed association model
+
+SparseAssociationSet is a drop-in alternative to AssociationSet that
+stores the inferred (reflexive ancestor) annotations as a boolean
+scipy.sparse CSR matrix of subjects x classes, rather than as a
+dictionary of python sets.
+
+For large association sets (e.g. all GO annotations for a species) this
+is considerably more compact, and allows the bulk operations to be
+expressed as matrix operations:
+
+ - enrichment counts are column sums over subject rows
+ - term intersections and subject similarity are sparse dot products
+
+Create via the assoc_factory, e.g.
+
+::
+
+    afactory = AssociationSetFactory()
+    aset = afactory.create(ontology=ont, subject_category='gene', object_category='function', taxon=MOUSE, sparse=True)
+
+"""
+import logging
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+import scipy.sparse
+
+from ontobio.assocmodel import AssociationSet
+
+logger = logging.getLogger(__name__)
+
+
+class InferredMapView(Mapping):
+    """
+    Read-only dict-like view of a SparseAssociationSet, mapping each subject
+    to its set of inferred classes.
+
+    Sets are decoded from matrix rows on access; nothing is cached.
+    """
+
+    def __init__(self, aset):
+        self.aset = aset
+
+    def __getitem__(self, subj):
+        i = self.aset.subject_index[subj]
+        return self.aset._row_types(i)
+
+    def __contains__(self, subj):
+        return subj in self.aset.subject_index
+
+    def __iter__(self):
+        return iter(self.aset.subjects)
+
+    def __len__(self):
+        return len(self.aset.subjects)
+
+
+class SparseAssociationSet(AssociationSet):
+    """
+    An AssociationSet backed by a sparse boolean subject x class matrix.
+
+    Public methods and their results are the same as for AssociationSet.
+    """
+
+    def index(self):
+        """
+        Creates the inferred annotation matrix.
+
+        You do not need to call this yourself; called on initialization
+        """
+        if self.association_map is None:
+            self.association_map = {}
+        self.subjects = list(self.association_map.keys())
+        self.subject_index = {s: i for (i, s) in enumerate(self.subjects)}
+
+        logger.info("Indexing {} items".format(len(self.subjects)))
+        # ancestors are computed once per distinct directly annotated class
+        anc_cache = {}
+        class_index = {}
+        indptr = [0]
+        indices = []
+        for subj in self.subjects:
+            terms = list(set(self.association_map[subj]))
+            self.association_map[subj] = terms
+            cols = set()
+            for term in terms:
+                term_cols = anc_cache.get(term)
+                if term_cols is None:
+                    ancs = set(self.ontology.ancestors(term)) if self.ontology is not None else set()
+                    ancs.add(term)
+                    term_cols = []
+                    for a in ancs:
+                        j = class_index.get(a)
+                        if j is None:
+                            j = len(class_index)
+                            class_index[a] = j
+                        term_cols.append(j)
+                    anc_cache[term] = term_cols
+                cols.update(term_cols)
+            indices.extend(sorted(cols))
+            indptr.append(len(indices))
+
+        self.classes = [None] * len(class_index)
+        for (c, j) in class_index.items():
+            self.classes[j] = c
+        self.class_index = class_index
+        data = np.ones(len(indices), dtype=bool)
+        self.matrix = scipy.sparse.csr_matrix((data, np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+                                              shape=(len(self.subjects), len(self.classes)))
+        self._csc = None
+        self.objects = set(self.classes)
+        self.subject_to_inferred_map = InferredMapView(self)
+        logger.info("Indexed {} inferred annotations over {} classes".format(self.matrix.nnz, len(self.classes)))
+
+    def __str__(self):
+        return "SparseAssocSet |S|={} |S->I|={}".format(len(self.subjects), self.matrix.nnz)
+
+    @property
+    def csc(self):
+        """
+        Column (class) oriented copy of the matrix, built on first use
+        """
+        if self._csc is None:
+            self._csc = self.matrix.tocsc()
+        return self._csc
+
+    def _row_types(self, i):
+        m = self.matrix
+        return set(self.classes[j] for j in m.indices[m.indptr[i]:m.indptr[i+1]])
+
+    def _column_subjects(self, cls):
+        j = self.class_index.get(cls)
+        if j is None:
+            return set()
+        m = self.csc
+        return set(self.subjects[i] for i in m.indices[m.indptr[j]:m.indptr[j+1]])
+
+    def _subject_rows(self, subjects):
+        return [self.subject_index[s] for s in subjects if s in self.subject_index]
+
+    def _class_columns(self, classes):
+        return [self.class_index[c] for c in classes if c in self.class_index]
+
+    def _column_vector(self, classes):
+        # dense 0/1 indicator over classes
+        v = np.zeros(len(self.classes), dtype=np.int32)
+        v[self._class_columns(classes)] = 1
+        return v
+
+    def inferred_types(self, subj):
+        i = self.subject_index.get(subj)
+        if i is not None:
+            return self._row_types(i)
+        return super().inferred_types(subj)
+
+    def query(self, terms=None, negated_terms=None):
+        if terms is None:
+            terms = []
+        if negated_terms is None:
+            negated_terms = []
+        termset = set(terms)
+        n = len(self.subjects)
+        if 'owl:Thing' in termset or len(termset) == 0:
+            mask = np.ones(n, dtype=bool)
+        elif any(t not in self.class_index for t in termset):
+            mask = np.zeros(n, dtype=bool)
+        else:
+            mask = self.matrix.dot(self._column_vector(termset)) == len(termset)
+        if len(negated_terms) > 0:
+            mask &= self.matrix.dot(self._column_vector(negated_terms)) == 0
+        return [self.subjects[i] for i in np.flatnonzero(mask)]
+
+    def query_intersections(self, x_terms=None, y_terms=None, symmetric=False):
+        if x_terms is None:
+            x_terms = []
+        if y_terms is None:
+            y_terms = []
+        x_terms = list(x_terms)
+        y_terms = list(y_terms)
+        csc = self.csc
+        col_counts = np.asarray(csc.sum(axis=0)).ravel()
+
+        def submatrix(terms):
+            # subjects x terms, with an empty column for classes with no annotations
+            cols = [self.class_index.get(t, -1) for t in terms]
+            present = [j for j in cols if j >= 0]
+            sel = scipy.sparse.csc_matrix((len(self.subjects), len(terms)), dtype=np.int32)
+            if len(present) > 0:
+                picker = scipy.sparse.csr_matrix((np.ones(len(present), dtype=np.int32),
+                                                  (present, [k for (k, j) in enumerate(cols) if j >= 0])),
+                                                 shape=(len(self.classes), len(terms)))
+                sel = csc.astype(np.int32).dot(picker).tocsc()
+            return (sel, [col_counts[j] if j >= 0 else 0 for j in cols])
+
+        (xm, xcounts) = submatrix(x_terms)
+        (ym, ycounts) = submatrix(y_terms)
+        counts = xm.T.dot(ym).toarray()
+        smap = {}
+        for t in set(x_terms).union(y_terms):
+            smap[t] = self._column_subjects(t)
+        ilist = []
+        for (xi, x) in enumerate(x_terms):
+            for (yi, y) in enumerate(y_terms):
+                if not symmetric or x<y:
+                    c = int(counts[xi, yi])
+                    union = xcounts[xi] + ycounts[yi] - c
+                    j = 0
+                    if union > 0:
+                        j = c / union
+                    ilist.append({'x':x, 'y':y, 'shared':smap[x].intersection(smap[y]), 'c':c, 'j':j})
+        return ilist
+
+    def as_dataframe(self, fillna=True, subjects=None):
+        selected_subjects = self.subjects
+        if subjects is not None:
+            selected_subjects = subjects
+        known = list(dict.fromkeys(s for s in selected_subjects if s in self.subject_index))
+        m = self.matrix[[self.subject_index[s] for s in known]]
+        # keep only columns used by the selected subjects, in first-seen order as the dict implementation does
+        used = np.flatnonzero(np.asarray(m.sum(axis=0)).ravel())
+        df = pd.DataFrame(m[:, used].toarray().astype(float), index=known, columns=[self.classes[j] for j in used])
+        df = df.reindex(selected_subjects)
+        df = df.replace(0.0, np.nan)
+        if fillna:
+            logger.debug("Performing fillna...")
+            df = df.fillna(0)
+        return df
+
+    def _enrichment_counts(self, subjects, background, hypotheses):
+        if subjects is None:
+            subjects = []
+        subjects = set(subjects)
+        sample_size = len(subjects)
+        if background is None:
+            background = set(self.subjects)
+        else:
+            background = set(background)
+        background.update(subjects)
+        bg_size = len(background)
+
+        sample_sums = np.asarray(self.matrix[self._subject_rows(subjects)].sum(axis=0)).ravel()
+        if len(background) == len(self.subjects) and background.issuperset(self.subjects):
+            bg_sums = np.asarray(self.csc.sum(axis=0)).ravel()
+        else:
+            bg_sums = np.asarray(self.matrix[self._subject_rows(background)].sum(axis=0)).ravel()
+
+        cols = np.flatnonzero(sample_sums)
+        if hypotheses is not None:
+            cols = np.intersect1d(cols, self._class_columns(set(hypotheses)))
+        logger.info("Hypotheses: {}".format(len(cols)))
+        sample_count = {}
+        bg_count = {}
+        for j in cols:
+            c = self.classes[j]
+            sample_count[c] = int(sample_sums[j])
+            bg_count[c] = int(bg_sums[j])
+        hypotheses = [self.classes[j] for j in cols if bg_sums[j] > 1]
+        return (hypotheses, sample_count, bg_count, sample_size, bg_size)
+
+    def jaccard_similarity(self, s1, s2):
+        i1 = self.subject_index.get(s1)
+        i2 = self.subject_index.get(s2)
+        if i1 is None or i2 is None:
+            return super().jaccard_similarity(s1, s2)
+        m = self.matrix
+        n1 = m.indptr[i1+1] - m.indptr[i1]
+        n2 = m.indptr[i2+1] - m.indptr[i2]
+        shared = np.intersect1d(m.indices[m.indptr[i1]:m.indptr[i1+1]], m.indices[m.indptr[i2]:m.indptr[i2+1]],
+                                assume_unique=True).size
+        num_union = n1 + n2 - shared
+        if num_union == 0:
+            return 0.0
+        return shared / num_union
+
+    def similarity_matrix(self, x_subjects=None, y_subjects=None, symmetric=False):
+        if x_subjects is None:
+            x_subjects = []
+        if y_subjects is None:
+            y_subjects = []
+        x_subjects = list(x_subjects)
+        y_subjects = list(y_subjects)
+        if any(s not in self.subject_index for s in x_subjects + y_subjects):
+            return super().similarity_matrix(x_subjects, y_subjects, symmetric=symmetric)
+        xm = self.matrix[[self.subject_index[s] for s in x_subjects]].astype(np.int32)
+        ym = self.matrix[[self.subject_index[s] for s in y_subjects]].astype(np.int32)
+        shared = xm.dot(ym.T).toarray()
+        xsizes = np.diff(xm.indptr)
+        ysizes = np.diff(ym.indptr)
+        z = [[0] * len(x_subjects) for i1 in range(len(y_subjects))]
+        for (xi, x) in enumerate(x_subjects):
+            for (yi, y) in enumerate(y_subjects):
+                if not symmetric or x<y:
+                    c = shared[xi, yi]
+                    union = xsizes[xi] + ysizes[yi] - c
+                    z[yi][xi] = c / union if union > 0 else 0
+        return (z, x_subjects, y_subjects)
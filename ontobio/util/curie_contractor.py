@@ -0,0 +1,156 @@
+"""
+Fast, memoized CURIE contraction and expansion
+
+Drop-in replacements for `prefixcommons.curie_util.contract_uri` and
+`expand_uri`. Instead of scanning every prefix map entry for every URI,
+namespaces are indexed in a character trie built once per set of prefix
+maps, and results for full URIs are held in a bounded LRU cache.
+"""
+
+import functools
+import logging
+from prefixcommons.curie_util import default_curie_maps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 1 << 18
+
+# trie key holding the (namespace, prefix) pairs that end at a node
+_TERMINAL = None
+
+
+class CurieContractor():
+    """
+    Contracts URIs to CURIEs, and expands CURIEs to URIs, for a fixed list of prefix maps
+
+    The prefix maps are read when the contractor is created; changes made to
+    them afterwards are not seen.
+    """
+
+    def __init__(self, cmaps=None, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        Arguments
+        ---------
+        cmaps : list
+            list of prefix maps (prefix -> namespace); defaults to prefixcommons defaults
+        cache_size : int
+            maximum number of URIs and CURIEs to memoize
+        """
+        if cmaps is None:
+            cmaps = default_curie_maps
+        self.cmaps = cmaps
+        self.trie = {}
+        self.expansions = {}
+        for cmap in cmaps:
+            for (prefix, ns) in cmap.items():
+                if isinstance(ns, str):
+                    self._add(ns, prefix)
+                    self.expansions.setdefault(prefix, ns)
+        self._contract = functools.lru_cache(maxsize=cache_size)(self._contract_uncached)
+        self._expand = functools.lru_cache(maxsize=cache_size)(self._expand_uncached)
+
+    def _add(self, ns, prefix):
+        node = self.trie
+        for ch in ns:
+            node = node.setdefault(ch, {})
+        node.setdefault(_TERMINAL, []).append((ns, prefix))
+
+    def _contract_uncached(self, uri):
+        node = self.trie
+        matches = list(node.get(_TERMINAL, []))
+        for ch in uri:
+            node = node.get(ch)
+            if node is None:
+                break
+            if _TERMINAL in node:
+                matches += node[_TERMINAL]
+        if not matches:
+            return ()
+        # same semantics as prefixcommons: replace namespace, keep shortest results
+        curies = {uri.replace(ns, prefix + ":") for (ns, prefix) in matches}
+        le = min(len(c) for c in curies)
+        return tuple(sorted(c for c in curies if len(c) == le))
+
+    def _expand_uncached(self, id):
+        if id.find(":") == -1:
+            return id
+        [prefix, localid] = id.split(":", 1)
+        ns = self.expansions.get(prefix)
+        if ns is None:
+            return id
+        return ns + localid
+
+    def contract(self, uri):
+        """
+        Contract a URI, returning a list of shortest possible CURIEs
+
+        Equivalent to `prefixcommons.curie_util.contract_uri(uri, cmaps)`,
+        except that ties are returned in sorted order
+
+        Returns
+        -------
+        list[str]
+        """
+        return list(self._contract(uri))
+
+    def contract_one(self, uri, default=None):
+        """
+        Contract a URI to a single CURIE, or return default if no prefix matches
+        """
+        curies = self._contract(uri)
+        if len(curies) > 0:
+            return curies[0]
+        return default
+
+    def expand(self, id):
+        """
+        Expand a CURIE to a URI; returns the input if the prefix is not known
+
+        Equivalent to `prefixcommons.curie_util.expand_uri(id, cmaps)`
+        """
+        return self._expand(id)
+
+    def cache_info(self):
+        """
+        Return LRU statistics for contraction
+        """
+        return self._contract.cache_info()
+
+
+_contractors = {}
+_MAX_CONTRACTORS = 32
+
+
+def get_contractor(cmaps=None):
+    """
+    Return a shared :class:`CurieContractor` for a list of prefix maps
+
+    Contractors are shared by lists of maps with the same entries, so a
+    map that has entries added, removed or rebound in place gets a new
+    contractor. Callers that contract many URIs should keep the contractor,
+    as each call fingerprints the maps.
+    """
+    if cmaps is None:
+        cmaps = default_curie_maps
+    key = tuple(frozenset((prefix, ns) for (prefix, ns) in m.items() if isinstance(ns, str)) for m in cmaps)
+    contractor = _contractors.get(key)
+    if contractor is None:
+        if len(_contractors) >= _MAX_CONTRACTORS:
+            _contractors.clear()
+        contractor = CurieContractor(cmaps)
+        _contractors[key] = contractor
+    return contractor
+
+
+def contract_uri(uri, cmaps=None):
+    """
+    Contract a URI to a list of shortest CURIEs, see :meth:`CurieContractor.contract`
+    """
+    return get_contractor(cmaps).contract(uri)
+
+
+def expand_uri(id, cmaps=None):
+    """
+    Expand a CURIE to a URI, see :meth:`CurieContractor.expand`
+    """
+    return get_contractor(cmaps).expand(id)
@@ -0,0 +1,156 @@
+"""
+Incremental reading of large JSON documents
+
+Reads a JSON document from a file handle in chunks, allowing the caller to
+walk objects and arrays member by member, decoding only the values it needs.
+Peak memory is bounded by the chunk size and the largest value decoded,
+rather than the size of the document.
+
+E.g. to iterate over the nodes of an obographs file:
+
+::
+
+    with open('go.json') as fh:
+        reader = JsonStreamReader(fh)
+        for key in reader.iter_object():
+            if key == 'graphs':
+                for _ in reader.iter_array():
+                    for gkey in reader.iter_object():
+                        if gkey == 'nodes':
+                            for node in reader.iter_values():
+                                ...
+                        else:
+                            reader.skip()
+            else:
+                reader.skip()
+
+"""
+
+import json
+
+WHITESPACE = ' \t\n\r'
+
+
+class JsonStreamReader():
+    """
+    Pull-based reader over a JSON text stream.
+
+    Container methods (`iter_object`, `iter_array`) are generators; after
+    each step the caller must consume exactly one value, via `value`,
+    `skip`, `iter_values` or a nested container method.
+    """
+
+    def __init__(self, fh, chunk_size=1 << 20):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.fh.read(self.chunk_size)
+        if chunk == '':
+            self.eof = True
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+
+    def peek(self):
+        """
+        Return the next non-whitespace character without consuming it; '' at end of input
+        """
+        while True:
+            buf = self.buf
+            pos = self.pos
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf) or self.eof:
+                return buf[pos] if pos < len(buf) else ''
+            self._fill()
+
+    def _next(self):
+        c = self.peek()
+        if c == '':
+            raise ValueError("Unexpected end of JSON input")
+        self.pos += 1
+        return c
+
+    def _expect(self, expected):
+        c = self._next()
+        if c != expected:
+            raise ValueError("Expected '{}' but found '{}'".format(expected, c))
+
+    def value(self):
+        """
+        Decode and return the next complete value
+        """
+        self.peek()
+        while True:
+            try:
+                v, end = self.decoder.raw_decode(self.buf, self.pos)
+                # a value ending at the buffer boundary may be a truncated number
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return v
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def iter_object(self):
+        """
+        Iterate over the keys of the next value, which must be an object
+        """
+        self._expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            c = self._next()
+            if c == '}':
+                return
+            if c != ',':
+                raise ValueError("Expected ',' or '}}' but found '{}'".format(c))
+
+    def iter_array(self):
+        """
+        Iterate over the positions of the next value, which must be an array
+        """
+        self._expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        i = 0
+        while True:
+            yield i
+            i += 1
+            c = self._next()
+            if c == ']':
+                return
+            if c != ',':
+                raise ValueError("Expected ',' or ']' but found '{}'".format(c))
+
+    def iter_values(self):
+        """
+        Iterate over the decoded elements of the next value, which must be an array
+        """
+        for _ in self.iter_array():
+            yield self.value()
+
+    def skip(self):
+        """
+        Consume the next value without materializing it
+        """
+        c = self.peek()
+        if c == '{':
+            for _ in self.iter_object():
+                self.skip()
+        elif c == '[':
+            for _ in self.iter_array():
+                self.skip()
+        else:
+            self.value()
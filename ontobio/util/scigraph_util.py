@@ -458,6 +458,16 @@ def get_scigraph_nodes(id_list)-> Iterator[Dict]:
             raise ValueError(exception.doc)
 
 
+TYPE_FILTER = [
+    'cliqueLeader',
+    'Class',
+    'Node',
+    'Individual',
+    'quality',
+    'sequence feature'
+]
+
+
 def get_id_type_map(id_list: Iterable[str]) -> Dict[str, List[str]]:
     """
     Given a list of ids return their types
@@ -466,18 +476,10 @@ def get_id_type_map(id_list: Iterable[str]) -> Dict[str, List[str]]:
     :return: dictionary where the id is the key and the value is a list of types
     """
     type_map = {}
-    filter_out_types = [
-        'cliqueLeader',
-        'Class',
-        'Node',
-        'Individual',
-        'quality',
-        'sequence feature'
-    ]
 
     for node in get_scigraph_nodes(id_list):
         type_map[node['id']] = [typ.lower() for typ in node['meta']['types']
-                                if typ not in filter_out_types]
+                                if typ not in TYPE_FILTER]
         if not type_map[node['id']]:
             type_map[node['id']] = ['Node']
 
@@ -522,39 +524,51 @@ def get_taxon(id: str) -> Optional[Node]:
     return taxon
 
 
-def typed_node_from_id(id: str) -> TypedNode:
-    """
-    Get typed node from id
-
-    :param id: id as curie
-    :return: TypedNode object
-    """
-    filter_out_types = [
-        'cliqueLeader',
-        'Class',
-        'Node',
-        'Individual',
-        'quality',
-        'sequence feature'
-    ]
-    node = next(get_scigraph_nodes([id]))
-
+def _typed_node(node: Dict) -> TypedNode:
     if 'lbl' in node:
         label = node['lbl']
     else:
         label = None  # Empty string or None?
 
     types = [typ.lower() for typ in node['meta']['types']
-             if typ not in filter_out_types]
+             if typ not in TYPE_FILTER]
 
     return TypedNode(
         id=node['id'],
         label=label,
         type=types[0],
-        taxon = get_taxon(id)
+        taxon = get_taxon(node['id'])
     )
 
 
+def typed_node_from_id(id: str) -> TypedNode:
+    """
+    Get typed node from id
+
+    :param id: id as curie
+    :return: TypedNode object
+    """
+    node = next(get_scigraph_nodes([id]))
+    return _typed_node(node)
+
+
+def typed_nodes_from_ids(id_list: Iterable[str]) -> Dict[str, TypedNode]:
+    """
+    Get typed nodes for many ids, with chunked scigraph queries
+    rather than one query per id
+
+    :param id_list: ids as curies
+    :return: dictionary of id to TypedNode, ids not in scigraph are omitted
+    """
+    id_list = list(dict.fromkeys(id_list))
+    typed_nodes = {}
+    if len(id_list) == 0:
+        return typed_nodes
+    for node in get_scigraph_nodes(id_list):
+        typed_nodes[node['id']] = _typed_node(node)
+    return typed_nodes
+
+
 def bbg_to_assocs(g):
     return [bbedge_to_assoc(e,g) for e in g.edges]
 
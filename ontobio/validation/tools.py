@@ -1,9 +1,31 @@
 import gzip
 import click
+import collections
+import io
 import os
+import shutil
 
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
+# Size of the blocks read from and compressed to files
+CHUNK_SIZE = 1024 * 1024
+
+# Compression of products, see `configure_compression`
+compression_level = 9
+compression_threads = 1
+
+def configure_compression(level=None, threads=None):
+    """
+    Set the gzip compression level (1-9) and the number of threads used to compress products.
+    With more than one thread, blocks are compressed in parallel as separate gzip members.
+    """
+    global compression_level, compression_threads
+    if level is not None:
+        compression_level = level
+    if threads is not None:
+        compression_threads = threads
+
 def gzips(file_function):
 
     @wraps(file_function)
@@ -19,16 +41,106 @@ def gzips(file_function):
 
     return wrapper
 
-def zipup(file_path):
+class ParallelGzipFile(io.BufferedIOBase):
+    """
+    Binary file that is gzip compressed in blocks of `block_size` bytes by a pool of threads, like pigz.
+
+    Each block is written as its own gzip member, and a file of concatenated members is a valid gzip file.
+    At most two blocks per thread are held in memory.
+    """
+
+    def __init__(self, file_path, level=None, threads=None, block_size=CHUNK_SIZE):
+        self.name = file_path
+        self.level = compression_level if level is None else level
+        self.threads = compression_threads if threads is None else threads
+        self.block_size = block_size
+        self.file = open(file_path, "wb")
+        self.block = bytearray()
+        self.pending = collections.deque()
+        self.executor = ThreadPoolExecutor(max_workers=self.threads)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.block += data
+        while len(self.block) >= self.block_size:
+            block = bytes(self.block[:self.block_size])
+            del self.block[:self.block_size]
+            self._submit(block)
+        return len(data)
+
+    def _submit(self, block):
+        self.pending.append(self.executor.submit(gzip.compress, block, compresslevel=self.level))
+        while len(self.pending) > 2 * self.threads:
+            self.file.write(self.pending.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self.block:
+                self._submit(bytes(self.block))
+                self.block = bytearray()
+            while self.pending:
+                self.file.write(self.pending.popleft().result())
+        finally:
+            self.executor.shutdown()
+            self.file.close()
+            super().close()
+
+def open_gzip(file_path, mode="wb", level=None, threads=None):
+    """
+    Open a gzip file for writing ("wb" or "wt"), with the configured compression level and threads.
+    """
+    level = compression_level if level is None else level
+    threads = compression_threads if threads is None else threads
+    if threads > 1:
+        zipped = ParallelGzipFile(file_path, level=level, threads=threads)
+        return io.TextIOWrapper(zipped) if mode == "wt" else zipped
+    return gzip.open(file_path, mode, compresslevel=level)
+
+class TeeGzipFile(object):
+    """
+    Text file written both uncompressed, and gzip compressed to the same path with a .gz extension,
+    so that products do not need a separate zipup pass. With `uncompressed=False` only the .gz file
+    is written, and `name` is its path.
+    """
+
+    def __init__(self, file_path, binary=False, uncompressed=True):
+        self.plain = open(file_path, "wb" if binary else "w") if uncompressed else None
+        self.zipped = open_gzip("{}.gz".format(file_path), "wb" if binary else "wt")
+        self.name = file_path if uncompressed else self.zipped.name
+
+    def write(self, text):
+        if self.plain is not None:
+            self.plain.write(text)
+        self.zipped.write(text)
+
+    def close(self):
+        if self.plain is not None:
+            self.plain.close()
+        self.zipped.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def zipup(file_path, level=None, threads=None):
+    """
+    Write a gzip compressed copy of a file, with a .gz extension, streaming it in chunks
+    """
     click.echo("Zipping {}".format(file_path))
     path, filename = os.path.split(file_path)
     zipname = "{}.gz".format(filename)
     target = os.path.join(path, zipname)
 
     with open(file_path, "rb") as p:
-        with gzip.open(target, "wb") as tf:
-            tf.write(p.read())
-            
+        with open_gzip(target, "wb", level=level, threads=threads) as tf:
+            shutil.copyfileobj(p, tf, CHUNK_SIZE)
+
 def unzip(path, target):
     click.echo("Unzipping {}".format(path))
     def chunk_gen():
@@ -0,0 +1,83 @@
+import pytest
+
+from ontobio import ontol, obograph_util
+from ontobio.ontol_factory import OntologyFactory
+from ontobio.compact_ontol import CompactOntology
+
+GOSLIM = "tests/resources/goslim_generic.json"
+NUCLEUS = "tests/resources/nucleus.json"
+
+@pytest.fixture(scope="module")
+def onts():
+    return OntologyFactory().create(GOSLIM), OntologyFactory().create(GOSLIM, compact=True)
+
+def test_factory_selects_compact(onts):
+    ont, compact = onts
+    assert isinstance(compact, CompactOntology)
+    assert set(compact.nodes()) == set(ont.nodes())
+    assert set(compact.relations_used()) == set(ont.relations_used())
+
+def test_graph_queries_match(onts):
+    ont, compact = onts
+    for n in ont.nodes():
+        for relations in [None, ["subClassOf"], ["BFO:0000050"]]:
+            assert set(compact.parents(n, relations=relations)) == set(ont.parents(n, relations=relations))
+            assert set(compact.children(n, relations=relations)) == set(ont.children(n, relations=relations))
+            assert set(compact.ancestors(n, relations=relations)) == set(ont.ancestors(n, relations=relations))
+            assert set(compact.descendants(n, relations=relations, reflexive=True)) == \
+                set(ont.descendants(n, relations=relations, reflexive=True))
+        for p in ont.parents(n):
+            assert compact.child_parent_relations(n, p) == ont.child_parent_relations(n, p)
+
+def test_node_queries_match(onts):
+    ont, compact = onts
+    for n in ont.nodes():
+        assert compact.label(n) == ont.label(n)
+        assert compact.is_obsolete(n) == ont.is_obsolete(n)
+        assert compact.subsets(n) == ont.subsets(n)
+        assert compact.obo_namespace(n) == ont.obo_namespace(n)
+        assert [str(s) for s in compact.synonyms(n, include_label=True)] == \
+            [str(s) for s in ont.synonyms(n, include_label=True)]
+    assert compact.label("X:missing", id_if_null=True) == "X:missing"
+    assert compact.node("X:missing") is None
+    assert compact.extract_subset("goslim_generic") == ont.extract_subset("goslim_generic")
+    assert compact.search("nucleus") == ont.search("nucleus")
+
+def test_subontology(onts):
+    ont, compact = onts
+    sub = compact.subontology(relations=["subClassOf"])
+    assert isinstance(sub, CompactOntology)
+    assert sub.relations_used() == ["subClassOf"]
+    expected = ont.subontology(relations=["subClassOf"])
+    for n in expected.nodes():
+        assert set(sub.ancestors(n)) == set(expected.ancestors(n))
+
+def test_slim_mapping(onts):
+    ont, compact = onts
+    relations = ["subClassOf", "BFO:0000050"]
+    assert compact.create_slim_mapping(subset="goslim_generic", relations=relations) == \
+        ont.create_slim_mapping(subset="goslim_generic", relations=relations)
+
+def test_updates():
+    compact = OntologyFactory().create(NUCLEUS, compact=True)
+    compact.enable_closure_index()
+    compact.add_node("X:1", label="x")
+    compact.add_parent("X:1", "GO:0005634")
+    assert "GO:0005634" in compact.ancestors("X:1")
+    compact.add_synonym(ontol.Synonym("X:1", val="ex", pred="hasExactSynonym"))
+    compact.add_to_subset("X:1", "foo")
+    compact.set_obsolete("X:2")
+    assert [s.val for s in compact.synonyms("X:1")] == ["ex"]
+    assert compact.subsets("X:1") == ["foo"]
+    assert "X:2" in compact.all_obsoletes()
+    assert compact.is_obsolete("X:2")
+    assert compact.get_graph().nodes["X:1"]["label"] == "x"
+    compact.merge([OntologyFactory().create(GOSLIM)])
+    assert compact.has_node("GO:0008150")
+
+def test_node_label_key():
+    doc = {"graphs": [{"nodes": [{"id": "http://purl.obolibrary.org/obo/GO_1", "lbl": "one", "label": "stale"}],
+                       "edges": []}]}
+    for (ontology_class, compact) in [(ontol.Ontology, False), (CompactOntology, True)]:
+        ont = ontology_class(payload=obograph_util.convert_json_object(doc, compact=compact))
+        assert ont.label("GO:1") == "one"
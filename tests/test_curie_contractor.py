@@ -0,0 +1,44 @@
+from prefixcommons import curie_util
+
+from ontobio.util.curie_contractor import CurieContractor, contract_uri, expand_uri, get_contractor
+
+URIS = [
+    "http://purl.obolibrary.org/obo/GO_0005634",
+    "http://purl.obolibrary.org/obo/BFO_0000050",
+    "http://purl.obolibrary.org/obo/go#systematic_synonym",
+    "http://www.geneontology.org/formats/oboInOwl#hasOBONamespace",
+    "http://identifiers.org/uniprot/P12345",
+    "http://example.org/nothing/here",
+    "GO:0005634",
+    "is_a",
+]
+
+def test_contract_matches_prefixcommons():
+    for uri in URIS:
+        assert contract_uri(uri) == sorted(curie_util.contract_uri(uri))
+
+def test_context_contraction():
+    context = {"GO": "http://purl.obolibrary.org/obo/GO_", "OBO": "http://purl.obolibrary.org/obo/"}
+    c = CurieContractor([context])
+    assert c.contract_one("http://purl.obolibrary.org/obo/GO_0005634") == "GO:0005634"
+    assert c.contract("http://purl.obolibrary.org/obo/BFO_0000050") == ["OBO:BFO_0000050"]
+    assert c.contract_one("http://example.org/x", default="x") == "x"
+    assert c.expand("GO:0005634") == "http://purl.obolibrary.org/obo/GO_0005634"
+    assert c.expand("FOO:1") == "FOO:1"
+    c.contract_one("http://purl.obolibrary.org/obo/GO_0005634")
+    assert c.cache_info().hits > 0
+
+def test_expand_matches_prefixcommons():
+    for curie in ["GO:0005634", "UniProtKB:P12345", "NCBITaxon:9606", "FAKE:1", "nocolon"]:
+        assert expand_uri(curie) == curie_util.expand_uri(curie)
+
+def test_shared_contractor_sees_new_prefixes():
+    context = {"A": "http://a.org/"}
+    assert get_contractor([context]) is get_contractor([context])
+    assert contract_uri("http://b.org/1", cmaps=[context]) == []
+    context["B"] = "http://b.org/"
+    assert contract_uri("http://b.org/1", cmaps=[context]) == ["B:1"]
+    context["B"] = "http://c.org/"
+    assert contract_uri("http://b.org/1", cmaps=[context]) == curie_util.contract_uri("http://b.org/1", cmaps=[context])
+    assert contract_uri("http://c.org/1", cmaps=[context]) == ["B:1"]
+    assert expand_uri("B:1", cmaps=[context]) == "http://c.org/1"
@@ -0,0 +1,24 @@
+from ontobio.io import differ
+
+
+def test_read_gaf_csv(tmp_path):
+    """
+    Only the compared columns are read, with ECO classes replaced by their GAF evidence codes
+    """
+    gaf = tmp_path / "eco.gaf"
+    gaf.write_text("!gaf-version: 2.2\n"
+                   "MGI\tMGI:101757\tCfl1\tenables\tGO:0051015\tGO_REF:0000119\tECO:0000266\tUniProtKB:P23528\tF\tcofilin 1\t\tprotein\ttaxon:10090\t20240319\tGO_Central\t\t\n"
+                   "MGI\tMGI:101757\tCfl1\tenables\tGO:0051015\tPMID:1\tIDA\t\tF\tcofilin 1\t\tprotein\ttaxon:10090\t20240319\tMGI\t\t\n")
+    df = differ.read_gaf_csv(str(gaf), "2.2")
+    assert list(df.columns) == ['DB_Object_ID', 'Qualifier', 'GO_ID', 'Evidence_code', 'DB_Reference']
+    assert list(df['DB_Object_ID']) == ["MGI:101757", "MGI:101757"]
+    assert list(df['Evidence_code']) == ["ISO", "IDA"]
+
+
+def test_read_csv_columns():
+    gaf = differ.read_gaf_csv("tests/resources/mgi.gaf", "2.1")
+    assert gaf.shape == (105, 5)
+
+    gpad = differ.read_gpad_csv("tests/resources/truncated-pombase.gpad", "1.2")
+    assert gpad['subject'][0] == "PomBase:SPAC25B8.17"
+    assert gpad['evidence_code'][0] == "ISO"
@@ -1,3 +1,4 @@
+from ontobio import ecomap
 from ontobio.ecomap import EcoMap
 
 
@@ -15,3 +16,66 @@ def test_ecomap():
     assert m.coderef_to_ecoclass('BADCODE', 'GO_REF:xxx') == None
     assert m.ecoclass_to_coderef('ECO:9999999999999999999') == (None,None)
     assert m.coderef_to_ecoclass('ISO', None) == 'ECO:0000266'
+
+
+def test_ecomap_snapshot(monkeypatch, tmp_path):
+    """
+    Snapshots refreshed from the PURLs are read back without network access
+    """
+    purls = {
+        EcoMap.PURL: "IDA\tDefault\tECO:0000314\nIEA\tGO_REF:0000002\tECO:0000256\n",
+        EcoMap.PURL_DERIVED: "ECO:0000314\tIDA\tDefault\nECO:0000501\tIEA\tDefault\n",
+    }
+    monkeypatch.setattr(ecomap, "get_ecomap_str", purls.get)
+    paths = ecomap.refresh_snapshot(str(tmp_path / "data"))
+    assert paths == [str(tmp_path / "data" / "gaf-eco-mapping.txt"), str(tmp_path / "data" / "gaf-eco-mapping-derived.txt")]
+    with open(paths[0]) as snapshot:
+        assert snapshot.readline().startswith("# Fetched from {} on ".format(EcoMap.PURL))
+
+    def no_network(url):
+        raise AssertionError("fetched {}".format(url))
+    monkeypatch.setattr(ecomap, "get_ecomap_str", no_network)
+    monkeypatch.setattr(ecomap, "SNAPSHOT_DIR", str(tmp_path / "data"))
+    m = EcoMap()
+    assert m.coderef_to_ecoclass('IDA') == 'ECO:0000314'
+    assert m.coderef_to_ecoclass('IEA', 'GO_REF:0000002') == 'ECO:0000256'
+    assert m.ecoclass_to_coderef('ECO:0000314') == ('IDA', None)
+    assert m.ecoclass_to_coderef('ECO:0000501', derived=True) == ('IEA', None)
+
+    monkeypatch.setattr(ecomap, "get_ecomap_str", purls.get)
+    assert EcoMap(use_snapshot=False).mappings() == m.mappings()
+
+
+# Default ECO classes of the GAF evidence codes, from the GO evidence code documentation
+KNOWN_DEFAULT_ECO = {
+    "EXP": "ECO:0000269", "IDA": "ECO:0000314", "IPI": "ECO:0000353", "IMP": "ECO:0000315",
+    "IGI": "ECO:0000316", "IEP": "ECO:0000270", "HTP": "ECO:0006056", "HDA": "ECO:0007005",
+    "HMP": "ECO:0007001", "HGI": "ECO:0007003", "HEP": "ECO:0007007", "IBA": "ECO:0000318",
+    "IBD": "ECO:0000319", "IKR": "ECO:0000320", "IRD": "ECO:0000321", "ISS": "ECO:0000250",
+    "ISO": "ECO:0000266", "ISA": "ECO:0000247", "ISM": "ECO:0000255", "IGC": "ECO:0000317",
+    "RCA": "ECO:0000245", "TAS": "ECO:0000304", "NAS": "ECO:0000303", "IC": "ECO:0000305",
+    "ND": "ECO:0000307", "IEA": "ECO:0000501",
+}
+
+
+def test_ecomap_known_mappings():
+    """
+    The mappings agree with the known default code to ECO class mappings, both ways
+    """
+    m = EcoMap()
+    defaults = {code: cls for (code, ref, cls) in m.mappings() if ref is None}
+    assert {code: defaults.get(code) for code in KNOWN_DEFAULT_ECO} == KNOWN_DEFAULT_ECO
+    for code, cls in KNOWN_DEFAULT_ECO.items():
+        assert m.coderef_to_ecoclass(code) == cls
+        assert m.ecoclass_to_coderef(cls, derived=True)[0] == code
+
+
+def test_shared_ecomap():
+    from ontobio.io import assocparser, gafparser, qc
+    from ontobio.model import association
+    m = ecomap.get_ecomap()
+    assert ecomap.get_ecomap() is m
+    assert gafparser.ecomap is m
+    assert association.ecomap is m
+    assert qc.ecomapping is m
+    assert assocparser.AssocParserConfig().ecomap is m
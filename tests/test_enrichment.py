@@ -0,0 +1,36 @@
+from ontobio.analysis.enrichment import fisher_exact_batch, adjust_pvalues
+import numpy as np
+import scipy.stats
+import pytest
+
+
+def test_fisher_exact_batch():
+    """
+    batched p-values agree with scipy, table by table
+    """
+    rng = np.random.RandomState(0)
+    bg_size = 500
+    sample_size = 40
+    n_cls = rng.randint(0, bg_size + 1, size=300)
+    a = np.array([rng.randint(max(0, sample_size + k - bg_size), min(sample_size, k) + 1) for k in n_cls])
+    b = sample_size - a
+    c = n_cls - a
+    d = (bg_size - n_cls) - b
+    for direction in ['greater', 'less', 'two-sided']:
+        pvals = fisher_exact_batch(a, b, c, d, direction)
+        for i in range(len(a)):
+            _, p = scipy.stats.fisher_exact([[a[i], b[i]], [c[i], d[i]]], direction)
+            assert pvals[i] == pytest.approx(p, rel=1e-9, abs=1e-300)
+    assert len(fisher_exact_batch([], [], [], [])) == 0
+    with pytest.raises(ValueError):
+        fisher_exact_batch([1, 2], [3, 3], [1, 1], [5, 5])
+
+
+def test_adjust_pvalues():
+    p = [0.01, 0.04, 0.03, 0.2, 0.5]
+    assert list(adjust_pvalues(p, 'bonferroni')) == pytest.approx([0.05, 0.2, 0.15, 1.0, 1.0])
+    # Benjamini-Hochberg: p * m / rank, then cumulative minimum from the largest
+    assert list(adjust_pvalues(p, 'fdr_bh')) == pytest.approx([0.05, 0.04 * 5 / 3, 0.04 * 5 / 3, 0.25, 0.5])
+    assert list(adjust_pvalues(p, None)) == p
+    with pytest.raises(ValueError):
+        adjust_pvalues(p, 'holm')
@@ -100,6 +100,88 @@ def test_gaf_association_generator_header_report():
     assert len(p.report.header) > 0
     print(p.report.header)
 
+def test_parallel_association_generator():
+    ont = OntologyFactory().create(ONT)
+    for (f, parser_class) in [(POMBASE, GafParser), (POMBASE_GPAD, GpadParser), ("tests/resources/errors.gaf", GafParser)]:
+        outputs = []
+        for workers in [1, 3]:
+            filtered = io.StringIO()
+            p = parser_class(config=assocparser.AssocParserConfig(ontology=ont, filter_out_evidence=["IEA"],
+                                                                  filtered_evidence_file=filtered))
+            assocs = list(p.association_generator(open(f), workers=workers, shard_size=17))
+            outputs.append((assocs, p.report.to_report_json(), p.report.messages, p.report.header, filtered.getvalue()))
+        assert len(outputs[0][0]) > 0
+        assert outputs[0] == outputs[1]
+
+
+def test_parse_shard_keeps_parser_config():
+    config = assocparser.AssocParserConfig(ontology=OntologyFactory().create(ONT))
+    p = GafParser(config=config)
+    lines = [line for line in open(POMBASE) if not line.startswith("!")]
+    assocparser._shard_parser = p
+    try:
+        for shard in [lines[:5], lines[5:10]]:
+            assocs, report, filtered = assocparser._parse_shard(shard)
+            assert report.config is None
+            assert p.report.config is config
+    finally:
+        assocparser._shard_parser = None
+
+
+def test_profile_report():
+    ont = OntologyFactory().create(ONT)
+    profiles = []
+    for workers in [1, 2]:
+        p = GafParser(config=assocparser.AssocParserConfig(ontology=ont, rule_set=assocparser.RuleSet.ALL, profile=True))
+        list(p.association_generator(open(POMBASE), workers=workers, shard_size=50))
+        report = p.report.to_report_json()
+        profile = report["profile"]
+        assert profile["stages"]["parse_line"]["calls"] == report["lines"]
+        assert profile["stages"]["id_validation"]["calls"] > 0
+        assert profile["stages"]["go_rules"]["calls"] > 0
+        rule = profile["rules"]["GORULE:0000011"]
+        assert rule["calls"] == profile["stages"]["go_rules"]["calls"]
+        assert rule["pass"] + rule["warning"] + rule["error"] + rule["repaired"] == rule["calls"]
+        for counts in profile["rules"].values():
+            assert counts["pass"] + counts["warning"] + counts["error"] + counts["repaired"] == counts["calls"]
+        profiles.append(profile)
+    assert profiles[0]["rules"]["GORULE:0000061"]["repaired"] == profiles[1]["rules"]["GORULE:0000061"]["repaired"]
+
+    p = GafParser(config=assocparser.AssocParserConfig(ontology=ont))
+    list(p.association_generator(open(POMBASE)))
+    assert "profile" not in p.report.to_report_json()
+
+
+def test_aggregated_report():
+    ont = OntologyFactory().create(ONT)
+    f = "tests/resources/errors.gaf"
+    p = GafParser(config=assocparser.AssocParserConfig(ontology=ont, rule_set=assocparser.RuleSet.ALL))
+    list(p.association_generator(open(f)))
+    full = p.report.to_report_json()
+    for workers in [1, 2]:
+        agg = GafParser(config=assocparser.AssocParserConfig(ontology=ont, rule_set=assocparser.RuleSet.ALL,
+                                                             report_max_examples=2))
+        list(agg.association_generator(open(f), workers=workers, shard_size=5))
+        report = agg.report.to_report_json()
+        assert agg.report.messages == []
+        assert report["lines"] == full["lines"]
+        assert set(report["messages"]) == set(full["messages"])
+        for (rule, messages) in full["messages"].items():
+            assert len(report["messages"][rule]) == min(2, len(messages))
+            assert all(m in messages for m in report["messages"][rule])
+            counts = report["message_counts"][rule]
+            assert sum(c["count"] for c in counts) == len(messages)
+            for c in counts:
+                assert c["count"] == len([m for m in messages if (m["level"], m["type"]) == (c["level"], c["type"])])
+        out = io.StringIO()
+        agg.report.write_markdown(out)
+        assert out.getvalue() == agg.report.to_markdown()
+        assert "(showing 2)" in out.getvalue()
+        out = io.StringIO()
+        agg.report.write_report_json(out)
+        assert json.loads(out.getvalue()) == json.loads(json.dumps(report))
+
+
 def parse_with(f, p):
     p.config.ecomap = EcoMap()
     is_gaf = f == POMBASE
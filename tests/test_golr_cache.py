@@ -0,0 +1,113 @@
+from ontobio.golr.golr_cache import GolrCache, cache_key, get_golr_cache
+from ontobio.golr.golr_query import GolrAssociationQuery
+from ontobio.config import Config, CacheConfig
+import pysolr
+
+NS = 'http://localhost:8983/solr/golr'
+
+
+def test_cache_key():
+    assert cache_key({'q': '*:*', 'fq': ['a:1', 'b:2']}) == cache_key({'fq': ['b:2', 'a:1'], 'q': '*:*'})
+    assert cache_key({'q': '*:*', 'rows': 1}) != cache_key({'q': '*:*', 'rows': 2})
+
+
+def test_memory_tier():
+    cache = GolrCache(max_bytes=1000)
+    assert cache.get(NS, {'q': 'x'}) is None
+    cache.set(NS, {'q': 'x'}, {'docs': [1, 2, 3]})
+    v = cache.get(NS, {'q': 'x'})
+    assert v == {'docs': [1, 2, 3]}
+    # callers get a copy
+    v['docs'].append(4)
+    assert cache.get(NS, {'q': 'x'}) == {'docs': [1, 2, 3]}
+    # namespaces are separate
+    assert cache.get('http://example.org/solr', {'q': 'x'}) is None
+
+    # least recently used entries are evicted beyond max_bytes
+    for i in range(20):
+        cache.set(NS, {'q': i}, 'v' * 100)
+    stats = cache.stats()
+    assert stats['bytes'] <= 1000
+    assert stats['evictions'] > 0
+    assert cache.get(NS, {'q': 19}) == 'v' * 100
+    assert cache.get(NS, {'q': 0}) is None
+    # values bigger than the cache are not stored
+    cache.set(NS, {'q': 'big'}, 'v' * 2000)
+    assert cache.get(NS, {'q': 'big'}) is None
+
+    stats = cache.stats()
+    assert stats['memory_hits'] == 3
+    assert stats['misses'] == 4
+    assert stats['namespaces'][NS] == {'hits': 3, 'misses': 3}
+
+    cache.clear(NS)
+    assert cache.stats()['entries'] == 0
+
+
+def test_ttl():
+    cache = GolrCache(ttl=-1)
+    cache.set(NS, {'q': 'x'}, 1)
+    assert cache.get(NS, {'q': 'x'}) is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_disk_tier(tmp_path):
+    cache = GolrCache(directory=str(tmp_path))
+    cache.set(NS, {'q': 'x'}, [1])
+    # a second cache over the same directory, e.g. in another process
+    cache2 = GolrCache(directory=str(tmp_path))
+    assert cache2.get(NS, {'q': 'x'}) == [1]
+    assert cache2.get(NS, {'q': 'x'}) == [1]
+    stats = cache2.stats()
+    assert (stats['disk_hits'], stats['memory_hits']) == (1, 1)
+
+
+class CountingSolr():
+    url = NS
+    results_cls = pysolr.Results
+
+    def __init__(self):
+        self.calls = 0
+
+    def search(self, **params):
+        self.calls += 1
+        return pysolr.Results({'response': {'docs': [], 'numFound': 0},
+                               'facet_counts': {'facet_fields': {'object_closure': ['HP:1', 2]}}})
+
+
+def test_query_uses_cache():
+    config = Config(golr_cache=CacheConfig(ttl=60, max_bytes=10000))
+    cache = get_golr_cache(config)
+    assert get_golr_cache(Config()) is None
+    solr = CountingSolr()
+    for i in range(3):
+        q = GolrAssociationQuery(subject='NCBIGene:1', object_category='phenotype', rows=0,
+                                 facet_fields=['object_closure'], solr=solr, config=config)
+        results = q.exec()
+        assert results['facet_counts']['object_closure'] == {'HP:1': 2}
+    assert solr.calls == 1
+    assert cache.stats()['namespaces'][NS] == {'hits': 2, 'misses': 1}
+
+    q = GolrAssociationQuery(subject='NCBIGene:1', object_category='phenotype', rows=0,
+                             facet_fields=['object_closure'], solr=solr, config=config, use_cache=False)
+    q.exec()
+    assert solr.calls == 2
+
+
+def test_evidence_tables_cached(monkeypatch):
+    """
+    Evidence tables are cached even though the golr cache is off in the default config
+    """
+    from ontobio import obograph_util
+    calls = []
+
+    def search_associations(**kwargs):
+        calls.append(kwargs)
+        return {'associations': []}
+    monkeypatch.setattr(obograph_util, "search_associations", search_associations)
+    monkeypatch.setattr(obograph_util, "evidence_cache", GolrCache())
+    assert obograph_util.get_evidence_tables("assoc:1", False, None) == {}
+    assert obograph_util.get_evidence_tables("assoc:1", False, None) == {}
+    assert len(calls) == 1
+    obograph_util.get_evidence_tables("assoc:2", False, None)
+    assert len(calls) == 2
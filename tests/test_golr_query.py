@@ -1,4 +1,7 @@
-from ontobio.golr.golr_query import GolrAssociationQuery, GolrSearchQuery
+import threading
+import pysolr
+from ontobio.golr import golr_query
+from ontobio.golr.golr_query import GolrAssociationQuery, GolrSearchQuery, GolrFields
 
 
 HUMAN_SHH = 'NCBIGene:6469'
@@ -31,3 +34,130 @@ def test_go_assocs():
     results = q.exec()
     print("RES={}".format(results))
     assert len(results) > 0
+
+
+class CursorSolr():
+    """
+    Stands in for pysolr.Solr, serving docs in pages keyed by cursorMark
+    """
+    def __init__(self, docs):
+        self.docs = docs
+        self.calls = []
+
+    def search(self, cursorMark=None, **params):
+        self.calls.append((cursorMark, params))
+        start = 0 if cursorMark in (None, '*') else int(cursorMark)
+        end = start + params['rows']
+        return pysolr.Results({'response': {'docs': self.docs[start:end], 'numFound': len(self.docs)},
+                               'nextCursorMark': str(min(end, len(self.docs)))})
+
+
+def test_exec_iter(monkeypatch):
+    # avoid fetching the curie map from scigraph when translating full associations
+    monkeypatch.setattr(golr_query, 'get_curie_map', lambda url: {})
+    docs = [{'id': str(i),
+             'subject': s,
+             'subject_label': s.lower(),
+             'relation': 'has_phenotype',
+             'object': o,
+             'object_label': o}
+            for (i, (s, o)) in enumerate([('G:1', 'HP:1'), ('G:1', 'HP:2'), ('G:1', 'HP:3'),
+                                          ('G:2', 'HP:1'), ('G:3', 'HP:2'), ('G:3', 'HP:4')])]
+    solr = CursorSolr(docs)
+    q = GolrAssociationQuery(subject_category='gene', object_category='phenotype',
+                             use_compact_associations=True, rows=2, solr=solr)
+    assocs = list(q.exec_iter())
+    assert [(a['subject'], sorted(a['objects'])) for a in assocs] == \
+        [('G:1', ['HP:1', 'HP:2', 'HP:3']), ('G:2', ['HP:1']), ('G:3', ['HP:2', 'HP:4'])]
+    assert [c for (c, _) in solr.calls] == ['*', '2', '4', '6']
+    (_, params) = solr.calls[0]
+    assert params['sort'] == 'subject asc,id asc'
+    assert params['fl'] == 'subject,subject_label,relation,object'
+    assert 'start' not in params
+
+    solr = CursorSolr(docs)
+    q = GolrAssociationQuery(subject_category='gene', object_category='phenotype', rows=4, solr=solr)
+    assocs = list(q.exec_iter())
+    assert [a['id'] for a in assocs] == [d['id'] for d in docs]
+    assert solr.calls[0][1]['sort'] == 'source_count desc,id asc'
+
+    # exec with iterate pages using the same cursor
+    solr = CursorSolr(docs)
+    q = GolrAssociationQuery(subject_category='gene', object_category='phenotype', rows=4, iterate=True, solr=solr)
+    results = q.exec()
+    assert [a['id'] for a in results['associations']] == [d['id'] for d in docs]
+    assert len(solr.calls) == 2
+
+
+def test_concurrent_subqueries():
+    """
+    main, fetch_objects and fetch_subjects queries are in flight at the same time
+    """
+    barrier = threading.Barrier(3, timeout=10)
+
+    class BarrierSolr():
+        def search(self, **params):
+            barrier.wait()
+            return pysolr.Results({'response': {'docs': [], 'numFound': 0},
+                                   'facet_counts': {'facet_fields': {f: ['X:1', 1] for f in params['facet.field']}}})
+
+    q = GolrAssociationQuery(subject_category='gene', object_category='phenotype',
+                             fetch_objects=True, fetch_subjects=True, solr=BarrierSolr(), use_cache=False)
+    results = q.exec()
+    assert results['objects'] == ['X:1']
+    assert results['subjects'] == ['X:1']
+
+
+def test_nested_subqueries():
+    """
+    Queries with sub-queries can themselves run on the subquery executor, more of them than it has workers
+    """
+    class FacetSolr():
+        def search(self, **params):
+            return pysolr.Results({'response': {'docs': [], 'numFound': 0},
+                                   'facet_counts': {'facet_fields': {f: ['X:1', 1] for f in params.get('facet.field', [])}}})
+
+    def outer():
+        q = GolrAssociationQuery(subject_category='gene', object_category='phenotype',
+                                 fetch_objects=True, fetch_subjects=True, solr=FacetSolr(), use_cache=False)
+        return q.exec()['objects']
+
+    futures = [golr_query.submit_subquery(outer) for i in range(golr_query.SUBQUERY_WORKERS * 2)]
+    assert [f.result(timeout=10) for f in futures] == [['X:1']] * len(futures)
+
+
+def test_shared_solr_session():
+    url = 'http://localhost:8983/solr/golr'
+    q1 = GolrAssociationQuery(url=url)
+    q2 = GolrAssociationQuery(url=url)
+    assert q1.solr is not q2.solr
+    assert q1.solr.get_session() is q2.solr.get_session()
+    assert q1.solr.get_session().headers['User-Agent'] == q1.user_agent
+    q3 = GolrAssociationQuery(url=url, user_agent='test')
+    assert q3.solr.get_session() is not q1.solr.get_session()
+
+
+def test_exec_rows():
+    docs = [{'id': str(i), 'subject': 'G:{}'.format(i), 'object': 'HP:{}'.format(i), 'object_closure': ['HP:0', 'HP:{}'.format(i)]}
+            for i in range(5)]
+    solr = CursorSolr(docs)
+    q = GolrAssociationQuery(subject_category='gene', object_category='phenotype', rows=2, iterate=True, solr=solr)
+    rows = list(q.exec_rows([GolrFields.SUBJECT, GolrFields.OBJECT_CLOSURE, GolrFields.SUBJECT_LABEL]))
+    assert rows == [('G:{}'.format(i), ['HP:0', 'HP:{}'.format(i)], None) for i in range(5)]
+    assert solr.calls[0][1]['fl'] == 'subject,object_closure,subject_label'
+
+    # without iterate, only the first rows results
+    solr = CursorSolr(docs)
+    q = GolrAssociationQuery(subject_category='gene', object_category='phenotype', rows=2,
+                             invert_subject_object=True, solr=solr)
+    df = q.exec_frame([GolrFields.SUBJECT, GolrFields.OBJECT])
+    assert list(df.columns) == [GolrFields.SUBJECT, GolrFields.OBJECT]
+    assert df.values.tolist() == [['HP:0', 'G:0'], ['HP:1', 'G:1']]
+    assert len(solr.calls) == 1
+
+    # compact associations for a single page
+    solr = CursorSolr(docs)
+    q = GolrAssociationQuery(subject_category='gene', object_category='phenotype', rows=2,
+                             use_compact_associations=True, solr=solr)
+    assert [a['subject'] for a in q.exec_iter(single_page=True)] == ['G:0', 'G:1']
+    assert len(solr.calls) == 1
@@ -0,0 +1,46 @@
+from ontobio.ontol_factory import OntologyFactory
+from ontobio.ontol import Synonym
+
+NUCLEUS = 'GO:0005634'
+
+
+def brute_force(ont, term, synonyms=False, **args):
+    matches = set(n for n in ont.nodes() if ont._is_match(ont.label(n), term, **args))
+    if synonyms:
+        for n in ont.nodes():
+            for s in ont.synonyms(n):
+                if ont._is_match(s.val, term, **args):
+                    matches.add(n)
+    return matches
+
+
+def test_resolve_names_with_index():
+    """
+    names resolved via the lexical index match a scan of all labels and synonyms
+    """
+    ont = OntologyFactory().create("tests/resources/nucleus.json")
+    for term in ['nucleus', 'cell nucleus', 'nucl', 'cell%', '%', '^c.*t$', 'Nucleus', 'x']:
+        for synonyms in [False, True]:
+            for args in [{}, {'is_partial_match': True}, {'is_regex': True}]:
+                assert set(ont.resolve_names([term], synonyms=synonyms, **args)) == \
+                    brute_force(ont, term, synonyms=synonyms, **args)
+    assert ont.resolve_names(['GO:1234567']) == ['GO:1234567']
+    assert ont.search('cell nucleus', synonyms=True) == [NUCLEUS]
+
+    index = ont.lexical_index()
+    assert NUCLEUS in index.normalized_match('Cell  Nucleus')
+    assert NUCLEUS in index.prefix('cell nuc')
+    assert NUCLEUS in index.token_match('nucleus cell')
+    assert index.token_match('') == set()
+
+    syns = ont.all_synonyms()
+    assert len(syns) == sum(len(ont.synonyms(n)) for n in ont.nodes())
+    assert len(ont.all_synonyms(include_label=True)) == len(syns) + len(ont.nodes())
+    assert all(s.pred != 'label' for s in syns)
+
+    ont.add_synonym(Synonym(NUCLEUS, val='karyon'))
+    assert ont.lexical_index() is not index
+    assert ont.search('karyon', synonyms=True) == [NUCLEUS]
+    assert len(ont.all_synonyms()) == len(syns) + 1
+    ont.add_node('X:1', 'karyon like')
+    assert set(ont.search('karyon', synonyms=True, is_partial_match=True)) == {NUCLEUS, 'X:1'}
@@ -132,6 +132,49 @@ def test_lexmap_multi():
     df = lexmap.as_dataframe(g)
     print(df.to_csv(sep="\t"))
 
+def test_lexmap_workers_and_bucket_cap(monkeypatch):
+    """
+    Scoring in worker processes gives the same graph, and oversized lexical values are skipped
+    """
+    import ontobio.lexmap
+    factory = OntologyFactory()
+    onts = [factory.create('tests/resources/autopod-{}.json'.format(f)) for f in ['x','m','h','bto']]
+
+    def xref_graph(**args):
+        lexmap = LexicalMapEngine(**args)
+        lexmap.index_ontologies(onts)
+        g = lexmap.get_xref_graph()
+        return (lexmap, {tuple(sorted((x,y))): (d['score'], d['simscores']) for (x,y,d) in g.edges(data=True)})
+
+    (lexmap, serial) = xref_graph()
+    assert lexmap.stats['oversized_lexical_values'] == 0
+    monkeypatch.setattr(ontobio.lexmap, 'SEMSIM_CHUNK_SIZE', 3)
+    (_, parallel) = xref_graph(workers=2)
+    assert parallel == serial
+
+    (lexmap, capped) = xref_graph(config={'max_bucket_size': 2})
+    assert lexmap.stats['oversized_lexical_values'] > 0
+    assert set(capped) < set(serial)
+
+def test_semsim_blanket_cache():
+    """
+    Blankets are memoized until another ontology is indexed, and neighbors are partitioned by prefix
+    """
+    factory = OntologyFactory()
+    lexmap = LexicalMapEngine()
+    lexmap.index_ontology(factory.create('tests/resources/autopod-x.json'))
+    xg = lexmap.get_xref_graph()
+    nid = next(iter(lexmap.id_to_ontology_map))
+    assert lexmap._blanket(nid) is lexmap._blanket(nid)
+    lexmap.index_ontology(factory.create('tests/resources/autopod-m.json'))
+    assert lexmap._blankets == {}
+    xg = lexmap.get_xref_graph()
+    adjacency = lexmap._xref_adjacency(xg)
+    for (n, by_prefix) in adjacency.items():
+        assert set().union(*by_prefix.values()) == set(xg.neighbors(n))
+        for (pfx, xs) in by_prefix.items():
+            assert all(lexmap._id_to_ontology(x) == pfx for x in xs)
+
 def test_awe_1_to_many_flat():
     """
     Text axiom weight estimation, for a 1-to-many situation, where the many are not inter-related
@@ -258,3 +258,35 @@ def test_obsolete():
     assert ont.replaced_by('GO:0005913') == ['GO:0005912']
     assert ont.replaced_by('GO:0006758') == ['GO:0006754']
     assert n_obs == 5
+
+def test_stream_json_parse():
+    """
+    Streaming load gives the same graph as a full load, without retaining the document
+    """
+    from ontobio import obograph_util
+    from ontobio.util.json_stream import JsonStreamReader
+    import io
+    fn = 'tests/resources/nucleus.json'
+    g1 = obograph_util.convert_json_file(fn)
+    # small chunks exercise values split across reads
+    g2 = obograph_util.convert_json_file(fn, stream=True, chunk_size=7)
+    assert g2['graphdoc'] is None
+    assert g1['id'] == g2['id']
+    assert g1['meta'] == g2['meta']
+    assert sorted(g1['graph'].nodes()) == sorted(g2['graph'].nodes())
+    assert sorted(g1['graph'].edges(data='pred')) == sorted(g2['graph'].edges(data='pred'))
+    assert sorted(g1['xref_graph'].edges()) == sorted(g2['xref_graph'].edges())
+    assert len(g1['logical_definitions']) == len(g2['logical_definitions'])
+
+    ont = OntologyFactory().create(fn, stream=True)
+    assert ont.graphdoc is None
+    assert ont.label('GO:0005634') == 'nucleus'
+
+    reader = JsonStreamReader(io.StringIO('{"a": [1, 22, {"x": null}], "b": 333}'), chunk_size=2)
+    found = []
+    for key in reader.iter_object():
+        if key == 'a':
+            found += list(reader.iter_values())
+        else:
+            found.append(reader.value())
+    assert found == [1, 22, {"x": None}, 333]
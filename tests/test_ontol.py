@@ -32,3 +32,31 @@ def test_ontology_synonyms():
 
     assert syn[0].__dict__ == ontol.Synonym("GO:0005634", val="cell nucleus", pred="hasExactSynonym", lextype=None,
                         xrefs=[], ontology=None, confidence=1.0, synonymType="http://purl.obolibrary.org/obo/go-test#systematic_synonym").__dict__
+
+def test_closure_index_matches_traversal():
+    ontology = ontol_factory.OntologyFactory().create("tests/resources/goslim_generic.json")
+    nodes = list(ontology.nodes())
+    for relations in [None, ["subClassOf"], ["subClassOf", "BFO:0000050"]]:
+        expected = {n: (set(ontology.ancestors(n, relations=relations)),
+                        set(ontology.descendants(n, relations=relations, reflexive=True))) for n in nodes}
+        ontology.enable_closure_index()
+        for n in nodes:
+            assert set(ontology.ancestors(n, relations=relations)) == expected[n][0]
+            assert set(ontology.descendants(n, relations=relations, reflexive=True)) == expected[n][1]
+        ontology.enable_closure_index(False)
+
+def test_closure_index_invalidated_on_update():
+    ontology = ontol.Ontology()
+    ontology.add_node("X:1")
+    ontology.add_node("X:2")
+    ontology.add_parent("X:2", "X:1")
+    ontology.enable_closure_index()
+    assert ontology.ancestors("X:2") == ["X:1"]
+    assert ontology.ancestors("X:3", reflexive=True) == ["X:3"]
+    ontology.add_node("X:3")
+    ontology.add_parent("X:3", "X:2")
+    assert set(ontology.ancestors("X:3")) == {"X:1", "X:2"}
+    assert set(ontology.descendants("X:1", reflexive=True)) == {"X:1", "X:2", "X:3"}
+    # cycles are collapsed
+    ontology.add_parent("X:1", "X:3")
+    assert set(ontology.ancestors("X:1")) == {"X:2", "X:3"}
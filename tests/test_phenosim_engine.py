@@ -147,3 +147,29 @@ class TestPhenoSimEngine():
         classes = ['HP:0002367', 'HP:0031466', 'HP:0007123']
         search_results = self.pheno_sim.search(classes, method=SimAlgorithm.SIM_GIC)
         assert search_results.matches == []
+
+
+def test_batch_compare():
+    """
+    comparisons against a local engine are done in one batch,
+    and give the same scores as comparing profiles one at a time
+    """
+    from ontobio.ontol_factory import OntologyFactory
+    from ontobio.assoc_factory import AssociationSetFactory
+    from ontobio.sim.api.semsearch import SemSearchEngine
+
+    ont = OntologyFactory().create("tests/resources/go-truncated-pombase.json")
+    aset = AssociationSetFactory().create_from_gaf(open("tests/resources/truncated-pombase.gaf", "r"), ontology=ont)
+    engine = SemSearchEngine(assocmodel=aset)
+    reference = ['GO:0005634', 'GO:0003674']
+    profiles = [aset.annotations(s) for s in aset.subjects[:20] if len(aset.annotations(s)) > 1]
+
+    with patch.object(SemSearchEngine, 'compare', side_effect=AssertionError) as compare:
+        results = PhenoSimEngine(engine).compare(reference, profiles, method=SimAlgorithm.RESNIK)
+    assert not compare.called
+    assert len(results.matches) == len(profiles)
+    assert results.query.reference.id == ' + '.join(reference)
+    for (profile, match) in zip(profiles, results.matches):
+        assert match.id == ' + '.join(profile)
+        expected = engine.compare(reference, profile, method=SimAlgorithm.RESNIK)
+        assert abs(match.score - expected.matches[0].score) < 1e-9
@@ -0,0 +1,44 @@
+from ontobio.ontol_factory import OntologyFactory
+from ontobio.assoc_factory import AssociationSetFactory
+from ontobio.sim.api.semsearch import SemSearchEngine
+from ontobio.sim.api.profile_index import ProfileSearchIndex
+from ontobio.sim.api.interfaces import FilteredSearchable
+from ontobio.vocabulary.similarity import SimAlgorithm
+
+ONT = "tests/resources/go-truncated-pombase.json"
+POMBASE = "tests/resources/truncated-pombase.gaf"
+
+
+def test_topk_matches_exhaustive():
+    """
+    pruned top-k search gives the same ranking as scoring every subject
+    """
+    ont = OntologyFactory().create(ONT)
+    aset = AssociationSetFactory().create_from_gaf(open(POMBASE, "r"), ontology=ont)
+    engine = SemSearchEngine(assocmodel=aset)
+    categories = {s: 'gene' if i % 3 else 'complex' for (i, s) in enumerate(aset.subjects)}
+    index = ProfileSearchIndex(assocmodel=aset, subject_taxon_map={s: 'NCBITaxon:4896' for s in aset.subjects},
+                               subject_category_map=categories)
+    assert isinstance(index, FilteredSearchable)
+
+    queries = [aset.annotations(s) for s in aset.subjects[:40:8]]
+    queries.append(['GO:0005634', 'GO:0003674'])
+    for query in queries:
+        for method in index.matchers():
+            for limit in [1, 5, 50]:
+                expected = engine.search(query, [], limit=limit, method=method)
+                result = index.search(query, [], limit=limit, method=method)
+                assert [(m.id, m.rank) for m in result.matches] == [(m.id, m.rank) for m in expected.matches]
+                for (m, e) in zip(result.matches, expected.matches):
+                    assert abs(m.score - e.score) < 1e-9
+
+    query = queries[0]
+    expected = [m.id for m in engine.search(query, ['GO:0005634'], limit=10).matches]
+    assert [m.id for m in index.search(query, ['GO:0005634'], limit=10).matches] == expected
+
+    result = index.filtered_search(query, [], limit=10, taxon_filter='4896', category_filter='complex')
+    assert len(result.matches) == 10
+    assert all(categories[m.id] == 'complex' for m in result.matches)
+    all_complexes = [m.id for m in index.search(query, [], limit=None).matches if categories[m.id] == 'complex']
+    assert [m.id for m in result.matches] == all_complexes[:10]
+    assert index.filtered_search(query, [], limit=10, taxon_filter='9606').matches == []
@@ -6,6 +6,7 @@ from ontobio.model import association
 from ontobio.model.association import Curie
 from ontobio.io.gpadparser import GpadParser
 from ontobio.io import qc
+from ontobio.io import parseprofile
 from ontobio.io import gaference
 from ontobio.io import assocparser
 from ontobio.io import gafparser
@@ -851,5 +852,53 @@ def test_all_rules():
     assert test_results[qc.GoRules.GoRule29.value].result_type == qc.ResultType.PASS
 
 
+def test_rule_plan_matches_all_rules():
+    config = all_rules_config(ontology=ontology)
+    config.paint = False
+    annotations = []
+    for (goid, evidence, withfrom) in [("GO:0005515", "ISS", "blah:blah12345"), ("GO:0003824", "IPI", ""),
+                                       ("GO:0006397", "IEA", ""), ("GO:0008150", "ND", ""), ("GO:0005575", "IC", "GO:0005634"),
+                                       ("GO:0042803", "IDA", "BLAH:12345"), ("GO:0005634", "IBA", "")]:
+        annotations.append(make_annotation(goid=goid, evidence=evidence, withfrom=withfrom).associations[0])
+
+    plan = qc.GoRulePlan(config)
+    for annotation in annotations:
+        expected_annotation = copy.deepcopy(annotation)
+        expected = {}
+        for rule in qc.GoRules:
+            result = rule.value.run_test(expected_annotation, config)
+            expected_annotation = result.result
+            expected[rule.value] = result
+
+        results = plan.run(copy.deepcopy(annotation))
+        assert results.annotation == expected_annotation
+        assert list(results.all_results.keys()) == list(expected.keys())
+        for rule, result in results.all_results.items():
+            assert result.result_type == expected[rule].result_type, rule.id
+
+    timings = plan.rule_timings()
+    assert timings["GORULE:0000002"]["calls"] == 1
+    assert timings["GORULE:0000007"]["calls"] == 1
+    assert timings["GORULE:0000011"]["calls"] == len(annotations)
+
+
+
+def test_rule_plan_profile_skips_dispatched_rules():
+    """
+    Rules the plan passes without calling test have no calls or outcomes in the profile
+    """
+    config = all_rules_config(ontology=ontology)
+    plan = qc.GoRulePlan(config)
+    profile = parseprofile.ParseProfile()
+    # GORULE:0000005 only tests IEA, ISS, ISO, ISM, ISA, IBA and RCA annotations to binding terms
+    for (goid, evidence) in [("GO:0005515", "IDA"), ("GO:0003824", "IEA"), ("GO:0005634", "ISS")]:
+        plan.run(make_annotation(goid=goid, evidence=evidence).associations[0], profile=profile)
+
+    assert plan.rule_timings()["GORULE:0000005"]["calls"] == 0
+    assert "GORULE:0000005" not in profile.rules
+    rule = profile.rules["GORULE:0000011"]
+    assert rule["calls"] == 3
+    assert rule["pass"] + rule["warning"] + rule["error"] + rule["repaired"] == 3
+
 if __name__ == "__main__":
     pytest.main(args=["tests/test_qc.py"])
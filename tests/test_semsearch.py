@@ -5,6 +5,7 @@ from ontobio.io.gafparser import GafParser
 from ontobio.assoc_factory import AssociationSetFactory
 from ontobio.ontol_factory import OntologyFactory
 from ontobio.sim.api.semsearch import SemSearchEngine
+from ontobio.vocabulary.similarity import SimAlgorithm
 import logging
 
 POMBASE = "tests/resources/truncated-pombase.gaf"
@@ -51,3 +52,49 @@ def test_semsearch():
             tups = sse.pw_score_resnik_bestmatches(i,j)
             print('{} x {} = {} // {}'.format(i,j,sim, tups))
     
+
+
+def test_local_search_and_compare(tmpdir):
+    """
+    MICAs from ancestor bitsets match a brute force calculation
+    """
+    ont = OntologyFactory().create(ONT)
+    aset = AssociationSetFactory().create_from_gaf(open(POMBASE, "r"), ontology=ont)
+    sse = SemSearchEngine(assocmodel=aset, cache_dir=str(tmpdir))
+    ics = sse.calculate_all_information_content()
+    subjects = aset.subjects[:10]
+    classes = list(set(c for s in subjects for c in aset.annotations(s)))
+    sse.calculate_all_micas(classes)
+    for c1 in classes:
+        ancs1 = ont.ancestors(c1, reflexive=True)
+        for c2 in classes:
+            common = set(ancs1) & set(ont.ancestors(c2, reflexive=True))
+            max_ic = max([ics[a] for a in common if a in ics], default=0.0)
+            assert abs(sse.mica_ic_df.loc[c1, c2] - max_ic) < 1e-9
+            if len(common) > 0:
+                assert sse.mica_df.loc[c1, c2] == set(a for a in common if a in ics and ics[a] == max_ic)
+    assert len(tmpdir.listdir()) == 1
+    cached = SemSearchEngine(assocmodel=aset, cache_dir=str(tmpdir))
+    cached.calculate_all_micas(classes)
+    assert (cached.mica_ic_df.values == sse.mica_ic_df.values).all()
+
+    s1, s2 = subjects[0], subjects[1]
+    (bma, _, _) = sse.pw_score_resnik_bestmatches(s1, s2)
+    result = sse.compare(aset.annotations(s1), aset.annotations(s2), method=SimAlgorithm.SYMMETRIC_RESNIK)
+    assert abs(result.matches[0].score - bma) < 1e-9
+    result = sse.compare([s1], [s2], method=SimAlgorithm.JACCARD)
+    assert abs(result.matches[0].score - sse.pw_score_jaccard(s1, s2)) < 1e-9
+
+    for method in sse.matchers():
+        result = sse.search([s1], [], limit=5, method=method)
+        assert len(result.matches) == 5
+        scores = [m.score for m in result.matches]
+        assert scores == sorted(scores, reverse=True)
+        assert result.matches[0].id == s1
+        assert result.matches[0].rank == 1
+        for m in result.matches:
+            other = sse.compare([s1], [m.id], method=method)
+            assert abs(other.matches[0].score - m.score) < 1e-9
+    result = sse.search(aset.annotations(s1), aset.annotations(s1)[:1], limit=None)
+    assert s1 not in [m.id for m in result.matches]
+    assert sse.search(['FAKE:1'], [], limit=1).query.unresolved_ids == ['FAKE:1']
@@ -0,0 +1,61 @@
+import os
+
+from ontobio.ontol_factory import OntologyFactory, get_checksum
+from ontobio.compact_ontol import CompactOntology
+from ontobio import snapshot
+
+NUCLEUS = "tests/resources/nucleus.json"
+GOSLIM = "tests/resources/goslim_generic.json"
+
+def test_snapshot_roundtrip(tmpdir):
+    ont = OntologyFactory().create(GOSLIM)
+    path = os.path.join(str(tmpdir), "goslim" + snapshot.SUFFIX)
+    snapshot.write_snapshot(ont, path)
+    loaded = snapshot.read_snapshot(path)
+    assert isinstance(loaded, CompactOntology)
+    assert loaded.id == ont.id
+    assert set(loaded.nodes()) == set(ont.nodes())
+    for n in ont.nodes():
+        assert loaded.label(n) == ont.label(n)
+        assert set(loaded.ancestors(n)) == set(ont.ancestors(n))
+        assert loaded.subsets(n) == ont.subsets(n)
+        assert loaded.is_obsolete(n) == ont.is_obsolete(n)
+        assert loaded.replaced_by(n, strict=False) == ont.replaced_by(n, strict=False)
+        assert [str(s) for s in loaded.synonyms(n)] == [str(s) for s in ont.synonyms(n)]
+        assert set(loaded.xrefs(n)) == set(ont.xrefs(n))
+    assert len(loaded.all_property_chain_axioms) == len(ont.all_property_chain_axioms)
+
+def test_snapshot_mutable(tmpdir):
+    ont = OntologyFactory().create(NUCLEUS)
+    path = os.path.join(str(tmpdir), "nucleus" + snapshot.SUFFIX)
+    snapshot.write_snapshot(ont, path)
+    loaded = snapshot.read_snapshot(path)
+    assert len(loaded.all_logical_definitions) == 2
+    loaded.add_node("X:1", label="x")
+    loaded.add_parent("X:1", "GO:0005634")
+    loaded.set_obsolete("GO:0005634")
+    assert "GO:0005634" in loaded.ancestors("X:1")
+    assert "GO:0005634" in loaded.all_obsoletes()
+
+def test_factory_creates_and_reuses_snapshot(tmpdir):
+    snapshot_dir = str(tmpdir)
+    path = snapshot.snapshot_path(snapshot.snapshot_key(get_checksum(NUCLEUS)), snapshot_dir)
+    ont = OntologyFactory().create(NUCLEUS, snapshot=True, snapshot_dir=snapshot_dir)
+    assert os.path.isfile(path)
+    again = OntologyFactory().create(NUCLEUS, snapshot=True, snapshot_dir=snapshot_dir)
+    assert isinstance(again, CompactOntology)
+    assert sorted(again.nodes()) == sorted(ont.nodes())
+    assert again.label("GO:0005634") == "nucleus"
+
+def test_snapshot_per_load_options(tmpdir):
+    snapshot_dir = str(tmpdir)
+    full = OntologyFactory().create(NUCLEUS, snapshot=True, snapshot_dir=snapshot_dir)
+    subclasses = OntologyFactory().create(NUCLEUS, snapshot=True, snapshot_dir=snapshot_dir, predicates=['subClassOf'])
+    assert len(subclasses.get_graph().edges()) < len(full.get_graph().edges())
+    assert len(os.listdir(snapshot_dir)) == 2
+
+    # options at their defaults, and predicates in another order, share a snapshot
+    again = OntologyFactory().create(NUCLEUS, snapshot=True, snapshot_dir=snapshot_dir, parse_meta=True)
+    assert len(again.get_graph().edges()) == len(full.get_graph().edges())
+    assert snapshot.snapshot_key("x", predicates=['a', 'b']) == snapshot.snapshot_key("x", predicates=['b', 'a'])
+    assert len(os.listdir(snapshot_dir)) == 2
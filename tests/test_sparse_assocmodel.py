@@ -0,0 +1,57 @@
+from ontobio.ontol_factory import OntologyFactory
+from ontobio.assoc_factory import AssociationSetFactory
+from ontobio.sparse_assocmodel import SparseAssociationSet
+
+ONT = "tests/resources/go-truncated-pombase.json"
+POMBASE = "tests/resources/truncated-pombase.gaf"
+
+NUCLEUS = 'GO:0005634'
+CYTOPLASM = 'GO:0005737'
+
+
+def test_sparse_matches_dict():
+    """
+    sparse and dict backed association sets give the same results
+    """
+    ont = OntologyFactory().create(ONT)
+    f = AssociationSetFactory()
+    aset = f.create_from_gaf(open(POMBASE, "r"), ontology=ont)
+    sset = f.create_from_gaf(open(POMBASE, "r"), ontology=ont, sparse=True)
+    assert isinstance(sset, SparseAssociationSet)
+    assert sset.subjects == aset.subjects
+    assert sset.objects == aset.objects
+
+    for s in aset.subjects:
+        assert sset.inferred_types(s) == aset.inferred_types(s)
+    assert sset.inferred_types('nonexistent') == set()
+    assert dict(sset.subject_to_inferred_map) == aset.subject_to_inferred_map
+
+    for (terms, negated) in [([], []), ([NUCLEUS], []), ([NUCLEUS, CYTOPLASM], []), ([NUCLEUS], [CYTOPLASM]),
+                             (['owl:Thing'], [NUCLEUS]), (['GO:9999999'], [])]:
+        assert sset.query(terms, negated) == aset.query(terms, negated)
+
+    terms = [NUCLEUS, CYTOPLASM, 'GO:0003674', 'GO:9999999']
+    for symmetric in [False, True]:
+        assert sset.query_intersections(terms, terms, symmetric=symmetric) == \
+            aset.query_intersections(terms, terms, symmetric=symmetric)
+
+    subjects = aset.subjects[:20]
+    for s1 in subjects:
+        for s2 in subjects:
+            assert sset.jaccard_similarity(s1, s2) == aset.jaccard_similarity(s1, s2)
+    assert sset.similarity_matrix(subjects, subjects) == aset.similarity_matrix(subjects, subjects)
+
+    df = aset.as_dataframe(subjects=subjects)
+    sdf = sset.as_dataframe(subjects=subjects)
+    assert (sdf[df.columns] == df).all().all()
+
+    sample = sset.query([NUCLEUS])[:10]
+    for direction in ['greater', 'less']:
+        results = aset.enrichment_test(subjects=sample, threshold=1.1, direction=direction)
+        sresults = sset.enrichment_test(subjects=sample, threshold=1.1, direction=direction)
+        assert len(results) > 0
+        assert sorted(results, key=lambda r: (r['p'], r['c'])) == sorted(sresults, key=lambda r: (r['p'], r['c']))
+    background = aset.subjects[:100]
+    results = aset.enrichment_test(subjects=sample, background=background, threshold=1.1, hypotheses=[NUCLEUS, CYTOPLASM])
+    sresults = sset.enrichment_test(subjects=sample, background=background, threshold=1.1, hypotheses=[NUCLEUS, CYTOPLASM])
+    assert sorted(results, key=lambda r: r['c']) == sorted(sresults, key=lambda r: r['c'])
@@ -2,14 +2,17 @@ from pathlib import Path
 
 import pytest
 from click.testing import CliRunner
-from bin.validate import produce
+from bin.validate import produce, produce_products
+import gzip
 import os
+import shutil
 import requests
 
 from ontobio import OntologyFactory
 from ontobio.io import assocparser
 from ontobio.io.gafparser import GafParser
 from ontobio.io.gpadparser import GpadParser
+from ontobio.validation import tools
 
 
 @pytest.fixture
@@ -42,6 +45,66 @@ def test_fast_function():
     assert True
 
 
+def test_produce_products(tmp_path):
+    """
+    All products are written in one pass, with PRO isoforms fixed and the mixin merged in
+    """
+    base_path = Path(__file__).parent / "resources"
+    for (resource, name) in [("mgi.gaf", "mgi-src.gaf"), ("wb_single_iba.gaf", "paint_mgi.gaf"), ("mgi.truncated.gpi2", "mgi.gpi2")]:
+        shutil.copyfile(base_path / resource, tmp_path / name)
+    ontology_graph = OntologyFactory().create(str(base_path / "go-truncated-pombase.json"))
+    products = {"gaf": True, "gpi": True, "gpad": True, "ttl": False}
+    mixins = [{"dataset": "paint_mgi", "group": "paint", "source": str(tmp_path / "paint_mgi.gaf"), "format": "gaf",
+               "config_args": dict(paint=True)}]
+    paths = produce_products("mgi", str(tmp_path / "mgi-src.gaf"), ontology_graph, dict(rule_set=assocparser.RuleSet.ALL),
+                             products, group="mgi", mixins=mixins, gpi_paths=[str(tmp_path / "mgi.gpi2")],
+                             gpad_gpi_output_version="2.0")
+    assert paths == [str(tmp_path / f) for f in ["mgi.gaf", "mgi.gpi", "mgi.gpad"]]
+    for f in paths + [str(tmp_path / "mgi_valid.gaf"), str(tmp_path / "paint_mgi_valid.gaf")]:
+        with open(f) as plain, gzip.open(f + ".gz", "rt") as zipped:
+            assert plain.read() == zipped.read()
+    assert os.path.exists(tmp_path / "mgi.report.json")
+
+    with open(tmp_path / "mgi.gaf") as gaf_file:
+        gaf_lines = [line for line in gaf_file if not line.startswith("!")]
+    with open(base_path / "mgi.gaf") as source:
+        n_source = len([line for line in source if not line.startswith("!")])
+    assert len(gaf_lines) == n_source + 1
+    assert not any(line.startswith("PR") for line in gaf_lines)
+    assert len([line for line in gaf_lines if "PR:Q9Z2D6" in line.split("\t")[16]]) > 0
+    assert gaf_lines[-1].startswith("WB\tWBGene00022144")
+
+    with open(tmp_path / "mgi.gpad") as gpad_file:
+        gpad_lines = [line for line in gpad_file if not line.startswith("!")]
+    assert len(gpad_lines) == len(gaf_lines)
+    assert any(line.startswith("PR:Q9Z2D6") for line in gpad_lines)
+
+    with open(tmp_path / "mgi.gpi") as gpi_file:
+        gpi_ids = [line.split("\t")[0] for line in gpi_file if not line.startswith("!")]
+    assert len(gpi_ids) == len(set(gpi_ids))
+    assert "WB:WBGene00022144" in gpi_ids
+    assert not any(i.startswith("PR") for i in gpi_ids)
+
+
+def test_parallel_gzip(tmp_path):
+    """
+    Blocks compressed in parallel are concatenated into one valid gzip file
+    """
+    text = "".join("line {}\tGO:{:07d}\n".format(i, i % 1000) for i in range(50000))
+    with tools.TeeGzipFile(str(tmp_path / "direct.tsv"), uncompressed=False) as direct:
+        direct.write(text)
+    assert direct.name == str(tmp_path / "direct.tsv.gz")
+    assert not os.path.exists(tmp_path / "direct.tsv")
+
+    with tools.ParallelGzipFile(str(tmp_path / "blocks.tsv.gz"), level=1, threads=3, block_size=4096) as blocks:
+        blocks.write(text.encode())
+    (tmp_path / "plain.tsv").write_text(text)
+    tools.zipup(str(tmp_path / "plain.tsv"), level=6, threads=2)
+    for f in ["direct.tsv.gz", "blocks.tsv.gz", "plain.tsv.gz"]:
+        with gzip.open(tmp_path / f, "rt") as zipped:
+            assert zipped.read() == text
+
+
 # (dataset, group) tuples, adjust as needed for full testing
 datasets_to_test = [
     # ("zfin", "zfin"),